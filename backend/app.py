@@ -7,6 +7,10 @@ import requests
 import json
 import math
 
+from config_odds import ODDS_API_KEY
+from odds_client import get_client
+from player_names import PlayerNameResolver, load_aliases
+
 # --- NEW IMPORTS FOR AUTH ---
 import firebase_admin
 from firebase_admin import credentials, firestore
@@ -274,19 +278,22 @@ def get_player_props():
         if os.path.exists(proj_path):
             with open(proj_path, "r") as f:
                 ml_data = json.load(f)
-                # Build a dictionary for instant lookups using lowercase names to prevent typos
+                # keyed by personId; sportsbook names are resolved to it below
                 for p in ml_data.get("projections", []):
-                    proj_map[p["name"].lower()] = p
+                    proj_map[p["player_id"]] = p
+
+        # Accents, suffixes, punctuation and nicknames: player_names.py
+        resolver = PlayerNameResolver({pid: p.get("name") for pid, p in proj_map.items()}, load_aliases())
 
         # 3. Merge the ML predictions into the Odds payload
         for prop in odds_data:
-            player_name = prop.get("player", "").lower()
+            player_id = resolver.resolve(prop.get("player"))
             market = prop.get("market")
             
             # If we trained a model for this player AND this specific stat category
-            if player_name in proj_map and market in MARKET_MAPPING:
+            if player_id is not None and market in MARKET_MAPPING:
                 ml_key = MARKET_MAPPING[market]
-                model_proj = proj_map[player_name].get(ml_key)
+                model_proj = proj_map[player_id].get(ml_key)
                 
                 if model_proj is not None:
                     line = prop.get("line")
@@ -298,6 +305,7 @@ def get_player_props():
                     if line is not None:
                         prop["edge_vs_line"] = round(float(model_proj) - float(line), 2)
 
+        resolver.report("prop players")
         return jsonify(odds_data)
 
     except FileNotFoundError:
@@ -325,20 +333,21 @@ def american_to_prob(odds):
         return -o / (-o + 100.0)
 
 
+# shared pooled client: keep-alive across requests, retries on 429/5xx.
+# The key comes from config_odds.py (written from secrets by the workflow).
+odds_client = get_client(ODDS_API_KEY)
+
+
 @app.route("/api/arbitrage")
 def get_arbitrage():
-    API_KEY = "39fc4ed3a7caf51b49d87d08ec90658a"
-    ODDS_URL = "https://api.the-odds-api.com/v4/sports/basketball_nba/odds"
-
     params = {
-        "apiKey": API_KEY,
         "regions": "us",
         "markets": "h2h",
         "oddsFormat": "american",
     }
 
     try:
-        resp = requests.get(ODDS_URL, params=params, timeout=10)
+        resp = odds_client.get("odds", params=params, timeout=10)
         resp.raise_for_status()
         events = resp.json()
     except requests.HTTPError as e:
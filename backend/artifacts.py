@@ -0,0 +1,139 @@
+# artifacts.py
+# Compact, memory-mappable model artifacts.
+#
+# The latest-stats tables used to be {id: full row dict} holding every column
+# of the training frame. LatestTable keeps only the columns the consumers
+# read, as one dense float32 matrix plus an ID index (and text labels such as
+# player names where needed). It still reads like the old dict - table[id]
+# gives {column: value}, .get / .items / `in` work - so callers don't change,
+# and matrix() hands batched callers the rows directly.
+#
+# save_artifact() writes uncompressed joblib so load_artifact() can open it
+# with mmap_mode="r": every large numpy array (the table, the trees' node and
+# value arrays) is mapped from the page cache instead of copied into memory.
+# Both print and record the artifact's size / load time.
+
+import os
+import time
+from collections.abc import Mapping
+
+import joblib
+import numpy as np
+import pandas as pd
+
+
+class LatestTable(Mapping):
+    """Read-only {id: {column: value}} backed by a float32 matrix."""
+
+    def __init__(self, ids, columns, values, labels=None):
+        self.ids = np.asarray(ids)
+        self.columns = list(columns)
+        self.array = np.asarray(values, dtype=np.float32).reshape(len(self.ids), len(self.columns))
+        self.labels = {k: list(v) for k, v in (labels or {}).items()}
+        self._index = None
+
+    @classmethod
+    def from_frame(cls, df, id_col, columns, label_columns=()):
+        """One row per id: the last row of df for each id (df in date order)."""
+        last = df.groupby(id_col, sort=False, observed=True).tail(1)
+        values = np.empty((len(last), len(columns)), dtype=np.float32)
+        for j, c in enumerate(columns):
+            values[:, j] = pd.to_numeric(last[c], errors="coerce") if c in last else np.nan
+        labels = {c: last[c].astype(str).where(last[c].notna(), "").tolist() for c in label_columns if c in last}
+        return cls(last[id_col].to_numpy(), columns, values, labels)
+
+    @classmethod
+    def from_records(cls, records, columns, label_columns=()):
+        """From an old-style {id: row dict} table."""
+        ids = list(records)
+        values = np.array(
+            [[_to_float(records[i].get(c)) for c in columns] for i in ids], dtype=np.float32
+        ).reshape(len(ids), len(columns))
+        labels = {c: [str(records[i].get(c, "")) for i in ids] for c in label_columns}
+        return cls(np.array(ids), columns, values, labels)
+
+    # ---------- lookup ----------
+
+    def _positions(self):
+        if self._index is None:
+            self._index = {_key(k): pos for pos, k in enumerate(self.ids.tolist())}
+        return self._index
+
+    def position(self, key):
+        """Row of `key` in array, or None."""
+        return self._positions().get(_key(key))
+
+    def matrix(self, keys=None, columns=None):
+        """float32 rows for `keys` (all by default), restricted to `columns` if given."""
+        values = self.array
+        if columns is not None:
+            values = values[:, [self.columns.index(c) for c in columns]]
+        if keys is None:
+            return values
+        return values[[self._positions()[_key(k)] for k in keys]]
+
+    def __getitem__(self, key):
+        pos = self.position(key)
+        if pos is None:
+            raise KeyError(key)
+        row = dict(zip(self.columns, self.array[pos].tolist()))
+        for col, labels in self.labels.items():
+            row[col] = labels[pos]
+        return row
+
+    def __iter__(self):
+        return iter(self.ids.tolist())
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, key):
+        return self.position(key) is not None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_index"] = None
+        return state
+
+
+def _key(k):
+    # numpy / python ints and strings compare equal as dict keys
+    return int(k) if isinstance(k, (int, np.integer)) else k
+
+
+def _to_float(x):
+    try:
+        return float(x)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+# ---------- save / load ----------
+
+def file_mb(path):
+    return os.path.getsize(path) / 1e6
+
+
+def save_artifact(artifact, path, metrics=None):
+    """joblib.dump, uncompressed (so it can be memory-mapped). Returns the size in MB."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    t0 = time.perf_counter()
+    joblib.dump(artifact, path)
+    size = file_mb(path)
+    name = os.path.basename(path)
+    print(f"[artifact] {name}: {size:.2f} MB written in {time.perf_counter() - t0:.2f}s")
+    if metrics is not None:
+        metrics.note(f"artifact_{name}", {"mb": round(size, 3)})
+    return size
+
+
+def load_artifact(path, mmap=True, metrics=None):
+    """joblib.load with mmap_mode="r" (read-only arrays, shared page cache)."""
+    t0 = time.perf_counter()
+    artifact = joblib.load(path, mmap_mode="r" if mmap else None)
+    load_s = time.perf_counter() - t0
+    name = os.path.basename(path)
+    print(f"[artifact] {name}: {file_mb(path):.2f} MB loaded in {load_s * 1e3:.0f} ms")
+    if metrics is not None:
+        metrics.note(f"load_{name}", {"mb": round(file_mb(path), 3), "load_s": round(load_s, 4)})
+    return artifact
@@ -0,0 +1,57 @@
+# bench.py
+# Timing and report helpers shared by the benchmark entry points
+# (team_estimators.py, player_models.py, tree_predictor.py, slate_benchmark.py).
+#
+# Each of those keeps its own benchmark(): what is compared differs (backends,
+# layouts, sklearn vs flat trees, per-item vs batched). The timing loop and
+# the printing are the same everywhere and live here.
+
+import time
+
+
+def timed(fn):
+    """(fn(), seconds) for a single call, e.g. a fit."""
+    t0 = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - t0
+
+
+def best_time(fn, repeats=20):
+    """Fastest of `repeats` calls to fn(), in seconds (the least noisy estimate)."""
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def best_ms(fn, repeats=20):
+    return best_time(fn, repeats) * 1e3
+
+
+def _cell(value):
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        return f"{value:,.3f}"
+    if isinstance(value, int):
+        return f"{value:,}"
+    return str(value)
+
+
+def print_report(report, label=None):
+    """One report dict on one line: 'label: key value  key value ...'."""
+    line = "  ".join(f"{k} {_cell(v)}" for k, v in report.items())
+    print(f"{label}: {line}" if label else line)
+
+
+def print_table(reports):
+    """Report dicts with the same keys (one per backend / layout) as aligned columns."""
+    if not reports:
+        return
+    header = list(reports[0])
+    rows = [[_cell(r.get(k)) for k in header] for r in reports]
+    widths = [max(len(h), *(len(row[i]) for row in rows)) for i, h in enumerate(header)]
+    for row in [header] + rows:
+        print("  ".join(cell.rjust(w) for cell, w in zip(row, widths)))
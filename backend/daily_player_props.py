@@ -1,24 +1,26 @@
 import os
 import json
 import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 
-import numpy as np
-import joblib
+import pandas as pd
 
 from config_odds import ODDS_API_KEY
-from nba_players_map import (
-    build_player_team_map,
-    normalize_player_name,
-    normalize_team_name,
-)
+from nba_players_map import PlayerTeamIndex, build_player_team_map
+from player_names import PlayerNameResolver, load_aliases
+import pipeline_metrics
+from artifacts import LatestTable, load_artifact
+from tree_predictor import FlatEnsemble, serving_model
+from odds_refresh_planner import RefreshPlanner
+from odds_client import get_client
+from snapshots import write_json_atomic
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(BASE_DIR, "data")
 OUTPUT_FILE = os.path.join(DATA_DIR, "player_props.json")
 
 API_KEY = ODDS_API_KEY
-BASE_URL = "https://api.the-odds-api.com/v4/sports/basketball_nba"
 
 MARKETS = [
     "player_points",
@@ -28,244 +30,318 @@ MARKETS = [
     "player_points_rebounds_assists",
 ]
 
+MAX_CONCURRENT_EVENTS = 6  # stays below odds_client.POOL_SIZE
+
 # ---------- LOAD PLAYER PROP MODEL (POINTS / REB / AST) ----------
 
 PLAYER_MODEL_PATH = os.path.join(BASE_DIR, "data", "player_prop_model.pkl")
 
-try:
-    player_artifact = joblib.load(PLAYER_MODEL_PATH)
-    pts_model = player_artifact["points_model"]
-    reb_model = player_artifact["rebounds_model"]
-    ast_model = player_artifact["assists_model"]
-    player_feature_cols = player_artifact["feature_cols"]
-    latest_player_stats = player_artifact["latest_player_stats"]
-    print(f"Loaded player prop model from {PLAYER_MODEL_PATH}")
-except Exception as e:
-    print("WARNING: Could not load player prop model:", e)
-    pts_model = reb_model = ast_model = None
-    player_feature_cols = []
-    latest_player_stats = {}
+# market -> (model key in the artifact, label)
+PROP_MODELS = {
+    "player_points": ("points_model", "points"),
+    "player_rebounds": ("rebounds_model", "rebounds"),
+    "player_assists": ("assists_model", "assists"),
+}
 
+# (market, player) -> projected stat, kept across refresh cycles until the
+# model is reloaded. Only successful predictions are kept: unknown names and
+# failed predicts are retried on the next cycle.
+_predictions = {}
+# sportsbook name -> row of the model's player table (player_names.py)
+_resolver = None
 
-def map_player_to_side(player_name, home_team, away_team, player_team_map):
-    if not player_name:
-        return "UNKNOWN"
-
-    norm_name = normalize_player_name(player_name)
-    home_norm = normalize_team_name(home_team)
-    away_norm = normalize_team_name(away_team)
-
-    player_team_norm = player_team_map.get(norm_name)
-    if player_team_norm:
-        if player_team_norm in home_norm or home_norm in player_team_norm:
-            return "HOME"
-        if player_team_norm in away_norm or away_norm in player_team_norm:
-            return "AWAY"
-
-    
-    norm_parts = norm_name.split()
-    if len(norm_parts) > 1:
-        last_name = norm_parts[-1]
-        for roster_name, roster_team in player_team_map.items():
-            roster_parts = roster_name.split()
-
-            if len(roster_parts) > 1 and roster_parts[-1] == last_name:
-                if roster_team in home_norm or home_norm in roster_team:
-                    return "HOME"
-                if roster_team in away_norm or away_norm in roster_team:
-                    return "AWAY"
-
-    return "UNKNOWN"
-
-
-def predict_player_stat(
-    player_name,
-    market_key,
-    latest_player_stats,
-    player_feature_cols,
-    pts_model,
-    reb_model,
-    ast_model,
-):
-    """
-    Returns a dict with prediction info for the given player and market, or None.
 
-    expected_value: projected stat (points / rebounds / assists)
-    label: name of stat
-    """
-    # Bail out if the model isn’t available
-    if (
-        not latest_player_stats
-        or not player_feature_cols
-        or pts_model is None
-        or reb_model is None
-        or ast_model is None
-    ):
+def load_player_model():
+    """The prop model artifact, or None when it is missing or unreadable."""
+    try:
+        player_artifact = load_artifact(PLAYER_MODEL_PATH)
+        print(f"Loaded player prop model from {PLAYER_MODEL_PATH}")
+        return player_artifact
+    except Exception as e:
+        print("WARNING: Could not load player prop model:", e)
         return None
 
-    feat_row = latest_player_stats.get(player_name)
-    if not feat_row:
-        return None
 
-    try:
-        X = np.array(
-            [feat_row.get(c, 0.0) for c in player_feature_cols], dtype=float
-        ).reshape(1, -1)
-    except Exception:
-        return None
+def reload_player_model():
+    """Swap in a freshly trained artifact (used by refresh_daemon.py)."""
+    global player_artifact, _resolver
+    player_artifact = load_player_model()
+    _predictions.clear()
+    _resolver = None
 
-    if market_key == "player_points":
-        model = pts_model
-        label = "points"
-    elif market_key == "player_rebounds":
-        model = reb_model
-        label = "rebounds"
-    elif market_key == "player_assists":
-        model = ast_model
-        label = "assists"
-    else:
-        # We only support these three right now
-        return None
 
-    try:
-        pred = float(model.predict(X)[0])
-    except Exception:
-        return None
+reload_player_model()
 
-    return {
-        "expected_value": round(pred, 1),
-        "label": label,
-        "model": "rf_player_prop",
-    }
 
+def map_player_to_side(player_name, home_team, away_team, player_team_map):
+    """HOME / AWAY / UNKNOWN; pass a PlayerTeamIndex to reuse its indexes and memo."""
+    if not isinstance(player_team_map, PlayerTeamIndex):
+        player_team_map = PlayerTeamIndex(player_team_map)
+    return player_team_map.side(player_name, home_team, away_team)
 
-def fetch_player_props():
-    try:
-        events_resp = requests.get(
-            f"{BASE_URL}/events", params={"apiKey": API_KEY}, timeout=10
-        )
-        events_resp.raise_for_status()
-        events = events_resp.json()
-    except requests.RequestException as e:
-        print("Events API error:", e)
-        return []
 
-    player_team_map = build_player_team_map()
-    all_props = []
+def _player_table(artifact):
+    table = artifact["latest_player_stats"]
+    if isinstance(table, LatestTable):
+        return table
+    # older artifacts: {playerName: row dict}
+    return LatestTable.from_records(table, artifact["feature_cols"])
 
-    for ev in events:
-        event_id = ev.get("id")
-        home_team = ev.get("home_team")
-        away_team = ev.get("away_team")
-        commence_time = ev.get("commence_time")
 
-        if not event_id:
-            continue
+def name_resolver(artifact):
+    """The resolver over the artifact's player names (rebuilt for a new artifact)."""
+    global _resolver
+    if _resolver is None or _resolver[0] is not artifact:
+        names = {name: name for name in _player_table(artifact)}
+        _resolver = (artifact, PlayerNameResolver(names, load_aliases()))
+    return _resolver[1]
 
-        try:
-            odds_resp = requests.get(
-                f"{BASE_URL}/events/{event_id}/odds",
-                params={
-                    "apiKey": API_KEY,
-                    "regions": "us",
-                    "markets": ",".join(MARKETS),
-                    "oddsFormat": "american",
-                },
-                timeout=15,
-            )
-            if odds_resp.status_code == 204 or not odds_resp.text.strip():
-                continue
 
-            if odds_resp.status_code == 429:
-                print(
-                    "Rate limited for event",
-                    event_id,
-                    "- skipping props for this game",
-                )
+def predict_props(props, artifact, memo=None):
+    """
+    Fill prop_prediction / edge_vs_line on every prop. Each distinct (player,
+    market) is predicted once, in one batched predict per market model; the
+    results are memoized in `memo` so later refreshes only predict new players
+    (and retry the ones that couldn't be predicted).
+    """
+    memo = _predictions if memo is None else memo
+    if artifact is not None and all(artifact.get(key) is not None for key, _ in PROP_MODELS.values()):
+        table = _player_table(artifact)
+        resolver = name_resolver(artifact)
+        feature_cols = artifact["feature_cols"]
+        for market, (key, label) in PROP_MODELS.items():
+            todo = sorted({
+                p["player"] for p in props
+                if p.get("market") == market and p.get("player") and (market, p["player"]) not in memo
+            })
+            # sportsbook spelling -> the table's (accents, suffixes, nicknames)
+            rows = {name: name for name in todo if name in table}
+            rows.update(resolver.resolve_many(name for name in todo if name not in rows))
+            known = list(rows)
+            if not known:
                 continue
-
-            odds_resp.raise_for_status()
-            odds_data = odds_resp.json()
-        except requests.HTTPError as e:
-            if odds_resp.status_code == 422:
+            # flat node-array forests for small batches (tree_predictor.py)
+            model = serving_model(artifact, key, n_rows=len(known))
+            X = table.matrix([rows[name] for name in known], feature_cols)
+            if not isinstance(model, FlatEnsemble):  # sklearn wants the training column names
+                X = pd.DataFrame(X, columns=feature_cols)
+            try:
+                preds = model.predict(X)
+            except Exception as e:
+                print(f"WARNING: {label} prop predictions failed:", e)
                 continue
-            print("Event odds HTTP error:", e, odds_resp.text)
-            continue
-        except requests.RequestException as e:
-            print("Event odds API error:", e)
+            memo.update({(market, name): round(float(pred), 1) for name, pred in zip(known, preds)})
+
+    for prop in props:
+        market = prop.get("market")
+        expected = memo.get((market, prop.get("player")))
+        prop["prop_prediction"] = prop["edge_vs_line"] = None
+        if expected is None:
             continue
+        prop["prop_prediction"] = {
+            "expected_value": expected,
+            "label": PROP_MODELS[market][1],
+            "model": "rf_player_prop",
+        }
+        if prop.get("line") is not None:
+            try:
+                prop["edge_vs_line"] = round(expected - float(prop["line"]), 1)
+            except (TypeError, ValueError):
+                pass
+    return props
+
+
+def load_previous_props():
+    """Props from the last snapshot, grouped by game_id."""
+    try:
+        with open(OUTPUT_FILE, "r") as f:
+            props = json.load(f).get("props", [])
+    except (OSError, ValueError):
+        return {}
+    by_game = {}
+    for prop in props:
+        by_game.setdefault(prop.get("game_id"), []).append(prop)
+    return by_game
+
+
+def build_event_props(ev, odds_data, player_team_map):
+    """Flatten one event's bookmaker/market/outcome tree into prop rows."""
+    if not isinstance(player_team_map, PlayerTeamIndex):
+        player_team_map = PlayerTeamIndex(player_team_map)
+    event_id = ev.get("id")
+    home_team = ev.get("home_team")
+    away_team = ev.get("away_team")
+    commence_time = ev.get("commence_time")
+    props = []
+
+    for bookmaker in odds_data.get("bookmakers", []):
+        book_key = bookmaker.get("key")
+        book_title = bookmaker.get("title")
+
+        for market in bookmaker.get("markets", []):
+            market_key = market.get("key")
+            if market_key not in MARKETS:
+                continue
 
-        for bookmaker in odds_data.get("bookmakers", []):
-            book_key = bookmaker.get("key")
-            book_title = bookmaker.get("title")
+            for outcome in market.get("outcomes", []):
+                player_name = outcome.get("description") or outcome.get("name")
+                line = outcome.get("point")
+                price = outcome.get("price")
+                over_under = outcome.get("name")  # "Over" / "Under"
 
-            for market in bookmaker.get("markets", []):
-                market_key = market.get("key")
-                if market_key not in MARKETS:
-                    continue
+                team_side = map_player_to_side(
+                    player_name, home_team, away_team, player_team_map
+                )
 
-                for outcome in market.get("outcomes", []):
-                    player_name = outcome.get("description") or outcome.get("name")
-                    line = outcome.get("point")
-                    price = outcome.get("price")
-                    over_under = outcome.get("name")  # "Over" / "Under"
+                props.append(
+                    {
+                        "game_id": event_id,
+                        "home_team": home_team,
+                        "away_team": away_team,
+                        "commence_time": commence_time,
+                        "team_side": team_side,
+                        "bookmaker": book_title or book_key,
+                        "market": market_key,
+                        "player": player_name,
+                        "line": line,
+                        "price": price,
+                        "over_under": over_under,
+                        # filled in for the whole slate by predict_props()
+                        "prop_prediction": None,
+                        "edge_vs_line": None,
+                    }
+                )
 
-                    team_side = map_player_to_side(
-                        player_name, home_team, away_team, player_team_map
-                    )
+    return props
 
-                   
-
-                    # ---------- NEW: model prediction for points / reb / ast ----------
-                    prediction = predict_player_stat(
-                        player_name,
-                        market_key,
-                        latest_player_stats,
-                        player_feature_cols,
-                        pts_model,
-                        reb_model,
-                        ast_model,
-                    )
 
-                    edge_vs_line = None
-                    if prediction is not None and line is not None:
-                        try:
-                            edge_vs_line = round(
-                                prediction["expected_value"] - float(line), 1
-                            )
-                        except Exception:
-                            edge_vs_line = None
-
-                    all_props.append(
-                        {
-                            "game_id": event_id,
-                            "home_team": home_team,
-                            "away_team": away_team,
-                            "commence_time": commence_time,
-                            "team_side": team_side,
-                            "bookmaker": book_title or book_key,
-                            "market": market_key,
-                            "player": player_name,
-                            "line": line,
-                            "price": price,
-                            "over_under": over_under,
-                            "prop_prediction": prediction,
-                            "edge_vs_line": edge_vs_line,
-                        }
+def fetch_event_odds(client, event_id):
+    """
+    One event's prop odds. The client already backs off and retries on
+    429/5xx, so a 429 here means the retries were exhausted.
+    """
+    return client.get(
+        f"events/{event_id}/odds",
+        params={
+            "regions": "us",
+            "markets": ",".join(MARKETS),
+            "oddsFormat": "american",
+        },
+        timeout=15,
+    )
+
+
+def fetch_player_props(player_team_map=None, planner=None):
+    client = get_client(API_KEY)
+    try:
+        events_resp = client.get("events", timeout=10)
+        events_resp.raise_for_status()
+        events = events_resp.json()
+    except requests.RequestException as e:
+        print("Events API error:", e)
+        return []
+
+    if player_team_map is None:
+        player_team_map = build_player_team_map()
+    # name / last-name indexes and the side memo, shared by every event
+    player_index = PlayerTeamIndex(player_team_map)
+    if planner is None:
+        planner = RefreshPlanner.load()
+    planner.record_quota(events_resp.headers)
+
+    # Only spend quota on events whose lines can still move; carry the last
+    # snapshot forward for upcoming games that are fresh enough.
+    to_fetch, skipped = planner.plan(events)
+    if skipped:
+        reasons = {}
+        for reason in skipped.values():
+            reasons[reason] = reasons.get(reason, 0) + 1
+        print(f"Refreshing {len(to_fetch)} events, skipping {reasons} "
+              f"(quota remaining: {planner.remaining})")
+
+    all_props = []
+    previous = load_previous_props()
+    for event_id, reason in skipped.items():
+        if reason != "started":
+            all_props.extend(previous.get(event_id, []))
+
+    # Fetch event odds concurrently (bounded) and process each as it lands,
+    # so a slow book on one game doesn't hold up the rest of the slate.
+    events_by_id = {ev.get("id"): ev for ev in events}
+    workers = max(1, min(MAX_CONCURRENT_EVENTS, len(to_fetch)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(fetch_event_odds, client, event_id): event_id
+            for event_id in to_fetch
+        }
+        for future in as_completed(futures):
+            event_id = futures[future]
+            ev = events_by_id[event_id]
+            commence_time = ev.get("commence_time")
+
+            try:
+                odds_resp = future.result()
+                planner.record_quota(odds_resp.headers)
+                if odds_resp.status_code == 429:
+                    print(
+                        "Rate limited for event",
+                        event_id,
+                        "after retries - keeping the previous props for this game",
                     )
+                    all_props.extend(previous.get(event_id, []))
+                    continue
+
+                if odds_resp.status_code == 204 or not odds_resp.text.strip():
+                    planner.record_event_odds(event_id, commence_time, {})
+                    continue
+
+                odds_resp.raise_for_status()
+                odds_data = odds_resp.json()
+                planner.record_event_odds(event_id, commence_time, odds_data)
+            except requests.HTTPError as e:
+                if odds_resp.status_code == 422:
+                    continue
+                print("Event odds HTTP error:", e, odds_resp.text)
+                continue
+            except requests.RequestException as e:
+                print("Event odds API error:", e)
+                continue
+            except Exception as e:
+                # a bad payload for one game must not drop the rest of the slate
+                print("Event odds error for", event_id, ":", e)
+                continue
 
+            all_props.extend(build_event_props(ev, odds_data, player_index))
+
+    # arrival order is nondeterministic; keep the snapshot in event order
+    event_order = {ev.get("id"): i for i, ev in enumerate(events)}
+    all_props.sort(key=lambda p: event_order.get(p.get("game_id"), len(event_order)))
+    planner.save()
+    # one batched predict per market model for every distinct player
+    all_props = predict_props(all_props, player_artifact)
+    if player_artifact is not None:
+        name_resolver(player_artifact).report("prop players")
     return all_props
 
 
-def main():
-    os.makedirs(DATA_DIR, exist_ok=True)
-    props = fetch_player_props()
+def write_snapshot(props):
     payload = {
         "last_updated": datetime.utcnow().isoformat() + "Z",
         "props": props,
     }
-    with open(OUTPUT_FILE, "w") as f:
-        json.dump(payload, f, indent=2)
+    write_json_atomic(OUTPUT_FILE, payload)
+
+
+def main():
+    metrics = pipeline_metrics.start_stage("daily_player_props")
+    os.makedirs(DATA_DIR, exist_ok=True)
+    with metrics.step("fetch_player_props"):
+        props = fetch_player_props()
+    with metrics.step("save_outputs"):
+        write_snapshot(props)
+        if player_artifact is not None:
+            # fuzzy matches + unresolved names, for review (player_names.py)
+            name_resolver(player_artifact).save()
     print(f"Saved {len(props)} player props to {OUTPUT_FILE}")
 
 
@@ -1,14 +1,28 @@
 import os
 import requests
-import joblib
 import json
+import numpy as np
 import pandas as pd
 from datetime import datetime
+from zoneinfo import ZoneInfo
 from config_odds import ODDS_API_KEY
+import pipeline_metrics
+from artifacts import LatestTable, load_artifact
+from snapshots import write_json_atomic
+from odds_refresh_planner import RefreshPlanner
+from odds_client import get_client
+from ids import TEAM_IDS, normalize_id
+from schema import schedule_time
+from nba_players_map import build_player_team_map, normalize_player_name, normalize_team_name
+from team_features import FEATURE_COLS as TEAM_FEATURE_COLS, TEAM_FEATURES, matchup_matrix
+from team_feature_store import TeamFeatureStore
+from player_models import artifact_targets, predict_targets
+from tree_predictor import FlatEnsemble, serving_model
+from model_registry import PREDICTIONS
 
 # ---------- CONFIG & PATHS ----------
 API_KEY = ODDS_API_KEY
-ODDS_API_URL = "https://api.the-odds-api.com/v4/sports/basketball_nba/odds"
+ODDS_API_PATH = "odds"
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
@@ -20,168 +34,269 @@ PLAYER_MODEL_PATH = os.path.join(BASE_DIR, "data", "player_prop_models.pkl")
 TEAM_OUTPUT = os.path.join(BASE_DIR,  "todays_data.json")
 PLAYER_OUTPUT = os.path.join(BASE_DIR,  "todays_player_projections.json")
 
-TEAM_MAP = {
-    "Atlanta Hawks": "1610612737", "Boston Celtics": "1610612738", "Brooklyn Nets": "1610612751",
-    "Charlotte Hornets": "1610612766", "Chicago Bulls": "1610612741", "Cleveland Cavaliers": "1610612739",
-    "Dallas Mavericks": "1610612742", "Denver Nuggets": "1610612743", "Detroit Pistons": "1610612765",
-    "Golden State Warriors": "1610612744", "Houston Rockets": "1610612745", "Indiana Pacers": "1610612754",
-    "Los Angeles Clippers": "1610612746", "LA Clippers": "1610612746", "Los Angeles Lakers": "1610612747",
-    "Memphis Grizzlies": "1610612763", "Miami Heat": "1610612748", "Milwaukee Bucks": "1610612749",
-    "Minnesota Timberwolves": "1610612750", "New Orleans Pelicans": "1610612740", "New York Knicks": "1610612752",
-    "Oklahoma City Thunder": "1610612760", "Orlando Magic": "1610612753", "Philadelphia 76ers": "1610612755",
-    "Phoenix Suns": "1610612756", "Portland Trail Blazers": "1610612757", "Sacramento Kings": "1610612758",
-    "San Antonio Spurs": "1610612759", "Toronto Raptors": "1610612761", "Utah Jazz": "1610612762",
-    "Washington Wizards": "1610612764",
-}
+TEAM_MAP = TEAM_IDS
+SCHEDULE_PATH = os.path.join(BASE_DIR, "data", "box_scores", "LeagueSchedule25_26.csv")
+EASTERN = ZoneInfo("America/New_York")
+PLAYER_LABELS = ("firstName", "lastName", "playerName", "playerteamId")
+
+
+def load_artifacts():
+    """Returns (team_artifact, player_artifact), or None if a model is missing."""
+    if not os.path.exists(TEAM_MODEL_PATH) or not os.path.exists(PLAYER_MODEL_PATH):
+        print("ERROR: One of the models missing. Run  training scripts.")
+        return None
+    # memory-mapped: the trees and latest-stats matrices aren't copied into memory
+    return load_artifact(TEAM_MODEL_PATH), load_artifact(PLAYER_MODEL_PATH)
+
+
+def load_previous_games():
+    try:
+        with open(TEAM_OUTPUT, "r") as f:
+            return json.load(f).get("games", [])
+    except (OSError, ValueError):
+        return []
+
+
+def fetch_games(planner=None):
+    """Today's matchups with h2h/spreads/totals, or None if the Odds API failed."""
+    if planner is None:
+        planner = RefreshPlanner.load()
+
+    # Reuse the last snapshot when every known game has tipped off, we pulled
+    # moments ago, or quota is down to the reserve.
+    previous_games = load_previous_games()
+    if previous_games and not planner.should_refresh_featured(previous_games):
+        print(f"Reusing {len(previous_games)} games from last snapshot "
+              f"(quota remaining: {planner.remaining})")
+        return previous_games
+
+    params = {"regions": "us", "markets": "h2h,spreads,totals", "oddsFormat": "american"}
+    try:
+        resp = get_client(API_KEY).get(ODDS_API_PATH, params=params)
+        games = resp.json()
+    except (requests.RequestException, ValueError) as e:
+        print("Odds API failed:", e)
+        return None
+
+    planner.record_quota(resp.headers)
+    planner.record_featured()
+    planner.save()
+    return games
+
+
+def _latest_table(latest_stats):
+    """The artifact's team table as a LatestTable (older artifacts: {"1610612737": row dict})."""
+    if isinstance(latest_stats, LatestTable):
+        return latest_stats
+    records = {normalize_id(k): v for k, v in latest_stats.items()}
+    return LatestTable.from_records(records, TEAM_FEATURES)
+
+
+def slate_matrix(games, store, t_latest):
+    """
+    Model rows for every game both teams have stats for: (X, playable game
+    indices), X holding the home sides first and then the away sides.
+    """
+    store_games, latest_games = [], []
+    for i, game in enumerate(games):
+        h_id, a_id = TEAM_MAP.get(game.get("home_team")), TEAM_MAP.get(game.get("away_team"))
+        if not (h_id and a_id):
+            continue
+        if h_id in store and a_id in store:
+            store_games.append((i, h_id, a_id))
+        # no store yet (first deploy): fall back to the artifact's last rows
+        elif h_id in t_latest and a_id in t_latest:
+            latest_games.append((i, h_id, a_id))
+
+    blocks, order = [], []
+    if store_games:
+        idx, h_ids, a_ids = map(list, zip(*store_games))
+        # box-score clock (Eastern wall time), so rest days match training
+        dates = schedule_time([games[i].get("commence_time") for i in idx])
+        n = len(idx)
+        home = np.repeat([1, 0], n)
+        blocks.append(store.matchups(h_ids + a_ids, a_ids + h_ids, home, dates.append(dates)))
+        order.append(idx)
+    if latest_games:
+        idx, h_ids, a_ids = map(list, zip(*latest_games))
+        h_rows = t_latest.matrix(h_ids, TEAM_FEATURES)
+        a_rows = t_latest.matrix(a_ids, TEAM_FEATURES)
+        home = np.repeat([1, 0], len(idx))
+        blocks.append(matchup_matrix(np.vstack([h_rows, a_rows]), np.vstack([a_rows, h_rows]), home))
+        order.append(idx)
+
+    # regroup as [home sides of every game, away sides of every game]
+    homes = [b[: len(o)] for b, o in zip(blocks, order)]
+    aways = [b[len(o):] for b, o in zip(blocks, order)]
+    playable = [i for o in order for i in o]
+    if not playable:
+        return np.empty((0, len(TEAM_FEATURE_COLS))), playable
+    return np.vstack(homes + aways), playable
+
+
+def predict_games(games, team_art, store=None):
+    """Adds an `openbet_prediction` to every game both teams have stats for."""
+    t_model = serving_model(team_art, n_rows=2 * len(games))  # flat trees when the artifact has them
+    t_latest = _latest_table(team_art["latest_stats"])
+    if store is None:
+        store = TeamFeatureStore.load()
+
+    X, playable = slate_matrix(games, store, t_latest)
+    if not playable:
+        return games
+
+    # One predict for the whole slate, home sides then away sides (same 23
+    # features as training, in FEATURE_COLS order). Cached per model version +
+    # input: the refresh loop re-scores the same slate every few minutes.
+    t_features = list(team_art.get("feature_cols", TEAM_FEATURE_COLS))
+    if t_features != TEAM_FEATURE_COLS:
+        X = X[:, [TEAM_FEATURE_COLS.index(c) for c in t_features]]
+    if not isinstance(t_model, FlatEnsemble):  # sklearn wants the training column names
+        X = pd.DataFrame(X, columns=t_features)
+    preds = np.round(PREDICTIONS.predict(team_art, "model", X, t_model.predict), 1)
+    pred_home, pred_away = preds[: len(playable)], preds[len(playable):]
+    margins = np.round(np.abs(pred_home - pred_away), 1)
+    home_wins = pred_home > pred_away
+
+    for i, h, a, margin, home_win in zip(playable, pred_home.tolist(), pred_away.tolist(), margins.tolist(), home_wins):
+        game = games[i]
+        winner_name = game.get("home_team") if home_win else game.get("away_team")
+        game["openbet_prediction"] = {
+            "predicted_home_score": h,
+            "predicted_away_score": a,
+            "predicted_margin": margin,
+            "message": f"{winner_name} to Win"
+        }
+    return games
+
+
+def todays_team_ids(games, day=None, schedule_path=SCHEDULE_PATH):
+    """
+    IDs of the teams playing on `day` (US/Eastern, default today): the league
+    schedule's games that day plus the odds slate's games tipping off that day
+    (the Odds API also lists the next days' games).
+    """
+    day = day or datetime.now(EASTERN).date()
+    team_ids = set()
+    try:
+        sched = pd.read_csv(schedule_path, usecols=["gameDateTimeEst", "homeTeamId", "awayTeamId"])
+        dates = pd.to_datetime(sched["gameDateTimeEst"], errors="coerce", format="mixed").dt.date
+        today = sched[dates == day]
+        team_ids.update(int(t) for t in pd.concat([today["homeTeamId"], today["awayTeamId"]]).dropna())
+    except (OSError, ValueError) as e:
+        print("Could not read schedule:", e)
+    for game in games or []:
+        tip = pd.to_datetime(game.get("commence_time"), utc=True, errors="coerce")
+        if pd.notna(tip) and tip.tz_convert(EASTERN).date() == day:
+            team_ids.update(TEAM_MAP[t] for t in (game.get("home_team"), game.get("away_team")) if t in TEAM_MAP)
+    return team_ids
+
+
+def _player_table(latest_stats, p_features):
+    """The artifact's player table as a LatestTable (older artifacts: {personId: row dict})."""
+    if isinstance(latest_stats, LatestTable):
+        return latest_stats
+    return LatestTable.from_records(latest_stats, p_features, PLAYER_LABELS)
+
+
+def current_team_ids(p_latest, roster=None):
+    """
+    Each player's current team ID (None if unknown): the roster map (normalized
+    name -> normalized team name) when it knows the player, which follows
+    trades, else the team of the player's last box score.
+    """
+    team_by_name = {normalize_team_name(name): tid for name, tid in TEAM_MAP.items()}
+    roster = roster or {}
+    names = p_latest.labels.get("playerName", [""] * len(p_latest))
+    last_teams = p_latest.labels.get("playerteamId", [""] * len(p_latest))
+    team_ids = []
+    for name, last_team in zip(names, last_teams):
+        team = team_by_name.get(roster.get(normalize_player_name(name), ""))
+        if team is None and last_team:
+            team = normalize_id(last_team)
+        team_ids.append(team)
+    return team_ids
+
+
+def project_players(play_art, team_ids=None, roster=None):
+    """
+    Pts/Reb/Ast/3PM projections for the players on `team_ids` (every player in
+    the artifact when None): one feature matrix, one predict per target.
+    """
+    p_features = play_art["feature_cols"]
+    p_latest = _player_table(play_art["latest_stats"], p_features)
+    p_targets = artifact_targets(play_art)
+
+    if team_ids is None:
+        rows = np.arange(len(p_latest))
+    else:
+        player_teams = current_team_ids(p_latest, roster)
+        rows = np.array([i for i, t in enumerate(player_teams) if t in team_ids], dtype=int)
+    if not len(rows):
+        return []
+
+    X = pd.DataFrame(p_latest.matrix(columns=p_features)[rows], columns=p_features).fillna(0)
+    # All 4 targets at once (a single predict for the multi-output model)
+    preds = predict_targets(play_art, X).tolist()
+
+    labels = {c: p_latest.labels.get(c, [""] * len(p_latest)) for c in PLAYER_LABELS}
+    player_ids = p_latest.ids.tolist()
+    player_projections = []
+    for i, values in zip(rows.tolist(), preds):
+        # Combine names if they aren't already combined
+        full_name = f"{labels['firstName'][i]} {labels['lastName'][i]}".strip()
+        if not full_name:
+            full_name = labels["playerName"][i] or "Unknown Player"
+        entry = {"player_id": str(player_ids[i]), "name": full_name}
+        for target, value in zip(p_targets, values):
+            entry[target] = round(float(value), 2)
+        player_projections.append(entry)
+    return player_projections
+
+
+def publish(games, player_projections):
+    write_json_atomic(TEAM_OUTPUT, {"games": games, "last_updated": str(datetime.now())})
+    if player_projections is not None:
+        write_json_atomic(
+            PLAYER_OUTPUT,
+            {"date": str(datetime.now().date()), "projections": player_projections},
+        )
+
 
 def main():
     # 1. LOAD BOTH MODELS
     # ---------------------------------------------------------
-    if not os.path.exists(TEAM_MODEL_PATH) or not os.path.exists(PLAYER_MODEL_PATH):
-        print("ERROR: One of the models missing. Run  training scripts.")
-        return
+    metrics = pipeline_metrics.start_stage("daily_update")
 
+    metrics.begin_step("load_models")
     print("Loading Team and Player brains...")
-    team_art = joblib.load(TEAM_MODEL_PATH)
-    play_art = joblib.load(PLAYER_MODEL_PATH)
-    t_features = team_art.get("feature_cols", [])
+    artifacts = load_artifacts()
+    if artifacts is None:
+        return
+    team_art, play_art = artifacts
 
     # 2. FETCH LIVE ODDS
     # ---------------------------------------------------------
+    metrics.begin_step("fetch_odds")
     print("Fetching live matchups...")
-    params = {"regions": "us", "markets": "h2h,spreads,totals", "oddsFormat": "american", "apiKey": API_KEY}
-    resp = requests.get(ODDS_API_URL, params=params)
-    
-    try:
-        games = resp.json()
-    except:
-        print("Odds API failed.")
+    games = fetch_games()
+    if games is None:
         return
 
     # 3. TEAM PREDICTIONS (Win/Loss)
-    
+    metrics.begin_step("team_predictions")
     print(f"Generating winners for {len(games)} games...")
-    t_model = team_art["model"]
-    t_latest = team_art["latest_stats"]
-
-    for game in games:
-        h_name, a_name = game.get("home_team"), game.get("away_team")
-        h_id, a_id = TEAM_MAP.get(h_name), TEAM_MAP.get(a_name)
-
-        if h_id and a_id and h_id in t_latest and a_id in t_latest:
-            h_stats, a_stats = t_latest[h_id], t_latest[a_id]
-            
-            # 1. Predict Home Score (Expanded 23 features)
-            feat_home_dict = {
-                "home": 1,
-                "fatigue_index": 0,
-                "home_strength_rating": h_stats.get("home_strength_rating", 0),
-                "rolling_teamScore": h_stats.get("rolling_teamScore", 0),
-                "rolling_possessions": h_stats.get("rolling_possessions", 0),
-                "rolling_fieldGoalsPercentage": h_stats.get("rolling_fieldGoalsPercentage", 0),
-                "rolling_opponentScore": h_stats.get("rolling_opponentScore", 0),
-                "L3_teamScore": h_stats.get("L3_teamScore", 0),
-                "L3_oppScore": h_stats.get("L3_oppScore", 0),
-                "L5_teamScore": h_stats.get("L5_teamScore", 0),
-                "L5_oppScore": h_stats.get("L5_oppScore", 0),
-                "L5_net_margin": h_stats.get("L5_net_margin", 0),
-
-                "opp_rolling_teamScore": a_stats.get("rolling_teamScore", 0),
-                "opp_rolling_possessions": a_stats.get("rolling_possessions", 0),
-                "opp_rolling_opponentScore": a_stats.get("rolling_opponentScore", 0),
-                "opp_rolling_fieldGoalsPercentage": a_stats.get("rolling_fieldGoalsPercentage", 0),
-                "opp_L3_teamScore": a_stats.get("L3_teamScore", 0),
-                "opp_L3_oppScore": a_stats.get("L3_oppScore", 0),
-                "opp_L5_teamScore": a_stats.get("L5_teamScore", 0),
-                "opp_L5_oppScore": a_stats.get("L5_oppScore", 0),
-                "opp_L5_net_margin": a_stats.get("L5_net_margin", 0),
-                "opp_fatigue_index": 0,
-                "opp_home_strength_rating": a_stats.get("home_strength_rating", 0),
-            }
-            # Enforce column order to match training exactly
-            feat_home = pd.DataFrame([feat_home_dict])[t_features]
-            pred_home = round(t_model.predict(feat_home)[0], 1)
-
-            # 2. Predict Away Score (Flip the stats!)
-            feat_away_dict = {
-                "home": 0,
-                "fatigue_index": 0,
-                "home_strength_rating": a_stats.get("home_strength_rating", 0),
-                "rolling_teamScore": a_stats.get("rolling_teamScore", 0),
-                "rolling_possessions": a_stats.get("rolling_possessions", 0),
-                "rolling_fieldGoalsPercentage": a_stats.get("rolling_fieldGoalsPercentage", 0),
-                "rolling_opponentScore": a_stats.get("rolling_opponentScore", 0),
-                "L3_teamScore": a_stats.get("L3_teamScore", 0),
-                "L3_oppScore": a_stats.get("L3_oppScore", 0),
-                "L5_teamScore": a_stats.get("L5_teamScore", 0),
-                "L5_oppScore": a_stats.get("L5_oppScore", 0),
-                "L5_net_margin": a_stats.get("L5_net_margin", 0),
-
-                "opp_rolling_teamScore": h_stats.get("rolling_teamScore", 0),
-                "opp_rolling_possessions": h_stats.get("rolling_possessions", 0),
-                "opp_rolling_opponentScore": h_stats.get("rolling_opponentScore", 0),
-                "opp_rolling_fieldGoalsPercentage": h_stats.get("rolling_fieldGoalsPercentage", 0),
-                "opp_L3_teamScore": h_stats.get("L3_teamScore", 0),
-                "opp_L3_oppScore": h_stats.get("L3_oppScore", 0),
-                "opp_L5_teamScore": h_stats.get("L5_teamScore", 0),
-                "opp_L5_oppScore": h_stats.get("L5_oppScore", 0),
-                "opp_L5_net_margin": h_stats.get("L5_net_margin", 0),
-                "opp_fatigue_index": 0,
-                "opp_home_strength_rating": h_stats.get("home_strength_rating", 0),
-            }
-            feat_away = pd.DataFrame([feat_away_dict])[t_features]
-            pred_away = round(t_model.predict(feat_away)[0], 1)
-
-            # 3. Calculate Margin and Message
-            margin = round(abs(pred_home - pred_away), 1)
-            winner_name = h_name if pred_home > pred_away else a_name
-            message = f"{winner_name} to Win"
-
-            # 4. Save everything to the JSON
-            game["openbet_prediction"] = {
-                "predicted_home_score": pred_home,
-                "predicted_away_score": pred_away,
-                "predicted_margin": margin,
-                "message": message
-            }
-    # 4. PLAYER PROP PROJECTIONS (Pts, Reb, Ast, 3PM)
-    print("Generating Player Projections...")
-    p_models = play_art["models"]
-    p_latest = play_art["latest_stats"] # dict of personId -> last stats
-    p_features = play_art["feature_cols"]
+    predict_games(games, team_art)
 
-    player_projections = []
-    for p_id, stats_dict in p_latest.items():
-        try:
-            # Prepare features for the model
-            input_df = pd.DataFrame([stats_dict])[p_features].fillna(0)
-            
-            # Combine names if they aren't already combined
-            fname = stats_dict.get('firstName', '')
-            lname = stats_dict.get('lastName', '')
-            full_name = f"{fname} {lname}".strip()
-            if not full_name or full_name == "":
-                full_name = stats_dict.get('playerName', 'Unknown Player')
-
-            # Create entry with predictions from all 4 models
-            entry = {
-                "player_id": str(p_id),
-                "name": full_name,
-                "points": round(float(p_models['points'].predict(input_df)[0]), 2),
-                "reboundsTotal": round(float(p_models['reboundsTotal'].predict(input_df)[0]), 2),
-                "assists": round(float(p_models['assists'].predict(input_df)[0]), 2),
-                "threePointersMade": round(float(p_models['threePointersMade'].predict(input_df)[0]), 2)
-            }
-            player_projections.append(entry)
-        except Exception as e:
-            continue
+    # 4. PLAYER PROP PROJECTIONS (Pts, Reb, Ast, 3PM), only for today's teams
+    metrics.begin_step("player_projections")
+    team_ids = todays_team_ids(games)
+    print(f"Generating Player Projections for {len(team_ids)} teams playing today...")
+    player_projections = project_players(play_art, team_ids, build_player_team_map())
 
     # 5. SAVE BOTH JSON FILES
-    with open(TEAM_OUTPUT, "w") as f:
-        json.dump({"games": games, "last_updated": str(datetime.now())}, f, indent=2)
-
-    with open(PLAYER_OUTPUT, "w") as f:
-        json.dump({"date": str(datetime.now().date()), "projections": player_projections}, f, indent=2)
+    metrics.begin_step("save_outputs")
+    publish(games, player_projections)
 
     print(f" SUCCESS! Both {TEAM_OUTPUT} and {PLAYER_OUTPUT} are ready.")
 
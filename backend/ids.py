@@ -0,0 +1,114 @@
+# ids.py
+# One ID normalization for every script.
+#
+# The Kaggle CSVs store gameId / teamId / personId as ints, floats ("1610612737.0")
+# or strings depending on the file and on whether the column has blanks. Every
+# script used to clean them with its own clean_id() applied row by row. Here the
+# numeric case is handled vectorially into one integer dtype: int32, or nullable
+# Int32 when there are blanks. A value that is not a finite whole number in int32
+# range (NaN, inf, 1.5, ...) is not an ID and counts as a blank, so the dtype
+# never depends on a stray bad value. Object columns are normalized on their
+# unique values only (factorize + remap), which keeps even the player table at
+# a few thousand Python-level operations.
+
+import numpy as np
+import pandas as pd
+
+INT32_MIN = np.iinfo(np.int32).min
+INT32_MAX = np.iinfo(np.int32).max
+
+TEAM_ID_COLUMNS = ["gameId", "teamId", "opponentTeamId"]
+SCHEDULE_ID_COLUMNS = ["gameId", "homeTeamId", "awayTeamId"]
+PLAYER_ID_COLUMNS = ["gameId", "personId", "playerteamId", "opponentteamId"]
+
+# Odds API / schedule team names -> NBA team IDs
+TEAM_IDS = {
+    "Atlanta Hawks": 1610612737, "Boston Celtics": 1610612738, "Brooklyn Nets": 1610612751,
+    "Charlotte Hornets": 1610612766, "Chicago Bulls": 1610612741, "Cleveland Cavaliers": 1610612739,
+    "Dallas Mavericks": 1610612742, "Denver Nuggets": 1610612743, "Detroit Pistons": 1610612765,
+    "Golden State Warriors": 1610612744, "Houston Rockets": 1610612745, "Indiana Pacers": 1610612754,
+    "Los Angeles Clippers": 1610612746, "LA Clippers": 1610612746, "Los Angeles Lakers": 1610612747,
+    "Memphis Grizzlies": 1610612763, "Miami Heat": 1610612748, "Milwaukee Bucks": 1610612749,
+    "Minnesota Timberwolves": 1610612750, "New Orleans Pelicans": 1610612740, "New York Knicks": 1610612752,
+    "Oklahoma City Thunder": 1610612760, "Orlando Magic": 1610612753, "Philadelphia 76ers": 1610612755,
+    "Phoenix Suns": 1610612756, "Portland Trail Blazers": 1610612757, "Sacramento Kings": 1610612758,
+    "San Antonio Spurs": 1610612759, "Toronto Raptors": 1610612761, "Utah Jazz": 1610612762,
+    "Washington Wizards": 1610612764,
+}
+
+
+def _clean_id_str(x):
+    """Legacy string form, only used for IDs that are not numeric at all."""
+    if x is None or (isinstance(x, float) and np.isnan(x)):
+        return ""
+    s = str(x).strip()
+    if s.endswith(".0"):
+        try:
+            return str(int(float(s)))
+        except ValueError:
+            return s
+    return s
+
+
+def _valid_ids(values):
+    """Mask of the entries of a float array that are usable IDs."""
+    with np.errstate(invalid="ignore"):
+        return np.isfinite(values) & (values == np.floor(values)) & (values >= INT32_MIN) & (values <= INT32_MAX)
+
+
+def _to_int_series(values, index, name):
+    """float array -> int32, or Int32 with <NA> for everything that isn't a valid ID."""
+    valid = _valid_ids(values)
+    if valid.all():
+        return pd.Series(values.astype(np.int32), index=index, name=name)
+    out = pd.array(np.where(valid, values, 0).astype(np.int32), dtype="Int32")
+    out[~valid] = pd.NA
+    return pd.Series(out, index=index, name=name)
+
+
+def normalize_ids(series: pd.Series) -> pd.Series:
+    """
+    Normalize an ID column.
+
+    Numeric (or numeric-looking, " 1610612737.0 ") IDs -> int32, or Int32
+    when some values are missing / not valid IDs. Columns holding genuinely
+    non-numeric IDs keep the legacy string form, with "" for missing values.
+    """
+    if pd.api.types.is_numeric_dtype(series.dtype):
+        values = series.astype("float64").to_numpy(na_value=np.nan)
+        return _to_int_series(values, series.index, series.name)
+
+    # object / string / mixed: normalize the uniques, then remap by code
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    stripped = pd.Series(uniques, dtype="object").astype(str).str.strip()
+    numeric = pd.to_numeric(stripped, errors="coerce").to_numpy(dtype="float64")
+    blank = (stripped == "") | (stripped.str.lower() == "nan")
+
+    if not (np.isnan(numeric) & ~blank.to_numpy()).any():
+        numeric = np.append(numeric, np.nan)  # code -1 (missing) -> NaN
+        return _to_int_series(numeric[codes], series.index, series.name)
+
+    cleaned = np.array([_clean_id_str(u) for u in uniques] + [""], dtype=object)
+    return pd.Series(cleaned[codes], index=series.index, name=series.name)
+
+
+def normalize_id_columns(df: pd.DataFrame, cols) -> pd.DataFrame:
+    """Normalize every column in `cols` that exists in df (in place, returns df)."""
+    for col in cols:
+        if col in df.columns:
+            df[col] = normalize_ids(df[col])
+    return df
+
+
+def normalize_id(x):
+    """Scalar form of normalize_ids, e.g. for dict keys in saved artifacts."""
+    if x is None:
+        return None
+    s = str(x).strip()
+    if not s:
+        return None
+    try:
+        f = float(s)
+    except ValueError:
+        return _clean_id_str(x)
+    return int(f) if _valid_ids(np.array([f])).all() else None
@@ -0,0 +1,239 @@
+# model_registry.py
+# Content-addressed model versions and a prediction cache.
+#
+# A version ID is a hash of everything that determines a trained model: the
+# training rows (and latest-stats table), the source of the feature / model
+# code, and the hyperparameters / env choices. Each training script computes
+# it before fitting:
+#   - known version  -> nothing is trained; that version is (re)published
+#   - new version    -> train, then register(): the artifact is saved under
+#                       data/models/<name>/<version>/<live file name> with its
+#                       metrics and timing in data/models/<name>/index.json,
+#                       and copied to the live path the serving code loads
+#                       (data/nba_model.pkl, ...)
+# The newest KEEP_VERSIONS versions are kept, so a slower or worse model can
+# be rolled back by republishing an older one:
+#
+#   python model_registry.py                    *versions of every model
+#   python model_registry.py rollback team      *republish the previous team model
+#   python model_registry.py promote players <version>
+#
+# Registered artifacts carry their "model_version", so PredictionCache can key
+# predictions by (version, model, input hash): the refresh daemon re-scores
+# the same matchups every few minutes with the same model.
+# OPENBET_FORCE_RETRAIN=1 trains even when the version already exists.
+# data/models/ is gitignored: locally and under the refresh daemon it persists
+# on disk; the GitHub workflow restores it from the Actions cache each run.
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+from collections import OrderedDict
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from artifacts import load_artifact, save_artifact
+from snapshots import write_json_atomic
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+REGISTRY_DIR = os.path.join(BASE_DIR, "data", "models")
+
+# what the serving code loads, per registered model
+LIVE_PATHS = {
+    "team": os.path.join(BASE_DIR, "data", "nba_model.pkl"),
+    "players": os.path.join(BASE_DIR, "data", "player_prop_models.pkl"),
+    "props": os.path.join(BASE_DIR, "data", "player_prop_model.pkl"),
+}
+
+FORCE_ENV = "OPENBET_FORCE_RETRAIN"
+KEEP_VERSIONS = 5
+PREDICTION_CACHE_SIZE = 512
+
+
+# ---------- VERSION IDS ----------
+
+def _update_data(h, item):
+    if isinstance(item, (pd.DataFrame, pd.Series)):
+        h.update(repr(list(item.columns) if isinstance(item, pd.DataFrame) else item.name).encode())
+        h.update(pd.util.hash_pandas_object(item, index=False).to_numpy().tobytes())
+    else:
+        arr = np.asarray(item)
+        h.update(f"{arr.dtype}{arr.shape}".encode())
+        h.update(np.ascontiguousarray(arr).tobytes() if arr.dtype != object else repr(arr.tolist()).encode())
+
+
+def fingerprint(data=(), code=(), params=None):
+    """
+    Version ID (16 hex chars) for a model trained on `data` (frames / arrays)
+    by the modules in `code` (file names next to this one) with `params`.
+    """
+    h = hashlib.sha256()
+    for item in data:
+        _update_data(h, item)
+    for name in code:
+        with open(os.path.join(BASE_DIR, name), "rb") as f:
+            h.update(name.encode())
+            h.update(f.read())
+    h.update(json.dumps(params or {}, sort_keys=True, default=str).encode())
+    return h.hexdigest()[:16]
+
+
+def force_retrain():
+    return os.environ.get(FORCE_ENV, "").lower() in ("1", "true", "yes")
+
+
+# ---------- REGISTRY ----------
+
+class ModelRegistry:
+    """Versions of one model (team / players / props) and which one is live."""
+
+    def __init__(self, name, root=REGISTRY_DIR, live_path=None):
+        self.name = name
+        self.dir = os.path.join(root, name)
+        self.live_path = live_path or LIVE_PATHS[name]
+        self.index_path = os.path.join(self.dir, "index.json")
+        try:
+            with open(self.index_path, "r") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = {}
+        self.current = index.get("current")
+        self.versions = index.get("versions", {})
+
+    def artifact_path(self, version):
+        # same file name as the live copy, so artifact metrics keep their keys
+        return os.path.join(self.dir, version, os.path.basename(self.live_path))
+
+    def has(self, version):
+        return version in self.versions and os.path.exists(self.artifact_path(version))
+
+    def load_current(self):
+        """The current version's artifact, or None when nothing is registered."""
+        if not self.current or not self.has(self.current):
+            return None
+        return load_artifact(self.artifact_path(self.current), mmap=False)
+
+    def history(self):
+        """Manifests, oldest first."""
+        return sorted(self.versions.values(), key=lambda m: m["created_at"])
+
+    def _save_index(self):
+        write_json_atomic(self.index_path, {"current": self.current, "versions": self.versions})
+
+    def register(self, version, artifact, scores=None, timing=None, inputs=None, metrics=None):
+        """Store a newly trained artifact as `version` and make it live."""
+        artifact["model_version"] = version
+        size = save_artifact(artifact, self.artifact_path(version), metrics)
+        self.versions[version] = {
+            "version": version,
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "scores": scores or {},
+            "timing": timing or {},
+            "inputs": inputs or {},
+            "artifact_mb": round(size, 3),
+        }
+        self._prune(keep=version)
+        self.promote(version)
+
+    def promote(self, version):
+        """Publish `version` to the live path (atomically) and mark it current."""
+        if not self.has(version):
+            raise KeyError(f"{self.name} has no stored version {version!r}")
+        if self.current != version or not os.path.exists(self.live_path):
+            # copy + rename: readers holding the old file (mmapped) keep it intact
+            tmp = f"{self.live_path}.tmp"
+            shutil.copyfile(self.artifact_path(version), tmp)
+            os.replace(tmp, self.live_path)
+        self.current = version
+        self._save_index()
+        print(f"[registry] {self.name}: {version} is live")
+
+    def rollback(self):
+        """Republish the version registered before the current one."""
+        order = [m["version"] for m in self.history() if self.has(m["version"])]
+        if self.current not in order or order.index(self.current) == 0:
+            raise KeyError(f"{self.name}: no earlier version to roll back to")
+        version = order[order.index(self.current) - 1]
+        self.promote(version)
+        return version
+
+    def _prune(self, keep):
+        for manifest in self.history()[:-KEEP_VERSIONS]:
+            version = manifest["version"]
+            if version in (keep, self.current):
+                continue
+            shutil.rmtree(os.path.join(self.dir, version), ignore_errors=True)
+            del self.versions[version]
+
+
+# ---------- PREDICTION CACHE ----------
+
+def input_hash(X):
+    arr = np.ascontiguousarray(np.asarray(getattr(X, "values", X), dtype=np.float64))
+    return hashlib.sha1(f"{arr.shape}".encode() + arr.tobytes()).hexdigest()
+
+
+class PredictionCache:
+    """LRU of predictions keyed by (model version, model key, input hash)."""
+
+    def __init__(self, size=PREDICTION_CACHE_SIZE):
+        self.size = size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def predict(self, artifact, key, X, predict):
+        """predict(X), or the cached result for this artifact version and input."""
+        version = artifact.get("model_version")
+        if version is None:  # unregistered artifact: nothing to key on
+            return predict(X)
+        cache_key = (version, key, input_hash(X))
+        if cache_key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(cache_key)
+            return self.entries[cache_key].copy()
+        self.misses += 1
+        result = np.asarray(predict(X))
+        self.entries[cache_key] = result
+        if len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+        return result.copy()
+
+
+PREDICTIONS = PredictionCache()
+
+
+# ---------- CLI ----------
+
+def print_versions(registry):
+    print(f"{registry.name}  ({registry.live_path})")
+    for m in registry.history():
+        flag = "*" if m["version"] == registry.current else " "
+        scores = "  ".join(f"{k} {v}" for k, v in m["scores"].items() if isinstance(v, (int, float)))
+        timing = "  ".join(f"{k} {v}s" for k, v in m["timing"].items())
+        print(f" {flag} {m['version']}  {m['created_at']}  {m['artifact_mb']:.2f} MB  {scores}  {timing}")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        for name in LIVE_PATHS:
+            print_versions(ModelRegistry(name))
+        return
+    command, name = argv[0], argv[1]
+    registry = ModelRegistry(name)
+    if command == "rollback":
+        registry.rollback()
+    elif command == "promote":
+        registry.promote(argv[2])
+    else:
+        raise SystemExit(f"unknown command {command!r} (rollback / promote)")
+    print_versions(registry)
+
+
+if __name__ == "__main__":
+    main()
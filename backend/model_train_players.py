@@ -1,11 +1,21 @@
-import pandas as pd
-import numpy as np
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_absolute_error
-import joblib
 import os
 
+import pipeline_metrics
+from model_registry import ModelRegistry, fingerprint, force_retrain
+from player_features import (
+    FEATURE_COLS,
+    TARGETS,
+    build_player_features,
+    latest_player_rows,
+    load_valid_game_ids,
+    read_player_stats,
+)
+from player_models import fit_player_models, layout_name, predict_targets
+import player_online
+from team_estimators import time_split
+from tree_predictor import add_flat_models
+
 # =========================================================
 # 1. PATHS (Keepin it same as the Team Model)
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -16,118 +26,120 @@ games_path = os.path.join(DATA_DIR, "Games.csv")
 
 MODEL_PATH = os.path.join(BASE_DIR, "data", "player_prop_models.pkl")
 
+# Everything the trained models depend on besides the data (model_registry.py)
+MODEL_CODE = ("model_train_players.py", "player_features.py", "player_models.py", "player_online.py", "tree_predictor.py")
+
+metrics = pipeline_metrics.start_stage("model_train_players")
+
+# October 2024 
+START_DATE = '2024-10-01'
+
 # --- DATA LOADING ---
+metrics.begin_step("load_data")
 print("LOADING")
+# Filter out Preseason/All-Star so the model doesn't get confused
 try:
-    df_players = pd.read_csv(player_stats_path, low_memory=False)
-    df_games = pd.read_csv(games_path, low_memory=False)
-except FileNotFoundError as e:
+    valid_ids = load_valid_game_ids(games_path, metrics)
+except (FileNotFoundError, ValueError) as e:
     print(f"Error: {e}. Check if the csv files r in the right folder.")
     exit()
+if not os.path.exists(player_stats_path):
+    print(f"Error: {player_stats_path} not found. Check if the csv files r in the right folder.")
+    exit()
 
-# CLEANING IDs (matching the team model logic)
-def clean_id(x):
-    try:
-        if pd.isna(x): return ""
-        s = str(x).strip()
-        if s.endswith(".0"):
-            try: return str(int(float(s)))
-            except: return s
-        return s
-    except: return str(x).strip()
-
-print("Cleaning IDs...")
-for col in ["gameId", "personId", "playerteamId", "opponentteamId"]:
-    if col in df_players.columns:
-        df_players[col] = df_players[col].apply(clean_id)
-
-if "gameId" in df_games.columns:
-    df_games["gameId"] = df_games["gameId"].apply(clean_id)
-
-# Filter out Preseason/All-Star so the model doesn't get confused
-if "gameLabel" in df_games.columns:
-    valid_ids = set(df_games[~df_games["gameLabel"].isin(["Preseason", "All-Star Game"])]["gameId"])
-    df_players = df_players[df_players["gameId"].isin(valid_ids)]
+# Only the columns we use, only games since START_DATE, read in chunks
+df_players, rows_read = read_player_stats(player_stats_path, START_DATE, valid_ids, metrics=metrics)
+print(f"Kept {len(df_players)} of {rows_read} player rows")
 
 # FEATURE ENGINEERING 
+metrics.begin_step("features")
 print("--- ENGINEERING PLAYER FEATURES ---")
-
-# October 2024 
-START_DATE = '2024-10-01'
-df_players['gameDateTimeEst'] = pd.to_datetime(df_players['gameDateTimeEst'], utc=True)
-df_players = df_players[df_players['gameDateTimeEst'] >= START_DATE].sort_values(['personId', 'gameDateTimeEst'])
-
-TARGETS = ['points', 'reboundsTotal', 'assists', 'threePointersMade']
-FEATURES_TO_ROLL = TARGETS + ['numMinutes']
-
-# Rolling averages: looking back at the last 10 games
-print("Calcrolling averages")
-rolling_df = (
-    df_players.groupby("personId")[FEATURES_TO_ROLL]
-    .apply(lambda x: x.rolling(window=10, min_periods=1).mean().shift())
-    .reset_index(level=0, drop=True)
-)
-rolling_df.columns = [f"rolling_{col}" for col in rolling_df.columns]
-
-# Team Defense context: How much does the opp allow lately?
-team_def = df_players.groupby(['playerteamCity', 'gameId'])[TARGETS].sum().reset_index()
-team_def_rolling = (
-    team_def.groupby('playerteamCity')[TARGETS]
-    .apply(lambda x: x.rolling(10, min_periods=3).mean().shift())
-    .reset_index(level=0, drop=True)
-)
-team_def_rolling.columns = [f"Opp_L10_{c}_Allowed" for c in TARGETS]
-team_def = pd.concat([team_def[['playerteamCity', 'gameId']], team_def_rolling], axis=1)
-
-# Merge everything back into one big df
-df_model = pd.concat([df_players.reset_index(drop=True), rolling_df.reset_index(drop=True)], axis=1)
-df_model = pd.merge(df_model, team_def, left_on=['opponentteamCity', 'gameId'], right_on=['playerteamCity', 'gameId'], how='left', suffixes=('', '_team'))
+print("Calcrolling averages + opponent context")
+df_model = build_player_features(df_players)
 
 # TRAINING 
+metrics.begin_step("train")
 print("TRAINING Player Model")
-feature_cols = ['home', 'rolling_points', 'rolling_reboundsTotal', 'rolling_assists', 'rolling_numMinutes', 
-                'Opp_L10_points_Allowed', 'Opp_L10_reboundsTotal_Allowed']
-
-# Only train on current season so the AI stays fresh
-df_train = df_model[df_model['gameDateTimeEst'] >= '2025-10-01'].copy().fillna(0)
-
-trained_models = {}
-for target in TARGETS:
-    print(f"Training {target} brain...")
-    X = df_train[feature_cols]
-    y = df_train[target].astype(float)
-    
-    # 80/20 split for testing
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-    
-    # Random Forest: 50 trees is usually plenty
-    model = RandomForestRegressor(n_estimators=50, min_samples_split=10, random_state=42)
-    model.fit(X_train, y_train)
-    
-    mae = mean_absolute_error(y_test, model.predict(X_test))
-    print(f"MAE: +/- {mae:.2f} {target}")
-    trained_models[target] = model
+feature_cols = list(FEATURE_COLS)
+
+# Only train on current season so the AI stays fresh (date order for the time split)
+df_train = df_model[df_model['gameDateTimeEst'] >= '2025-10-01'].sort_values("gameDateTimeEst", kind="mergesort")
+
+X = df_train[feature_cols].fillna(0)
+Y = df_train[TARGETS].fillna(0).astype(float)
+
+layout = layout_name()
+print(f"Model layout: {layout}")
+
+latest_player_stats = latest_player_rows(df_model)
+
+# Same rows, code and layout as a stored version: republish it instead of refitting
+registry = ModelRegistry("players", live_path=MODEL_PATH)
+version = fingerprint(
+    data=(X, Y, latest_player_stats.ids, latest_player_stats.array),
+    code=MODEL_CODE,
+    params={"layout": layout, "targets": TARGETS},
+)
+metrics.note("model_version", version)
+if registry.has(version) and not force_retrain():
+    print(f"Player models {version} already trained on this data; nothing to do")
+    registry.promote(version)
+    exit()
+
+if layout == "online":
+    # Nightly partial_fit on the new box scores only, full refit every couple
+    # of weeks; scored against the forest baseline either way (player_online.py)
+    baseline = player_online.load_baseline()
+    model_fields, baseline, report = player_online.update_online_model(
+        player_online.load_previous(MODEL_PATH, registry), df_train, feature_cols, TARGETS, baseline=baseline
+    )
+    metrics.note("online_model", report)
+    if report["mode"] == "full":
+        player_online.save_baseline(baseline)
+    print(f"Online model: {report['mode']} update on {report['n_new']} rows")
+    scores = {f"MAE_{t}": mae for t, mae in report.get("MAE", {}).items()}
+    timing = {}
+    for target, mae in report.get("MAE", {}).items():
+        base = report.get("baseline_MAE", {}).get(target)
+        vs = f" (forest baseline {base:.2f})" if base is not None else ""
+        print(f"MAE: +/- {mae:.2f} {target}{vs}")
+else:
+    # Time-based 80/20 split (same rows for every target); a random split
+    # would let the model train on games after the ones it is scored on
+    X_train, X_test, Y_train, Y_test = time_split(X, Y)
+
+    # One forest per target, or one multi-output forest (player_models.py)
+    model_fields, fit_seconds = fit_player_models(layout, X_train, Y_train)
+    metrics.note("fit_seconds", fit_seconds)
+
+    Y_pred = predict_targets(model_fields, X_test)
+    scores = {}
+    for i, target in enumerate(model_fields["targets"]):
+        mae = mean_absolute_error(Y_test[target], Y_pred[:, i])
+        scores[f"MAE_{target}"] = round(float(mae), 3)
+        print(f"MAE: +/- {mae:.2f} {target}")
+    timing = {"fit": round(sum(fit_seconds.values()), 3)}
+    print(f"Fit time: {sum(fit_seconds.values()):.1f}s")
+
+    # Flat node-array copies of the forests for serving (tree_predictor.py)
+    add_flat_models(model_fields, X_test)
 
 # --- 5. SAVING ARTIFACTS ---
+metrics.begin_step("save_artifacts")
 print(" SAVING ")
-latest_player_stats = {}
-for pid in df_model["personId"].unique():
-    p_data = df_model[df_model["personId"] == pid]
-    if not p_data.empty:
-        last_row = p_data.iloc[-1].to_dict()
-        
-        # We grab firstName and lastName from the CSV headers
-        first = last_row.get('firstName', '')
-        last = last_row.get('lastName', '')
-        last_row['playerName'] = f"{first} {last}".strip()
-        
-        latest_player_stats[pid] = last_row
 print(f"Debug, total players: {len(latest_player_stats)} ")
-os.makedirs(os.path.dirname(MODEL_PATH), exist_ok=True)
-joblib.dump({
-    "models": trained_models, 
-    "latest_stats": latest_player_stats, 
-    "feature_cols": feature_cols
-}, MODEL_PATH)
+# Feature columns only, as a float32 matrix; uncompressed so it can be mmapped
+registry.register(
+    version,
+    {
+        **model_fields,
+        "latest_stats": latest_player_stats,
+        "feature_cols": feature_cols
+    },
+    scores=scores,
+    timing=timing,
+    inputs={"rows": len(X), "layout": layout},
+    metrics=metrics,
+)
 
 print(f"SUCCESS! Player prop models saved to: {MODEL_PATH}")
\ No newline at end of file
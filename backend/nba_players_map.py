@@ -103,6 +103,59 @@ def build_player_team_map():
 
     _save_cache(mapping)
     return mapping
-    
+
+
+class PlayerTeamIndex:
+    """
+    Player -> HOME / AWAY lookups over a player-team map, built once per run:
+    full-name and last-name indexes instead of a scan of the whole map per
+    prop outcome, normalized team names cached, and the side memoized per
+    (player, matchup).
+    """
+
+    def __init__(self, player_team_map):
+        self.teams = dict(player_team_map)
+        self.by_last = {}
+        for roster_name, roster_team in self.teams.items():
+            parts = roster_name.split()
+            if len(parts) > 1:
+                self.by_last.setdefault(parts[-1], []).append(roster_team)
+        self._team_names = {}
+        self._sides = {}
+
+    def team_name(self, name):
+        norm = self._team_names.get(name)
+        if norm is None:
+            norm = self._team_names[name] = normalize_team_name(name)
+        return norm
+
+    def side(self, player_name, home_team, away_team):
+        key = (player_name, home_team, away_team)
+        side = self._sides.get(key)
+        if side is None:
+            side = self._sides[key] = self._resolve(player_name, home_team, away_team)
+        return side
+
+    def _resolve(self, player_name, home_team, away_team):
+        if not player_name:
+            return "UNKNOWN"
+        norm_name = normalize_player_name(player_name)
+        home_norm = self.team_name(home_team)
+        away_norm = self.team_name(away_team)
+
+        candidates = [self.teams[norm_name]] if self.teams.get(norm_name) else []
+        parts = norm_name.split()
+        if len(parts) > 1:
+            # same last name, in map order (the old linear scan's fallback)
+            candidates.extend(self.by_last.get(parts[-1], ()))
+
+        for team in candidates:
+            if team in home_norm or home_norm in team:
+                return "HOME"
+            if team in away_norm or away_norm in team:
+                return "AWAY"
+        return "UNKNOWN"
+
+
 if __name__ == "__main__":
     build_player_team_map()
@@ -0,0 +1,240 @@
+# odds_client.py
+# One pooled, retrying client for every Odds API call.
+#
+#  - a single requests.Session per API key: keep-alive connections are reused,
+#    so a run does a handful of TLS handshakes instead of one per request
+#  - connect/read timeouts on every call
+#  - jittered exponential backoff on 429 / 5xx / connection errors
+#    (Retry-After is honoured when the API sends it)
+#  - 200 responses cached on disk, keyed by path + params, for a short TTL
+#  - cached and replayed responses carry no x-requests-* quota headers: they
+#    describe an older request, and RefreshPlanner.record_quota would take
+#    them as the current balance
+#  - OPENBET_ODDS_MODE=record saves every response to data/odds_recordings/,
+#    OPENBET_ODDS_MODE=replay serves those recordings without touching the
+#    network (offline benchmarks and tests of the whole ingest path)
+
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from config_odds import ODDS_API_KEY
+from snapshots import write_json_atomic
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(BASE_DIR, "data", "odds_cache")
+RECORDINGS_DIR = os.path.join(BASE_DIR, "data", "odds_recordings")
+
+BASE_URL = "https://api.the-odds-api.com/v4/sports/basketball_nba"
+
+MODE_ENV = "OPENBET_ODDS_MODE"
+MODES = ("live", "record", "replay")
+
+DEFAULT_TIMEOUT = (5, 15)   # (connect, read) seconds
+CACHE_TTL_S = 60
+POOL_SIZE = 16
+MAX_RETRIES = 4
+BACKOFF_BASE_S = 0.5
+BACKOFF_CAP_S = 8.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+QUOTA_HEADERS = ("x-requests-remaining", "x-requests-used", "x-requests-last")
+
+
+class OddsResponse:
+    """
+    The parts of requests.Response our callers use, so cached and replayed
+    responses behave exactly like live ones.
+    """
+
+    def __init__(self, status_code, text, headers=None, url="", from_cache=False):
+        self.status_code = status_code
+        self.text = text
+        self.headers = CaseInsensitiveDict(headers or {})
+        self.url = url
+        self.from_cache = from_cache
+
+    def json(self):
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        if 400 <= self.status_code < 600:
+            raise requests.HTTPError(
+                f"{self.status_code} Error for url: {self.url}", response=self
+            )
+
+    def to_dict(self, quota=True):
+        headers = dict(self.headers)
+        if not quota:
+            headers = {k: v for k, v in headers.items() if k.lower() not in QUOTA_HEADERS}
+        return {
+            "status_code": self.status_code,
+            "text": self.text,
+            "headers": headers,
+            "url": self.url,
+        }
+
+    @classmethod
+    def from_dict(cls, d, from_cache=True):
+        return cls(d["status_code"], d["text"], d.get("headers"), d.get("url", ""), from_cache)
+
+
+def request_key(path, params):
+    """Stable key for a request; the API key is never part of it."""
+    clean = {k: v for k, v in (params or {}).items() if k != "apiKey"}
+    raw = path + "?" + json.dumps(clean, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+
+class OddsApiClient:
+    def __init__(
+        self,
+        api_key=ODDS_API_KEY,
+        base_url=BASE_URL,
+        mode=None,
+        cache_ttl=CACHE_TTL_S,
+        cache_dir=CACHE_DIR,
+        recordings_dir=RECORDINGS_DIR,
+        pool_size=POOL_SIZE,
+        max_retries=MAX_RETRIES,
+    ):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.mode = (mode or os.environ.get(MODE_ENV) or "live").lower()
+        if self.mode not in MODES:
+            raise ValueError(f"{MODE_ENV} must be one of {MODES}, got {self.mode!r}")
+        self.cache_ttl = cache_ttl
+        self.cache_dir = cache_dir
+        self.recordings_dir = recordings_dir
+        self.max_retries = max_retries
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self.stats = {"network": 0, "cache_hits": 0, "replayed": 0, "retries": 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def url_for(self, path):
+        if path.startswith("http"):
+            return path
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    # ---------- disk cache / recordings ----------
+
+    def _read(self, directory, key, ttl=None):
+        path = os.path.join(directory, f"{key}.json")
+        if not os.path.exists(path):
+            return None
+        if ttl is not None and time.time() - os.path.getmtime(path) > ttl:
+            return None
+        try:
+            with open(path, "r") as f:
+                resp = OddsResponse.from_dict(json.load(f))
+        except (OSError, ValueError, KeyError):
+            return None
+        # recordings keep the quota headers on disk; never hand them out as current
+        for name in QUOTA_HEADERS:
+            resp.headers.pop(name, None)
+        return resp
+
+    def _write(self, directory, key, resp, quota=True):
+        try:
+            write_json_atomic(os.path.join(directory, f"{key}.json"), resp.to_dict(quota), indent=None)
+        except OSError as e:
+            print("Could not write odds cache:", e)
+
+    # ---------- requests ----------
+
+    def _backoff(self, attempt, resp=None):
+        retry_after = None
+        if resp is not None:
+            try:
+                retry_after = float(resp.headers.get("Retry-After"))
+            except (TypeError, ValueError):
+                retry_after = None
+        if retry_after is not None:
+            return min(BACKOFF_CAP_S, retry_after)
+        delay = min(BACKOFF_CAP_S, BACKOFF_BASE_S * (2 ** attempt))
+        return delay * random.uniform(0.5, 1.5)
+
+    def _fetch(self, url, params, timeout):
+        last_exc = None
+        for attempt in range(self.max_retries + 1):
+            try:
+                raw = self.session.get(url, params=params, timeout=timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                last_exc = e
+                if attempt == self.max_retries:
+                    raise
+                self._count("retries")
+                time.sleep(self._backoff(attempt))
+                continue
+
+            self._count("network")
+            resp = OddsResponse(raw.status_code, raw.text, raw.headers, url)
+            if raw.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                self._count("retries")
+                time.sleep(self._backoff(attempt, resp))
+                continue
+            return resp
+        raise last_exc
+
+    def get(self, path, params=None, timeout=DEFAULT_TIMEOUT, ttl=None):
+        """
+        GET base_url/path with the API key added. Returns an OddsResponse;
+        connection failures raise requests.RequestException like requests.get.
+        """
+        params = dict(params or {})
+        key = request_key(path, params)
+        url = self.url_for(path)
+
+        if self.mode == "replay":
+            resp = self._read(self.recordings_dir, key)
+            if resp is None:
+                raise requests.ConnectionError(f"No recording for {path} {params} (replay mode)")
+            self._count("replayed")
+            return resp
+
+        ttl = self.cache_ttl if ttl is None else ttl
+        if ttl and self.mode == "live":
+            cached = self._read(self.cache_dir, key, ttl)
+            if cached is not None:
+                self._count("cache_hits")
+                return cached
+
+        params["apiKey"] = self.api_key
+        resp = self._fetch(url, params, timeout)
+
+        if self.mode == "record":
+            self._write(self.recordings_dir, key, resp)
+        if ttl and resp.status_code == 200:
+            self._write(self.cache_dir, key, resp, quota=False)
+        return resp
+
+    def close(self):
+        self.session.close()
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(api_key=ODDS_API_KEY):
+    """Process-wide client per API key, so every caller shares one pool."""
+    with _clients_lock:
+        client = _clients.get(api_key)
+        if client is None:
+            client = _clients[api_key] = OddsApiClient(api_key=api_key)
+        return client
@@ -0,0 +1,266 @@
+# odds_refresh_planner.py
+# Decides which Odds API calls are worth spending quota on.
+#
+# The Odds API reports the remaining credit balance in response headers
+# (x-requests-remaining / x-requests-used / x-requests-last). The planner
+# remembers that balance plus, per event, when we last pulled its props and
+# how much the lines moved. Each run it:
+#   - skips events that already tipped off (their pre-game props are frozen),
+#   - refreshes events more often the closer they are to tip-off,
+#   - refreshes lines that have been moving more often, quiet ones less often,
+#   - stops once the next call would dip into the reserve.
+# State lives in data/odds_refresh_state.json so cadence survives restarts.
+
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+from snapshots import write_json_atomic
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STATE_PATH = os.path.join(BASE_DIR, "data", "odds_refresh_state.json")
+
+QUOTA_RESERVE = 50          # credits we never spend automatically
+DEFAULT_EVENT_COST = 5      # 5 prop markets x 1 region per event-odds call
+FEATURED_COST = 3           # h2h,spreads,totals x 1 region
+
+# (hours until tip-off, minimum minutes between refreshes)
+PROXIMITY_TIERS = [
+    (1, 5),
+    (6, 15),
+    (24, 60),
+    (float("inf"), 360),
+]
+FEATURED_MIN_INTERVAL_MIN = 5
+MOVING_THRESHOLD = 0.25     # share of lines that changed since the last pull
+PRICE_MOVE = 5              # american-odds change that counts as movement
+STATE_RETENTION_DAYS = 3
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def _parse_time(value):
+    if not value:
+        return None
+    try:
+        dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt
+
+
+def _header_int(headers, name):
+    try:
+        return int(float(headers.get(name)))
+    except (TypeError, ValueError):
+        return None
+
+
+def consensus_lines(odds_data):
+    """
+    Collapse an event-odds payload to {"market|player|side": [point, price]},
+    using the median across bookmakers. Compact enough to persist, and stable
+    when a single book reshuffles.
+    """
+    by_key = {}
+    for bookmaker in odds_data.get("bookmakers", []):
+        for market in bookmaker.get("markets", []):
+            for outcome in market.get("outcomes", []):
+                player = outcome.get("description") or ""
+                key = f"{market.get('key')}|{player}|{outcome.get('name')}"
+                point, price = outcome.get("point"), outcome.get("price")
+                entry = by_key.setdefault(key, ([], []))
+                if point is not None:
+                    entry[0].append(float(point))
+                if price is not None:
+                    entry[1].append(float(price))
+
+    def _median(values):
+        if not values:
+            return None
+        values = sorted(values)
+        mid = len(values) // 2
+        if len(values) % 2:
+            return values[mid]
+        return (values[mid - 1] + values[mid]) / 2.0
+
+    return {k: [_median(points), _median(prices)] for k, (points, prices) in by_key.items()}
+
+
+def line_movement(previous, current):
+    """Share of lines (present in both pulls) whose point or price moved."""
+    shared = [k for k in current if k in previous]
+    if not shared:
+        return None
+    moved = 0
+    for k in shared:
+        (p0, c0), (p1, c1) = previous[k], current[k]
+        if p0 != p1 or (c0 is not None and c1 is not None and abs(c1 - c0) >= PRICE_MOVE):
+            moved += 1
+    return moved / len(shared)
+
+
+class RefreshPlanner:
+    def __init__(self, state=None, state_path=STATE_PATH, reserve=QUOTA_RESERVE):
+        self.state_path = state_path
+        self.reserve = reserve
+        self.state = state or {"quota": {}, "events": {}, "featured": {}}
+        self._run_remaining = None  # lowest balance reported during this run
+
+    @classmethod
+    def load(cls, state_path=STATE_PATH, reserve=QUOTA_RESERVE):
+        state = None
+        if os.path.exists(state_path):
+            try:
+                with open(state_path, "r") as f:
+                    state = json.load(f)
+            except (OSError, ValueError) as e:
+                print("Could not read odds refresh state:", e)
+        return cls(state, state_path, reserve)
+
+    def save(self):
+        self._prune()
+        write_json_atomic(self.state_path, self.state)
+
+    def _prune(self):
+        cutoff = _now() - timedelta(days=STATE_RETENTION_DAYS)
+        events = self.state.get("events", {})
+        for event_id in list(events):
+            tip = _parse_time(events[event_id].get("commence_time"))
+            if tip is not None and tip < cutoff:
+                del events[event_id]
+
+    # ---------- quota ----------
+
+    def record_quota(self, headers):
+        """
+        Store the balance from a response's quota headers. Concurrent requests
+        complete out of order, so within one run (one planner) the balance only
+        goes down: a late response that was sent earlier can't raise it again.
+        """
+        remaining = _header_int(headers, "x-requests-remaining")
+        if remaining is None:
+            return
+        if self._run_remaining is not None and remaining > self._run_remaining:
+            return
+        self._run_remaining = remaining
+        self.state["quota"] = {
+            "remaining": remaining,
+            "used": _header_int(headers, "x-requests-used"),
+            "last_cost": _header_int(headers, "x-requests-last"),
+            "updated_at": _now().isoformat(),
+        }
+
+    @property
+    def remaining(self):
+        return self.state.get("quota", {}).get("remaining")
+
+    def affordable_calls(self, cost):
+        """How many calls of `cost` credits fit above the reserve (None = unknown)."""
+        if self.remaining is None:
+            return None
+        return max(0, (self.remaining - self.reserve) // max(1, cost))
+
+    # ---------- event props ----------
+
+    def _min_interval(self, hours_to_tip, movement):
+        minutes = next(m for h, m in PROXIMITY_TIERS if hours_to_tip <= h)
+        if movement is not None:
+            if movement >= MOVING_THRESHOLD:
+                minutes /= 2.0
+            elif movement == 0:
+                minutes *= 2.0
+        return timedelta(minutes=minutes)
+
+    def plan(self, events, now=None, cost_per_event=DEFAULT_EVENT_COST):
+        """
+        Returns (to_fetch, skipped): event ids to pull in priority order, and
+        {event_id: reason} for the rest ("started", "fresh" or "quota").
+        """
+        now = now or _now()
+        known = self.state.get("events", {})
+        due, skipped = [], {}
+
+        for ev in events:
+            event_id = ev.get("id")
+            if not event_id:
+                continue
+            tip = _parse_time(ev.get("commence_time"))
+            if tip is not None and tip <= now:
+                skipped[event_id] = "started"
+                continue
+
+            hours_to_tip = (tip - now).total_seconds() / 3600.0 if tip else 0.0
+            info = known.get(event_id, {})
+            movement = info.get("movement")
+            last = _parse_time(info.get("last_fetched"))
+            if last is not None and now - last < self._min_interval(hours_to_tip, movement):
+                skipped[event_id] = "fresh"
+                continue
+
+            priority = (1.0 + (movement or 0.0)) / (1.0 + hours_to_tip)
+            due.append((priority, event_id))
+
+        due.sort(reverse=True)
+        to_fetch = [event_id for _, event_id in due]
+
+        last_cost = self.state.get("quota", {}).get("last_cost") or cost_per_event
+        affordable = self.affordable_calls(max(cost_per_event, last_cost))
+        if affordable is not None and len(to_fetch) > affordable:
+            for event_id in to_fetch[affordable:]:
+                skipped[event_id] = "quota"
+            to_fetch = to_fetch[:affordable]
+
+        return to_fetch, skipped
+
+    def record_event_odds(self, event_id, commence_time, odds_data, now=None):
+        now = now or _now()
+        events = self.state.setdefault("events", {})
+        info = events.get(event_id, {})
+        lines = consensus_lines(odds_data or {})
+
+        moved = line_movement(info.get("lines", {}), lines)
+        if moved is not None:
+            prev = info.get("movement")
+            # smooth so one noisy pull doesn't flip the cadence
+            info["movement"] = round(moved if prev is None else 0.5 * prev + 0.5 * moved, 4)
+
+        info.update(
+            {
+                "commence_time": commence_time,
+                "last_fetched": now.isoformat(),
+                "lines": lines,
+                "fetches": info.get("fetches", 0) + 1,
+            }
+        )
+        events[event_id] = info
+
+    # ---------- featured markets (daily_update.py) ----------
+
+    def should_refresh_featured(self, previous_games, now=None):
+        """
+        The bulk /odds call is worth making unless every game we already know
+        about has tipped off, we just pulled it, or quota is down to the reserve.
+        """
+        now = now or _now()
+        affordable = self.affordable_calls(FEATURED_COST)
+        if affordable == 0:
+            return False
+
+        last = _parse_time(self.state.get("featured", {}).get("last_fetched"))
+        if last is not None and now - last < timedelta(minutes=FEATURED_MIN_INTERVAL_MIN):
+            return False
+
+        if previous_games and last is not None and last.date() == now.date():
+            tips = [_parse_time(g.get("commence_time")) for g in previous_games]
+            if all(t is not None and t <= now for t in tips):
+                return False
+        return True
+
+    def record_featured(self, now=None):
+        now = now or _now()
+        self.state.setdefault("featured", {})["last_fetched"] = now.isoformat()
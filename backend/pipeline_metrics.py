@@ -0,0 +1,300 @@
+# pipeline_metrics.py
+# Per-stage / per-step resource accounting for the nightly pipeline.
+#
+# Every stage script (model_train.py, daily_update.py, ...) opens a stage with
+# start_stage() and marks its steps. When the stage exits, its wall time, CPU
+# time, peak RSS and (optionally) top tracemalloc allocation sites are appended
+# to a JSON run report in data/run_reports/.
+#
+# Stages that share OPENBET_RUN_ID land in the same report, so a full pipeline
+# run (run_openbet_all.py or the GitHub workflow) produces one file per night.
+# run_openbet_all.py is an orchestrator stage: its wall time already contains
+# the stages it runs, so once it is in the report it alone is the run's total.
+# Reports stay local (gitignored); MAX_REPORTS bounds them on disk.
+# Set OPENBET_TRACEMALLOC=1 to also capture allocation sites (slower).
+
+import atexit
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+REPORTS_DIR = os.path.join(BASE_DIR, "data", "run_reports")
+
+RUN_ID_ENV = "OPENBET_RUN_ID"
+TRACEMALLOC_ENV = "OPENBET_TRACEMALLOC"
+
+TOP_ALLOCATIONS = 10
+TRACE_FRAMES = 25
+MAX_REPORTS = 90  # keep roughly three months of nightly runs
+
+
+def _peak_rss_mb(who=None):
+    if resource is None:
+        return None
+    if who is None:
+        who = resource.RUSAGE_SELF
+    peak = resource.getrusage(who).ru_maxrss
+    # Linux reports KiB, macOS reports bytes
+    if sys.platform == "darwin":
+        return round(peak / (1024 * 1024), 1)
+    return round(peak / 1024, 1)
+
+
+def _cpu_seconds():
+    t = os.times()
+    return t.user + t.system
+
+
+def tracemalloc_enabled():
+    return os.environ.get(TRACEMALLOC_ENV, "").lower() in ("1", "true", "yes")
+
+
+def current_run_id():
+    run_id = os.environ.get(RUN_ID_ENV)
+    if not run_id:
+        run_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+        os.environ[RUN_ID_ENV] = run_id  # inherited by child stages
+    return run_id
+
+
+def report_path(run_id):
+    return os.path.join(REPORTS_DIR, f"run_{run_id}.json")
+
+
+class StageMetrics:
+    """
+    Collects step timings for one pipeline stage.
+
+    Steps can be used as a context manager (`with metrics.step("fetch"):`)
+    or sequentially via begin_step(), which closes the previous step. The
+    sequential form suits the module-level training scripts.
+    """
+
+    def __init__(self, stage, orchestrator=False):
+        self.stage = stage
+        self.orchestrator = orchestrator
+        self.run_id = current_run_id()
+        self.steps = []
+        self.notes = {}
+        self.trace = tracemalloc_enabled()
+        self._open = None
+        self._finished = False
+        self._t0 = time.perf_counter()
+        self._cpu0 = _cpu_seconds()
+        self.started_at = datetime.now().isoformat(timespec="seconds")
+        if self.trace and not tracemalloc.is_tracing():
+            tracemalloc.start(TRACE_FRAMES)
+
+    # ---------- steps ----------
+
+    def begin_step(self, name):
+        self.end_step()
+        if self.trace:
+            tracemalloc.reset_peak()
+        self._open = (name, time.perf_counter(), _cpu_seconds())
+
+    def end_step(self):
+        if self._open is None:
+            return
+        name, t0, cpu0 = self._open
+        self._open = None
+        entry = {
+            "step": name,
+            "wall_s": round(time.perf_counter() - t0, 3),
+            "cpu_s": round(_cpu_seconds() - cpu0, 3),
+            "peak_rss_mb": _peak_rss_mb(),
+        }
+        if self.trace:
+            _, traced_peak = tracemalloc.get_traced_memory()
+            entry["traced_peak_mb"] = round(traced_peak / (1024 * 1024), 1)
+            entry["top_allocations"] = self._top_allocations()
+        self.steps.append(entry)
+
+    @contextmanager
+    def step(self, name):
+        self.begin_step(name)
+        try:
+            yield
+        finally:
+            self.end_step()
+
+    def _top_allocations(self):
+        # Attribute each live allocation to the innermost frame in our own
+        # code, so sites read "model_train.py:123" instead of pandas internals.
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, tracemalloc.__file__)]
+        )
+        sites = {}
+        for stat in snapshot.statistics("traceback"):
+            frame = stat.traceback[0]
+            for fr in reversed(stat.traceback):
+                if fr.filename.startswith(BASE_DIR):
+                    frame = fr
+                    break
+            if frame.filename.startswith(BASE_DIR):
+                site = f"{os.path.relpath(frame.filename, BASE_DIR)}:{frame.lineno}"
+            else:
+                site = f"{os.path.basename(frame.filename)}:{frame.lineno}"
+            size, count = sites.get(site, (0, 0))
+            sites[site] = (size + stat.size, count + stat.count)
+
+        top = sorted(sites.items(), key=lambda kv: kv[1][0], reverse=True)
+        return [
+            {"site": site, "size_mb": round(size / (1024 * 1024), 2), "count": count}
+            for site, (size, count) in top[:TOP_ALLOCATIONS]
+        ]
+
+    def note(self, key, value):
+        """Attach a JSON-serializable value (e.g. a frame's memory) to the stage report."""
+        self.notes[key] = value
+
+    # ---------- stage ----------
+
+    def summary(self):
+        summary = {
+            "stage": self.stage,
+            "started_at": self.started_at,
+            "wall_s": round(time.perf_counter() - self._t0, 3),
+            "cpu_s": round(_cpu_seconds() - self._cpu0, 3),
+            "peak_rss_mb": _peak_rss_mb(),
+            "children_peak_rss_mb": _peak_rss_mb(resource.RUSAGE_CHILDREN) if resource else None,
+            "steps": self.steps,
+            "notes": self.notes,
+        }
+        if self.orchestrator:
+            summary["orchestrator"] = True
+        return summary
+
+    def finish(self):
+        if self._finished:
+            return
+        self._finished = True
+        self.end_step()
+        try:
+            write_stage(self.summary(), self.run_id)
+        except OSError as e:
+            print("Could not write run report:", e)
+
+
+def _host_info():
+    return {
+        "hostname": platform.node(),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def write_stage(stage_summary, run_id=None):
+    """Append one stage summary to the run report (stages run sequentially)."""
+    run_id = run_id or current_run_id()
+    os.makedirs(REPORTS_DIR, exist_ok=True)
+    path = report_path(run_id)
+
+    report = None
+    if os.path.exists(path):
+        try:
+            with open(path, "r") as f:
+                report = json.load(f)
+        except (OSError, ValueError):
+            report = None
+    if report is None:
+        report = {"run_id": run_id, "host": _host_info(), "stages": []}
+
+    report["stages"].append(stage_summary)
+    # an orchestrator's wall time includes its child stages: don't count them twice
+    outer = [s for s in report["stages"] if s.get("orchestrator")]
+    report["total_wall_s"] = round(sum(s["wall_s"] for s in outer or report["stages"]), 3)
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(report, f, indent=2)
+    os.replace(tmp_path, path)
+
+    _prune_reports()
+    return path
+
+
+def _prune_reports():
+    reports = sorted(
+        f for f in os.listdir(REPORTS_DIR) if f.startswith("run_") and f.endswith(".json")
+    )
+    for old in reports[:-MAX_REPORTS]:
+        os.remove(os.path.join(REPORTS_DIR, old))
+
+
+def start_stage(stage, orchestrator=False):
+    """
+    Create the stage recorder and make sure it is flushed on exit.
+    orchestrator=True for a stage that runs the others (run_openbet_all.py).
+    """
+    metrics = StageMetrics(stage, orchestrator)
+    atexit.register(metrics.finish)
+    return metrics
+
+
+# ---------- TREND COMPARISON ----------
+
+def load_reports(limit=None):
+    if not os.path.isdir(REPORTS_DIR):
+        return []
+    names = sorted(
+        f for f in os.listdir(REPORTS_DIR) if f.startswith("run_") and f.endswith(".json")
+    )
+    if limit:
+        names = names[-limit:]
+    reports = []
+    for name in names:
+        try:
+            with open(os.path.join(REPORTS_DIR, name), "r") as f:
+                reports.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return reports
+
+
+def step_trend(reports):
+    """
+    Returns {"stage/step": [(run_id, wall_s, peak_rss_mb), ...]} in run order,
+    so a regressing step shows up as a growing series.
+    """
+    trend = {}
+    for rep in reports:
+        for stage in rep.get("stages", []):
+            key = stage["stage"]
+            trend.setdefault(key, []).append(
+                (rep["run_id"], stage["wall_s"], stage.get("peak_rss_mb"))
+            )
+            for st in stage.get("steps", []):
+                trend.setdefault(f"{key}/{st['step']}", []).append(
+                    (rep["run_id"], st["wall_s"], st.get("peak_rss_mb"))
+                )
+    return trend
+
+
+def main(limit=7):
+    reports = load_reports(limit)
+    if not reports:
+        print(f"No run reports found in {REPORTS_DIR}")
+        return
+
+    print(f"Last {len(reports)} runs: {', '.join(r['run_id'] for r in reports)}")
+    for key, series in step_trend(reports).items():
+        walls = " ".join(f"{w:8.2f}" for _, w, _ in series)
+        peak = max((r for _, _, r in series if r is not None), default=0)
+        print(f"{key:45s} wall_s: {walls}   max_rss_mb: {peak}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 7)
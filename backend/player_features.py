@@ -0,0 +1,164 @@
+# player_features.py
+# Player feature engineering for model_train_players.py, sized for the full
+# PlayerStatistics.csv (every season) on a small worker:
+#   - chunked read with column projection; rows before START_DATE or outside
+#     the valid games are dropped per chunk, before they accumulate
+#   - float32 stats, int32 IDs, categorical names / cities (schema.py)
+#   - L10 rolling means from one sorted pass (windows.py), no groupby.apply
+#   - opponent context keyed by team ID (city + name -> TEAM_IDS; the shared
+#     "Los Angeles" city no longer merges Lakers and Clippers) and attached
+#     with an as-of join, so a missing team row falls back to the last one
+
+import numpy as np
+import pandas as pd
+
+import schema
+from artifacts import LatestTable
+from ids import PLAYER_ID_COLUMNS, TEAM_IDS, normalize_id_columns
+from team_features import EXCLUDED_LABELS
+from windows import lagged_mean, segment_starts
+
+CHUNK_ROWS = 250_000
+
+TARGETS = ["points", "reboundsTotal", "assists", "threePointersMade"]
+FEATURES_TO_ROLL = TARGETS + ["numMinutes"]
+ROLLING_WINDOW = 10
+OPP_WINDOW = 10
+OPP_MIN_PERIODS = 3
+
+FEATURE_COLS = [
+    "home",
+    "rolling_points",
+    "rolling_reboundsTotal",
+    "rolling_assists",
+    "rolling_numMinutes",
+    "Opp_L10_points_Allowed",
+    "Opp_L10_reboundsTotal_Allowed",
+]
+
+TEXT_COLUMNS = ["firstName", "lastName", "playerteamCity", "playerteamName", "opponentteamCity", "opponentteamName"]
+PLAYER_COLUMNS = (
+    TEXT_COLUMNS
+    + ["personId", "gameId", "gameDateTimeEst", "home", "playerteamId", "opponentteamId"]
+    + FEATURES_TO_ROLL
+)
+
+
+# ---------- LOADING ----------
+
+def load_valid_game_ids(games_path, metrics=None):
+    """gameIds in Games.csv, minus preseason / All-Star games."""
+    df_games = schema.read_csv(games_path, "Games", metrics, usecols=["gameId", "gameLabel"])
+    return df_games.loc[~df_games["gameLabel"].isin(EXCLUDED_LABELS), "gameId"].unique()
+
+
+def read_player_stats(path, start_date, valid_game_ids=None, chunksize=CHUNK_ROWS, metrics=None):
+    """
+    PlayerStatistics.csv rows on/after start_date (and in valid_game_ids if
+    given), read chunk by chunk with only the columns the model uses.
+    """
+    header = pd.read_csv(path, nrows=0).columns
+    usecols = [c for c in PLAYER_COLUMNS if c in header]
+    dtypes = {c: "float32" for c in FEATURES_TO_ROLL if c in usecols}
+    start = pd.Timestamp(start_date, tz="UTC")
+
+    kept, rows_read = [], 0
+    for chunk in pd.read_csv(path, usecols=usecols, dtype=dtypes, chunksize=chunksize, low_memory=False):
+        rows_read += len(chunk)
+        chunk["gameDateTimeEst"] = pd.to_datetime(
+            chunk["gameDateTimeEst"], utc=True, format="mixed", errors="coerce"
+        )
+        chunk = chunk[chunk["gameDateTimeEst"] >= start]
+        if chunk.empty:
+            continue
+        normalize_id_columns(chunk, PLAYER_ID_COLUMNS)
+        if valid_game_ids is not None:
+            chunk = chunk[chunk["gameId"].isin(valid_game_ids)]
+        kept.append(chunk)
+
+    if not kept:
+        return pd.DataFrame(columns=usecols), rows_read
+    df = schema.apply_schema(pd.concat(kept, ignore_index=True), "PlayerStatistics", metrics)
+    return df, rows_read
+
+
+def _team_ids(city, name):
+    """city + name -> NBA team ID; names not in TEAM_IDS (old franchises) get a stable negative ID."""
+    full = city.astype(str).str.strip() + " " + name.astype(str).str.strip()
+    codes, uniques = pd.factorize(full)
+    lookup = np.array([TEAM_IDS.get(u, -(i + 1)) for i, u in enumerate(uniques)], dtype=np.int32)
+    return lookup[codes]
+
+
+def add_team_ids(df):
+    """playerteamId / opponentteamId from the CSV when present, else from city + name."""
+    for side in ("player", "opponent"):
+        col = f"{side}teamId"
+        if col in df.columns and df[col].notna().all():
+            continue
+        df[col] = _team_ids(df[f"{side}teamCity"], df[f"{side}teamName"])
+    return df
+
+
+# ---------- FEATURES ----------
+
+def add_rolling_features(df):
+    """rolling_<stat>: mean of the player's previous ROLLING_WINDOW games."""
+    df = df.sort_values(["personId", "gameDateTimeEst"], kind="mergesort").reset_index(drop=True)
+    rolled = lagged_mean(df[FEATURES_TO_ROLL], segment_starts(df["personId"]), ROLLING_WINDOW)
+    for i, f in enumerate(FEATURES_TO_ROLL):
+        df[f"rolling_{f}"] = rolled[:, i].astype(np.float32)
+    return df
+
+
+def team_game_totals(df):
+    """One row per (team, game): summed player TARGETS plus their L10 mean before that game."""
+    totals = (
+        df.groupby(["playerteamId", "gameId"], sort=False, observed=True)
+        .agg(gameDateTimeEst=("gameDateTimeEst", "first"), **{t: (t, "sum") for t in TARGETS})
+        .reset_index()
+        .sort_values(["playerteamId", "gameDateTimeEst"], kind="mergesort")
+        .reset_index(drop=True)
+    )
+    rolled = lagged_mean(
+        totals[TARGETS], segment_starts(totals["playerteamId"]), OPP_WINDOW, min_periods=OPP_MIN_PERIODS
+    )
+    for i, t in enumerate(TARGETS):
+        totals[f"Opp_L10_{t}_Allowed"] = rolled[:, i].astype(np.float32)
+    return totals
+
+
+def add_opponent_context(df, totals):
+    """As-of join of the opponent's team totals onto every player row (order preserved)."""
+    opp_cols = [f"Opp_L10_{t}_Allowed" for t in TARGETS]
+    right = (
+        totals[["playerteamId", "gameDateTimeEst"] + opp_cols]
+        .rename(columns={"playerteamId": "opponentteamId"})
+        .sort_values("gameDateTimeEst", kind="mergesort")
+    )
+    left = df.drop(columns=[c for c in opp_cols if c in df.columns])
+    left = left.assign(_row=np.arange(len(left))).sort_values("gameDateTimeEst", kind="mergesort")
+    right["opponentteamId"] = right["opponentteamId"].astype(left["opponentteamId"].dtype)
+    right["gameDateTimeEst"] = right["gameDateTimeEst"].astype(left["gameDateTimeEst"].dtype)
+
+    merged = pd.merge_asof(left, right, on="gameDateTimeEst", by="opponentteamId", direction="backward")
+    return merged.sort_values("_row").drop(columns="_row").reset_index(drop=True)
+
+
+def build_player_features(df):
+    """Loaded PlayerStatistics rows -> model frame (rolling + opponent features)."""
+    df = add_rolling_features(add_team_ids(df))
+    return add_opponent_context(df, team_game_totals(df))
+
+
+def latest_player_rows(df_model):
+    """
+    personId -> last FEATURE_COLS values plus first / last / combined name and
+    the team of that last game (playerteamId, as text), as a LatestTable.
+    """
+    last = df_model.groupby("personId", sort=False, observed=True).tail(1).copy()
+    names = [last[c].astype(object).fillna("").astype(str) if c in last else "" for c in ("firstName", "lastName")]
+    last["playerName"] = (names[0] + " " + names[1]).str.strip()
+    return LatestTable.from_frame(
+        last, "personId", FEATURE_COLS, ["firstName", "lastName", "playerName", "playerteamId"]
+    )
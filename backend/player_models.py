@@ -0,0 +1,181 @@
+# player_models.py
+# Model layouts for the player projection targets (model_train_players.py):
+#
+#   per_target    one RandomForestRegressor per target (the original layout)
+#   multi_output  one forest predicting every target jointly: a single tree
+#                 build and a single predict for all four. Targets are
+#                 standardized first so points (std ~8) doesn't drown out
+#                 threes (std ~1) in the shared split criterion.
+#   online        one linear SGD model per target, updated nightly with only
+#                 the new box scores (player_online.py)
+#
+# OPENBET_PLAYER_MODEL picks the layout (default per_target). Whatever the
+# layout, predict_targets() returns one column per target, so daily_update.py
+# doesn't care which one was trained.
+#
+#   python player_models.py [data_dir]   *fit time / artifact size / latency / MAE per layout
+
+import io
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+from sklearn.compose import TransformedTargetRegressor
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import SGDRegressor
+from sklearn.metrics import mean_absolute_error
+from sklearn.preprocessing import StandardScaler
+
+from bench import best_ms, best_time, print_table, timed
+from model_registry import PREDICTIONS
+from parallel_fit import fit_models
+from tree_predictor import serving_model
+
+LAYOUT_ENV = "OPENBET_PLAYER_MODEL"
+DEFAULT_LAYOUT = "per_target"
+LAYOUTS = ("per_target", "multi_output", "online")
+PREDICT_REPEATS = 20
+
+
+def layout_name(name=None):
+    """Explicit name, else $OPENBET_PLAYER_MODEL, else the default."""
+    name = (name or os.environ.get(LAYOUT_ENV) or DEFAULT_LAYOUT).lower()
+    if name not in LAYOUTS:
+        raise ValueError(f"{LAYOUT_ENV} must be one of {list(LAYOUTS)}, got {name!r}")
+    return name
+
+
+def _forest():
+    # Random Forest: 50 trees is usually plenty
+    return RandomForestRegressor(n_estimators=50, min_samples_split=10, random_state=42)
+
+
+class OnlineProjectionModel:
+    """StandardScaler + one SGDRegressor per target, updatable with partial_fit."""
+
+    def __init__(self, targets):
+        self.targets = list(targets)
+        self.scaler = StandardScaler()
+        self.models = {}
+
+    def fit(self, X, Y):
+        # The scaler is frozen after a full fit: moving it later would shift
+        # inputs under weights that were learned on the old scale.
+        Xs = self.scaler.fit_transform(np.asarray(X, dtype=float))
+        self.models = {
+            t: SGDRegressor(penalty="l2", alpha=1e-4, max_iter=20, tol=None, random_state=42).fit(Xs, Y[t])
+            for t in self.targets
+        }
+        return self
+
+    def partial_fit(self, X, Y):
+        Xs = self.scaler.transform(np.asarray(X, dtype=float))
+        for t in self.targets:
+            self.models[t].partial_fit(Xs, Y[t])
+        return self
+
+    def predict(self, X):
+        Xs = self.scaler.transform(np.asarray(X, dtype=float))
+        # counting stats can't go negative
+        return np.column_stack([self.models[t].predict(Xs) for t in self.targets]).clip(min=0)
+
+
+def fit_player_models(layout, X_train, Y_train, budget=None):
+    """
+    Fit the player targets (the columns of Y_train) in the given layout.
+    Returns (artifact fields, {name: fit seconds}); the fields go straight
+    into the saved artifact next to latest_stats / feature_cols.
+    """
+    layout = layout_name(layout)
+    targets = list(Y_train.columns)
+
+    if layout == "online":
+        t0 = time.perf_counter()
+        model = OnlineProjectionModel(targets).fit(X_train, Y_train)
+        fit_seconds = {"online": round(time.perf_counter() - t0, 3)}
+        fields = {"model_layout": layout, "targets": targets, "model": model}
+    elif layout == "multi_output":
+        joint = TransformedTargetRegressor(regressor=_forest(), transformer=StandardScaler())
+        models, fit_seconds = fit_models({"multi_output": (joint, X_train, Y_train)}, budget=budget)
+        fields = {"model_layout": layout, "targets": targets, "model": models["multi_output"]}
+    else:
+        # The targets are independent, so they train side by side within the CPU budget
+        jobs = {t: (_forest(), X_train, Y_train[t]) for t in targets}
+        models, fit_seconds = fit_models(jobs, budget=budget)
+        fields = {"model_layout": layout, "targets": targets, "models": models}
+    return fields, fit_seconds
+
+
+def artifact_targets(art):
+    """Target order of predict_targets() columns (older artifacts: the models' keys)."""
+    return art.get("targets") or list(art["models"])
+
+
+def predict_targets(art, X):
+    """rows x targets predictions from a player artifact, in artifact_targets() order."""
+    # cached per model version and input for registered artifacts (model_registry.py)
+    return PREDICTIONS.predict(art, "targets", X, lambda X: _predict_targets(art, X))
+
+
+def _predict_targets(art, X):
+    # flat node-array copies when the artifact has them (tree_predictor.py)
+    if "model" in art:  # multi_output / online: one model, one column per target
+        return np.asarray(serving_model(art, "model", len(X)).predict(X), dtype=float).reshape(len(X), -1)
+    models = serving_model(art, "models", len(X))
+    return np.column_stack([models[t].predict(X) for t in artifact_targets(art)])
+
+
+# ---------- BENCHMARK ----------
+
+def _artifact_mb(fields):
+    buf = io.BytesIO()
+    joblib.dump(fields, buf)
+    return buf.tell() / 1e6
+
+
+def benchmark(X_train, Y_train, X_test, Y_test, layouts=LAYOUTS, budget=None):
+    """Fit every layout on the same split; one report dict per layout."""
+    reports = []
+    for layout in layouts:
+        (fields, _), fit_s = timed(lambda: fit_player_models(layout, X_train, Y_train, budget=budget))
+
+        row = X_test.iloc[:1]
+        pred = predict_targets(fields, X_test)
+        batch_s = best_time(lambda: predict_targets(fields, X_test), 3)
+
+        report = {
+            "layout": layout,
+            "fit_s": round(fit_s, 3),
+            "artifact_mb": round(_artifact_mb(fields), 3),
+            "predict_row_ms": round(best_ms(lambda: predict_targets(fields, row), PREDICT_REPEATS), 2),
+            "predict_rows_per_s": round(len(X_test) / batch_s) if batch_s > 0 else None,
+        }
+        for i, t in enumerate(fields["targets"]):
+            report[f"MAE_{t}"] = round(float(mean_absolute_error(Y_test[t], pred[:, i])), 3)
+        reports.append(report)
+    return reports
+
+
+def main():
+    from player_features import FEATURE_COLS, TARGETS, build_player_features, load_valid_game_ids, read_player_stats
+    from team_estimators import time_split
+
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    data_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join(base_dir, "archive", "box_scores")
+
+    valid_ids = load_valid_game_ids(os.path.join(data_dir, "Games.csv"))
+    df_players, _ = read_player_stats(os.path.join(data_dir, "PlayerStatistics.csv"), "2024-10-01", valid_ids)
+    df_model = build_player_features(df_players)
+    df_train = df_model[df_model["gameDateTimeEst"] >= "2025-10-01"].sort_values("gameDateTimeEst", kind="mergesort")
+
+    X = df_train[FEATURE_COLS].fillna(0)
+    Y = df_train[TARGETS].fillna(0).astype(float)
+    X_train, X_test, Y_train, Y_test = time_split(X, Y)
+    print(f"Benchmarking on {len(X_train):,} train / {len(X_test):,} test player-games")
+    print_table(benchmark(X_train, Y_train, X_test, Y_test))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+# player_names.py
+# Resolve sportsbook player names to the IDs the models use.
+#
+# The Odds API, nba_api rosters and the box scores spell names differently:
+# "Nicolas Claxton" / "Nic Claxton", "Kelly Oubre Jr" / "Kelly Oubre Jr.",
+# "Alperen Şengün" / "Alperen Sengun". A PlayerNameResolver is built once over
+# the known players ({personId: name}, or {name: name} for tables keyed by
+# name) and resolves a name through, in order:
+#   1. the alias table       "aliases" in data/nba_player_aliases.json (hand-maintained)
+#   2. the canonical name    accents, punctuation and Jr / Sr / II / III dropped
+#   3. last name + prefix    "Cam Johnson" -> "Cameron Johnson" (unique only)
+#   4. trigram similarity    typos / spacing: a clear best match with the same last name,
+#                            or a near-identical name
+# Results are memoized. save() writes two review lists next to the aliases:
+#   "learned"     fuzzy (steps 3-4) matches, never used as aliases: a wrong
+#                 match stays fuzzy and is re-checked every run until a human
+#                 moves it to "aliases"
+#   "unresolved"  names that matched nothing (or more than one player)
+#
+#   python player_names.py          *resolve the names in data/player_props.json against active players
+#   python player_names.py --save   *... and record learned matches / unresolved names for review
+
+import json
+import os
+import re
+import sys
+import time
+import unicodedata
+from collections import Counter
+from datetime import datetime
+
+from snapshots import write_json_atomic
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, "data")
+ALIASES_FILE = os.path.join(DATA_DIR, "nba_player_aliases.json")  # next to nba_player_team_map.json
+PROPS_FILE = os.path.join(DATA_DIR, "player_props.json")
+
+SUFFIXES = {"jr", "sr", "ii", "iii", "iv", "v"}
+FUZZY_MIN_SCORE = 0.8        # trigram Dice score when the last names agree
+FUZZY_MIN_SCORE_ANY = 0.9    # ... when they don't
+FUZZY_MARGIN = 0.05          # over the runner-up ("Jaylen" between "Jalen" and "Jaylin")
+
+
+def canonical_name(name):
+    """'Kelly Oubre Jr.' -> 'kelly oubre', 'Alperen Şengün' -> 'alperen sengun'."""
+    if not name:
+        return ""
+    s = unicodedata.normalize("NFKD", str(name))
+    s = "".join(ch for ch in s if not unicodedata.combining(ch)).lower()
+    s = re.sub(r"[.,'`’]", "", s)
+    tokens = re.sub(r"[^a-z0-9]+", " ", s).split()
+    while len(tokens) > 2 and tokens[-1] in SUFFIXES:
+        tokens.pop()
+    return " ".join(tokens)
+
+
+def trigrams(canonical):
+    padded = f"  {canonical} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def load_aliases(path=ALIASES_FILE):
+    """{canonical alias: canonical known name}."""
+    try:
+        with open(path, "r") as f:
+            return json.load(f).get("aliases", {})
+    except (OSError, ValueError):
+        return {}
+
+
+class PlayerNameResolver:
+    """Name -> player key lookups over one set of known players."""
+
+    def __init__(self, players, aliases=None):
+        self.names = {}      # canonical name -> key (None: two players share it)
+        self.by_last = {}    # last name -> [(first names, canonical name)]
+        self.grams = {}      # trigram -> canonical names
+        self.sizes = {}
+        for key, name in players.items():
+            canonical = canonical_name(name)
+            if not canonical:
+                continue
+            if canonical in self.names and self.names[canonical] != key:
+                self.names[canonical] = None
+                continue
+            self.names[canonical] = key
+            tokens = canonical.split()
+            self.by_last.setdefault(tokens[-1], []).append((" ".join(tokens[:-1]), canonical))
+            grams = trigrams(canonical)
+            self.sizes[canonical] = len(grams)
+            for gram in grams:
+                self.grams.setdefault(gram, []).append(canonical)
+        self.aliases = {canonical_name(a): canonical_name(t) for a, t in (aliases or {}).items()}
+        self.learned = {}
+        self.unresolved = set()
+        self._memo = {}
+
+    def resolve(self, name):
+        """The player key for `name`, or None."""
+        if name in self._memo:
+            return self._memo[name]
+        canonical = canonical_name(name)
+        match = self._match(canonical)
+        key = self.names.get(match) if match else None
+        if key is None and canonical:
+            self.unresolved.add(name)
+        elif match != canonical and canonical not in self.aliases:
+            self.learned[canonical] = match
+        self._memo[name] = key
+        return key
+
+    def resolve_many(self, names):
+        """{name: key} for every distinct name that resolves."""
+        resolved = {}
+        for name in dict.fromkeys(names):
+            key = self.resolve(name)
+            if key is not None:
+                resolved[name] = key
+        return resolved
+
+    def _match(self, canonical):
+        """The known canonical name `canonical` refers to, or None."""
+        if not canonical:
+            return None
+        if canonical in self.aliases:
+            return self.aliases[canonical]
+        if canonical in self.names:
+            return canonical
+        tokens = canonical.split()
+        if len(tokens) > 1:
+            first = " ".join(tokens[:-1])
+            prefixed = [c for f, c in self.by_last.get(tokens[-1], ()) if f.startswith(first) or first.startswith(f)]
+            if len(prefixed) == 1:
+                return prefixed[0]
+            if prefixed:
+                return None  # "J. Williams": several players fit
+        return self._closest(canonical)
+
+    def _closest(self, canonical):
+        grams = trigrams(canonical)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.grams.get(gram, ()))
+        if not shared:
+            return None
+        scored = sorted(
+            ((2 * n / (len(grams) + self.sizes[c]), c) for c, n in shared.items()),
+            reverse=True,
+        )
+        score, best = scored[0]
+        if len(scored) > 1 and scored[1][0] > score - FUZZY_MARGIN:
+            return None
+        same_last = best.split()[-1] == canonical.split()[-1]
+        return best if score >= (FUZZY_MIN_SCORE if same_last else FUZZY_MIN_SCORE_ANY) else None
+
+    def report(self, label="names"):
+        if self.unresolved:
+            names = ", ".join(sorted(self.unresolved)[:10])
+            more = f" (+{len(self.unresolved) - 10} more)" if len(self.unresolved) > 10 else ""
+            print(f"[names] {len(self.unresolved)} unresolved {label}: {names}{more}")
+
+    def save(self, path=ALIASES_FILE):
+        """
+        Record this run's fuzzy matches under "learned" and its unresolved
+        names under "unresolved". "aliases" is left exactly as it was.
+        """
+        if not self.learned and not self.unresolved:
+            return
+        try:
+            with open(path, "r") as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            payload = {}
+        aliases = payload.get("aliases", {})
+        learned = {**payload.get("learned", {}), **self.learned}
+        write_json_atomic(path, {
+            "last_updated": datetime.utcnow().isoformat(),
+            "aliases": dict(sorted(aliases.items())),
+            "learned": {k: v for k, v in sorted(learned.items()) if k not in aliases},
+            "unresolved": sorted(self.unresolved),
+        })
+
+
+def known_players():
+    """personId -> full name for active NBA players (nba_api's bundled list)."""
+    from nba_api.stats.static import players
+
+    return {p["id"]: p["full_name"] for p in players.get_active_players()}
+
+
+def main():
+    try:
+        with open(PROPS_FILE, "r") as f:
+            names = [p.get("player") for p in json.load(f).get("props", [])]
+    except (OSError, ValueError):
+        print(f"No props snapshot at {PROPS_FILE} (run daily_player_props.py)")
+        return
+    t0 = time.perf_counter()
+    resolver = PlayerNameResolver(known_players(), load_aliases())
+    built = time.perf_counter()
+    resolved = resolver.resolve_many(n for n in names if n)
+    done = time.perf_counter()
+    print(f"{len(resolved)} of {len(set(filter(None, names)))} names resolved "
+          f"(index {1e3 * (built - t0):.1f} ms, resolve {1e3 * (done - built):.1f} ms)")
+    resolver.report()
+    if "--save" in sys.argv[1:]:
+        resolver.save()
+
+
+if __name__ == "__main__":
+    main()
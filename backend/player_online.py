@@ -0,0 +1,139 @@
+# player_online.py
+# Online player projection model (OPENBET_PLAYER_MODEL=online).
+#
+# player_models.OnlineProjectionModel is one SGDRegressor per target over
+# standardized features. A full refit runs every FULL_REFIT_DAYS (or when
+# there is no usable previous model); every other night the previous model
+# absorbs only the box scores newer than the last row it has seen, with
+# partial_fit. Only that model update is O(new rows): model_train_players.py
+# still reads the season, rebuilds its features and fingerprints it every
+# night, which grows with the season.
+#
+# Every version is scored against the random-forest baseline (the per_target
+# layout), which is refit only alongside the full refits:
+#   - full refit: both fit on the earliest 80% of rows by date, scored on the
+#     latest 20%; the online model then absorbs that 20% as well
+#   - nightly:    both predict the new rows before the online model learns
+#                 them (test-then-train)
+# The baseline forests live in BASELINE_PATH, so daily_update.py never loads them.
+# It sits under the registry dir (data/models/), which the nightly workflow
+# restores from its cache; the previous model comes from the live file or,
+# on a fresh checkout, from the registry's current version.
+
+import os
+from datetime import datetime
+
+import joblib
+import pandas as pd
+from sklearn.metrics import mean_absolute_error
+
+from model_registry import REGISTRY_DIR
+from player_models import OnlineProjectionModel, fit_player_models, predict_targets
+
+BASELINE_PATH = os.path.join(REGISTRY_DIR, "player_online_baseline.pkl")
+
+FULL_REFIT_DAYS = 14
+HOLDOUT_FRAC = 0.2
+
+
+def _maes(Y, pred, targets):
+    return {t: round(float(mean_absolute_error(Y[t], pred[:, i])), 3) for i, t in enumerate(targets)}
+
+
+def full_refit_reason(prev, feature_cols, targets, now):
+    """Why tonight needs a full refit, or None when the previous model can be updated."""
+    if not prev or prev.get("model_layout") != "online":
+        return "no previous online model"
+    if list(prev.get("feature_cols", [])) != list(feature_cols) or prev.get("targets") != list(targets):
+        return "features or targets changed"
+    state = prev.get("online_state") or {}
+    if not state.get("full_fit_at") or not state.get("trained_through"):
+        return "previous model has no training state"
+    age_days = (now - datetime.fromisoformat(state["full_fit_at"])).days
+    if age_days >= FULL_REFIT_DAYS:
+        return f"last full refit {age_days} days ago"
+    return None
+
+
+def update_online_model(prev, df_train, feature_cols, targets, baseline=None, now=None, budget=None):
+    """
+    Full refit or nightly update of the online model.
+    df_train: model rows with feature_cols, targets and gameDateTimeEst.
+    baseline: per_target forest fields from the last full refit (BASELINE_PATH).
+    Returns (artifact fields, baseline fields, report).
+    """
+    now = now or datetime.now()
+    df = df_train.sort_values("gameDateTimeEst", kind="mergesort")
+    X = df[feature_cols].fillna(0)
+    Y = df[targets].fillna(0).astype(float)
+    dates = df["gameDateTimeEst"]
+
+    reason = full_refit_reason(prev, feature_cols, targets, now)
+    if reason is None:
+        state = prev["online_state"]
+        new = (dates > pd.Timestamp(state["trained_through"])).to_numpy()
+        model = prev["model"]
+        report = {"mode": "incremental", "n_new": int(new.sum())}
+        if new.any():
+            # test-then-train: score the new rows before learning them
+            report["MAE"] = _maes(Y[new], model.predict(X[new]), targets)
+            if baseline is not None:
+                report["baseline_MAE"] = _maes(Y[new], predict_targets(baseline, X[new]), targets)
+            model.partial_fit(X[new], Y[new])
+            state = dict(state, trained_through=dates[new].max().isoformat())
+        fields = {k: prev[k] for k in ("model_layout", "targets", "model")}
+        fields["online_state"] = dict(state, trained_at=now.isoformat())
+        return fields, baseline, report
+
+    print(f"Online model full refit: {reason}")
+    split = int(len(df) * (1 - HOLDOUT_FRAC))
+    X_fit, X_hold, Y_fit, Y_hold = X.iloc[:split], X.iloc[split:], Y.iloc[:split], Y.iloc[split:]
+
+    model = OnlineProjectionModel(targets).fit(X_fit, Y_fit)
+    baseline, _ = fit_player_models("per_target", X_fit, Y_fit, budget=budget)
+    report = {
+        "mode": "full",
+        "reason": reason,
+        "n_new": len(df),
+        "MAE": _maes(Y_hold, model.predict(X_hold), targets),
+        "baseline_MAE": _maes(Y_hold, predict_targets(baseline, X_hold), targets),
+    }
+    model.partial_fit(X_hold, Y_hold)
+
+    fields = {
+        "model_layout": "online",
+        "targets": list(targets),
+        "model": model,
+        "online_state": {
+            "full_fit_at": now.isoformat(),
+            "trained_through": dates.max().isoformat(),
+            "trained_at": now.isoformat(),
+        },
+    }
+    return fields, baseline, report
+
+
+def load_previous(path, registry=None):
+    """A saved player artifact (any layout): the live file, else the registry's current version, else None."""
+    try:
+        return joblib.load(path)
+    except Exception:
+        pass
+    if registry is None:
+        return None
+    try:
+        return registry.load_current()
+    except Exception:
+        return None
+
+
+def load_baseline(path=BASELINE_PATH):
+    try:
+        return joblib.load(path)
+    except Exception:
+        return None
+
+
+def save_baseline(baseline, path=BASELINE_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    joblib.dump(baseline, path)
@@ -1,16 +1,22 @@
 import os
-import joblib
-import numpy as np
 import pandas as pd
 
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_absolute_error
 
+import pipeline_metrics
+from artifacts import LatestTable
+from model_registry import ModelRegistry, fingerprint, force_retrain
+from parallel_fit import fit_models
+from tree_predictor import add_flat_models
+
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(BASE_DIR, "data", "box_scores")
 MODEL_PATH = os.path.join(BASE_DIR, "data", "player_prop_model.pkl")
 
+PROP_TARGETS = ["points", "reboundsTotal", "assists"]
+
 
 def load_data():
     games_path = os.path.join(DATA_DIR, "Games.csv")
@@ -85,14 +91,18 @@ def engineer_player_features(df_stats: pd.DataFrame):
     return df_model
 
 
-def train_prop_model(df_model: pd.DataFrame, target_col: str):
-    feature_cols = [
-        "home_flag",
-        "roll10_points",
-        "roll10_reboundsTotal",
-        "roll10_assists",
-        "roll10_minutes",
-    ]
+PROP_FEATURE_COLS = [
+    "home_flag",
+    "roll10_points",
+    "roll10_reboundsTotal",
+    "roll10_assists",
+    "roll10_minutes",
+]
+
+
+def prop_model_job(df_model: pd.DataFrame, target_col: str):
+    """Untrained model plus its train / test split for one target."""
+    feature_cols = list(PROP_FEATURE_COLS)
 
     for c in feature_cols:
         if c not in df_model.columns:
@@ -105,66 +115,96 @@ def train_prop_model(df_model: pd.DataFrame, target_col: str):
         X, y, test_size=0.2, random_state=42
     )
 
+    # n_jobs is set by fit_models() from the CPU budget
     model = RandomForestRegressor(
         n_estimators=150,
         max_depth=None,
         random_state=42,
-        n_jobs=-1,
     )
-    model.fit(X_train, y_train)
-    preds = model.predict(X_test)
-    mae = mean_absolute_error(y_test, preds)
-    print(f"{target_col} model MAE: {mae:.2f}")
+    return model, (X_train, y_train), (X_test, y_test)
 
-    return model, feature_cols
 
+def train_prop_models(df_model: pd.DataFrame, targets):
+    """Fit one model per target concurrently; returns ({target: model}, fit seconds, held-out MAEs)."""
+    jobs, held_out, maes = {}, {}, {}
+    for target in targets:
+        df_target = df_model.dropna(subset=[target])
+        model, (X_train, y_train), held_out[target] = prop_model_job(df_target, target)
+        jobs[target] = (model, X_train, y_train)
 
-def build_latest_player_stats(df_model: pd.DataFrame, feature_cols):
-    latest_stats = {}
-    players = df_model["playerName"].unique()
+    models, fit_seconds = fit_models(jobs)
+    for target, model in models.items():
+        X_test, y_test = held_out[target]
+        mae = mean_absolute_error(y_test, model.predict(X_test))
+        maes[f"MAE_{target}"] = round(float(mae), 3)
+        print(f"{target} model MAE: {mae:.2f} ({fit_seconds[target]:.1f}s)")
+    return models, fit_seconds, maes
 
-    for name in players:
-        sub = df_model[df_model["playerName"] == name]
-        if sub.empty:
-            continue
-        latest_stats[name] = sub.iloc[-1][feature_cols].to_dict()
 
-    return latest_stats
+def build_latest_player_stats(df_model: pd.DataFrame, feature_cols):
+    """playerName -> last row's feature_cols (df_model is sorted by player, date)."""
+    return LatestTable.from_frame(df_model, "playerName", feature_cols)
 
 
 def main():
+    metrics = pipeline_metrics.start_stage("player_prop_model")
+
+    metrics.begin_step("load_data")
     print("--- LOADING DATA (PLAYER PROPS MODEL) ---")
     df_games, df_stats = load_data()
 
+    metrics.begin_step("features")
     print("--- ENGINEERING PLAYER FEATURES ---")
     df_model = engineer_player_features(df_stats)
 
-    # Filter to rows with targets
-    df_pts = df_model.dropna(subset=["points"])
-    df_reb = df_model.dropna(subset=["reboundsTotal"])
-    df_ast = df_model.dropna(subset=["assists"])
-
-    print("--- TRAINING POINTS MODEL ---")
-    pts_model, feature_cols = train_prop_model(df_pts, "points")
-
-    print("--- TRAINING REBOUNDS MODEL ---")
-    reb_model, _ = train_prop_model(df_reb, "reboundsTotal")
-
-    print("--- TRAINING ASSISTS MODEL ---")
-    ast_model, _ = train_prop_model(df_ast, "assists")
+    feature_cols = list(PROP_FEATURE_COLS)
+    latest_stats = build_latest_player_stats(df_model, feature_cols)
 
+    # Same rows and code as a stored version: republish it instead of refitting
+    registry = ModelRegistry("props", live_path=MODEL_PATH)
+    used = [c for c in ["playerName", "gameDateTimeEst", *feature_cols, *PROP_TARGETS] if c in df_model]
+    version = fingerprint(
+        data=(df_model[used], latest_stats.array),
+        code=("player_prop_model.py", "tree_predictor.py"),
+        params={"targets": PROP_TARGETS},
+    )
+    metrics.note("model_version", version)
+    if registry.has(version) and not force_retrain():
+        print(f"Prop models {version} already trained on this data; nothing to do")
+        registry.promote(version)
+        metrics.finish()
+        return
+
+    metrics.begin_step("train")
+    print("--- TRAINING POINTS / REBOUNDS / ASSISTS MODELS ---")
+    models, fit_seconds, maes = train_prop_models(df_model, PROP_TARGETS)
+    metrics.note("fit_seconds", fit_seconds)
+
+    metrics.begin_step("save_artifacts")
     print("--- BUILDING LATEST PLAYER STATS LOOKUP ---")
-    latest_stats = build_latest_player_stats(df_model, feature_cols)
 
-    os.makedirs(os.path.dirname(MODEL_PATH), exist_ok=True)
     artifact = {
-        "points_model": pts_model,
-        "rebounds_model": reb_model,
-        "assists_model": ast_model,
+        "points_model": models["points"],
+        "rebounds_model": models["reboundsTotal"],
+        "assists_model": models["assists"],
         "feature_cols": feature_cols,
         "latest_player_stats": latest_stats,
     }
-    joblib.dump(artifact, MODEL_PATH)
+    # Flat node-array copies of the forests for serving (tree_predictor.py)
+    add_flat_models(
+        artifact,
+        df_model[feature_cols].fillna(0.0).tail(500),
+        keys=("points_model", "rebounds_model", "assists_model"),
+    )
+    registry.register(
+        version,
+        artifact,
+        scores=maes,
+        timing={"fit": round(sum(fit_seconds.values()), 3)},
+        inputs={"rows": len(df_model)},
+        metrics=metrics,
+    )
+    metrics.finish()
     print(f"SUCCESS! '{MODEL_PATH}' created")
 
 
@@ -0,0 +1,184 @@
+# refresh_daemon.py
+# Long-running intraday refresher.
+#
+# Keeps nba_model.pkl, player_prop_models.pkl, player_prop_model.pkl, their
+# latest-stats tables, the team feature store and the player -> team map in memory and re-runs only
+# the daily_update.py / daily_player_props.py logic on a schedule. Each cycle costs the Odds API
+# calls plus in-memory inference; snapshots are published atomically so the
+# API never serves a half-written file.
+#
+#   python3 refresh_daemon.py                 # every 5 min on game days
+#   python3 refresh_daemon.py --interval 120  # every 2 min on game days
+#   python3 refresh_daemon.py --once          # single warm cycle, then exit
+
+import argparse
+import os
+import signal
+import time
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+
+import daily_player_props
+import daily_update
+import nba_players_map
+from team_feature_store import STORE_PATH, TeamFeatureStore
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SCHEDULE_PATH = daily_update.SCHEDULE_PATH
+
+GAME_DAY_INTERVAL_S = 300   # refresh cadence while games are on the slate
+IDLE_INTERVAL_S = 3600      # off days: just watch for new models / schedule
+EASTERN = ZoneInfo("America/New_York")
+
+_stop = False
+
+
+def _handle_stop(signum, frame):
+    global _stop
+    _stop = True
+    print(f"Received signal {signum}, stopping after this cycle...")
+
+
+def _mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+
+def load_game_days(path=SCHEDULE_PATH):
+    """Set of dates (US/Eastern) that have at least one scheduled game."""
+    try:
+        df = pd.read_csv(path, usecols=["gameDateTimeEst"])
+    except (FileNotFoundError, ValueError) as e:
+        print("Could not read schedule:", e)
+        return set()
+    dates = pd.to_datetime(df["gameDateTimeEst"], errors="coerce", format="mixed").dt.date
+    return set(dates.dropna())
+
+
+class Refresher:
+    """Holds the models in memory and republishes snapshots on demand."""
+
+    def __init__(self):
+        self.team_art = None
+        self.play_art = None
+        self.team_store = None
+        self.player_projections = None
+        self.projected_teams = None
+        self.player_team_map = None
+        self.game_days = set()
+        self._mtimes = {}
+
+    # ---------- resident state ----------
+
+    def _watched(self):
+        return {
+            "team": daily_update.TEAM_MODEL_PATH,
+            "players": daily_update.PLAYER_MODEL_PATH,
+            "props": daily_player_props.PLAYER_MODEL_PATH,
+            "store": STORE_PATH,
+            "schedule": SCHEDULE_PATH,
+            "roster": nba_players_map.CACHE_FILE,
+        }
+
+    def reload_if_changed(self):
+        """Reload whatever the nightly pipeline replaced since the last cycle."""
+        current = {k: _mtime(p) for k, p in self._watched().items()}
+        changed = {k for k, m in current.items() if m != self._mtimes.get(k)}
+        if not changed:
+            return changed
+
+        if changed & {"team", "players"}:
+            print("Loading Team and Player brains...")
+            artifacts = daily_update.load_artifacts()
+            if artifacts is not None:
+                self.team_art, self.play_art = artifacts
+                self.projected_teams = None  # re-project with the new model
+        if "store" in changed:
+            # the slate's team features come from here (memoized per team until the next sync)
+            self.team_store = TeamFeatureStore.load()
+        if "props" in changed:
+            daily_player_props.reload_player_model()
+        if "schedule" in changed:
+            self.game_days = load_game_days()
+        if "roster" in changed:
+            self.player_team_map = nba_players_map.build_player_team_map()
+            self.projected_teams = None  # players may have moved teams
+            # a missing map is fetched and cached by the build: don't reload that next cycle
+            current["roster"] = _mtime(self._watched()["roster"])
+
+        self._mtimes = current
+        return changed
+
+    def is_game_day(self, now=None):
+        now = now or datetime.now(EASTERN)
+        return now.date() in self.game_days
+
+    # ---------- one refresh cycle ----------
+
+    def refresh(self):
+        t0 = time.perf_counter()
+        self.reload_if_changed()
+        if self.team_art is None:
+            print("Models not available yet; skipping cycle.")
+            return False
+
+        games = daily_update.fetch_games()
+        if games is not None:
+            daily_update.predict_games(games, self.team_art, self.team_store)
+            # projections depend on the model and on who plays today, not on the
+            # odds: rewritten only when one of those changed
+            team_ids = daily_update.todays_team_ids(games)
+            projections = None
+            if team_ids != self.projected_teams:
+                self.player_projections = daily_update.project_players(self.play_art, team_ids, self.player_team_map)
+                self.projected_teams = team_ids
+                projections = self.player_projections
+            daily_update.publish(games, projections)
+
+        props = daily_player_props.fetch_player_props(self.player_team_map)
+        daily_player_props.write_snapshot(props)
+
+        print(
+            f"[{datetime.now():%H:%M:%S}] refreshed {len(games or [])} games, "
+            f"{len(props)} props in {time.perf_counter() - t0:.2f}s"
+        )
+        return True
+
+
+def run(interval=GAME_DAY_INTERVAL_S, idle_interval=IDLE_INTERVAL_S, once=False):
+    signal.signal(signal.SIGTERM, _handle_stop)
+    signal.signal(signal.SIGINT, _handle_stop)
+
+    refresher = Refresher()
+    while not _stop:
+        try:
+            refresher.refresh()
+        except Exception as e:
+            # keep the daemon alive through API hiccups; the next cycle retries
+            print("Refresh cycle failed:", e)
+        if once:
+            break
+
+        wait = interval if refresher.is_game_day() else idle_interval
+        deadline = time.monotonic() + wait
+        while not _stop and time.monotonic() < deadline:
+            time.sleep(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Intraday odds/projection refresher")
+    parser.add_argument("--interval", type=int, default=GAME_DAY_INTERVAL_S,
+                        help="seconds between refreshes on game days")
+    parser.add_argument("--idle-interval", type=int, default=IDLE_INTERVAL_S,
+                        help="seconds between checks on days without games")
+    parser.add_argument("--once", action="store_true", help="run a single cycle and exit")
+    args = parser.parse_args()
+    run(args.interval, args.idle_interval, args.once)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,16 +5,22 @@ import shutil
 import zipfile
 from pathlib import Path
 
+import pipeline_metrics
+
 DATASET = "eoinamoore/historical-nba-data-and-player-box-scores"
 
 BASE_DIR = Path(__file__).resolve().parent
 TMP_DIR = BASE_DIR / "tmp_kaggle"
 BOX_DIR = BASE_DIR / "data" / "box_scores"
 
+metrics = pipeline_metrics.start_stage("run_openbet_all", orchestrator=True)
+
 
 def run_cmd(cmd_list, cwd=None):
     print(f"\n=== Running: {' '.join(cmd_list)} ===")
-    result = subprocess.run(cmd_list, cwd=cwd)
+    # stage scripts inherit OPENBET_RUN_ID, so they append to the same report
+    with metrics.step(" ".join(Path(c).name for c in cmd_list)):
+        result = subprocess.run(cmd_list, cwd=cwd)
     if result.returncode != 0:
         print(f"Command failed: {' '.join(cmd_list)}")
         sys.exit(result.returncode)
@@ -88,7 +94,9 @@ def main():
     run_cmd([sys.executable, "daily_player_props.py"])
 
     cleanup_temp()
+    metrics.finish()
     print("\n✅ OpenBet pipeline complete.")
+    print(f"Run report: {pipeline_metrics.report_path(metrics.run_id)}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,88 @@
+# schema.py
+# Compact dtypes for every training DataFrame, applied right after loading:
+#   - IDs (*Id)  -> int32 (ids.normalize_ids)
+#   - flags      -> int8 (float32 when a flag column has blanks)
+#   - stats      -> float32
+#   - labels / names / cities -> category
+#   - dates      -> tz-aware UTC datetime. gameDateTimeEst is US/Eastern wall
+#                   time, so it ends up as Eastern wall time labelled UTC;
+#                   schedule_time() puts Odds API tip-offs on the same clock
+# apply_schema() prints the frame's memory before and after, and records it on
+# the stage's run report when given a pipeline_metrics stage.
+
+import numpy as np
+import pandas as pd
+
+from ids import normalize_ids
+
+ID_COLUMNS = [
+    "gameId", "teamId", "opponentTeamId", "homeTeamId", "awayTeamId",
+    "hometeamId", "awayteamId", "personId", "playerteamId", "opponentteamId", "winner",
+]
+DATE_COLUMNS = ["gameDateTimeEst", "gameDateEst", "gameDateTimeUTC", "gameDate"]
+FLAG_COLUMNS = ["home", "win"]
+SCHEDULE_TZ = "America/New_York"
+CATEGORY_COLUMNS = [
+    "gameLabel", "gameSubLabel", "gameType", "gameSubtype", "gameDay", "seriesText", "arenaName", "arenaCity", "arenaState",
+    "teamCity", "teamName", "opponentTeamCity", "opponentTeamName",
+    "hometeamCity", "hometeamName", "awayteamCity", "awayteamName",
+    "homeTeamName", "awayTeamName", "homeTeamCity", "awayTeamCity",
+    "playerteamCity", "playerteamName", "opponentteamCity", "opponentteamName",
+    "firstName", "lastName",
+]
+
+
+def schedule_time(values):
+    """
+    Odds API commence_time (true UTC) -> US/Eastern wall time labelled UTC,
+    the convention gameDateTimeEst is loaded with. Rest days are differences
+    against box-score dates, so both sides must be on the same clock.
+    """
+    times = pd.to_datetime(values, utc=True, errors="coerce", format="ISO8601")
+    if times is None or times is pd.NaT:
+        return pd.NaT
+    return times.tz_convert(SCHEDULE_TZ).tz_localize(None).tz_localize("UTC")
+
+
+def frame_mb(df):
+    return df.memory_usage(deep=True).sum() / 1e6
+
+
+def _flag(series):
+    values = pd.to_numeric(series, errors="coerce")
+    if values.isna().any():
+        return values.astype(np.float32)
+    return values.astype(np.int8)
+
+
+def apply_schema(df, name="frame", metrics=None, verbose=True):
+    """Convert df's columns to the compact dtypes above (in place, returns df)."""
+    before = frame_mb(df)
+
+    for col in df.columns:
+        if col in ID_COLUMNS or col.endswith("Id"):
+            df[col] = normalize_ids(df[col])
+        elif col in DATE_COLUMNS:
+            if not isinstance(df[col].dtype, pd.DatetimeTZDtype):
+                df[col] = pd.to_datetime(df[col], utc=True, format="mixed", errors="coerce")
+        elif col in FLAG_COLUMNS:
+            df[col] = _flag(df[col])
+        elif col in CATEGORY_COLUMNS:
+            df[col] = df[col].astype("category")
+        elif pd.api.types.is_float_dtype(df[col].dtype) or (
+            pd.api.types.is_integer_dtype(df[col].dtype) and not pd.api.types.is_bool_dtype(df[col].dtype)
+        ):
+            df[col] = df[col].astype(np.float32)
+
+    after = frame_mb(df)
+    if verbose:
+        print(f"[schema] {name}: {len(df)} rows, {before:.1f} MB -> {after:.1f} MB")
+    if metrics is not None:
+        metrics.note(f"memory_{name}", {"rows": len(df), "before_mb": round(before, 2), "after_mb": round(after, 2)})
+    return df
+
+
+def read_csv(path, name=None, metrics=None, **kwargs):
+    """pd.read_csv + apply_schema."""
+    df = pd.read_csv(path, low_memory=False, **kwargs)
+    return apply_schema(df, name or str(path).rsplit("/", 1)[-1], metrics=metrics)
@@ -0,0 +1,245 @@
+# slate_benchmark.py
+# Per-item vs batched inference for a full slate.
+#
+# Team games (daily_update.predict_games): the per-game path is the way
+# predict_games used to work - two feature dicts, two one-row DataFrames and
+# two predict calls per game. The batched path builds the home and away rows
+# of every game as one matrix and predicts once.
+#
+# Player props (daily_player_props.predict_props): the per-outcome path
+# predicts one row for every Over / Under of every book and market. The
+# batched path predicts each distinct (player, market) once, one call per
+# market model, and reuses them across refreshes (memo).
+#
+# Prop sides (daily_player_props.map_player_to_side): the linear path
+# normalizes both team names and, on an exact-name miss, scans the whole
+# player-team map for every outcome. The indexed path (PlayerTeamIndex) looks
+# names up once per (player, matchup).
+#
+# All of them run on the saved models / map; the benchmark checks the two
+# paths produce the same output before timing them.
+#
+#   python slate_benchmark.py          *a full 15-game slate
+#   python slate_benchmark.py 5        *a 5-game slate
+#   python slate_benchmark.py props    *prop predictions for a synthetic 10-game, 8-book odds slate
+#   python slate_benchmark.py sides    *HOME / AWAY for the same slate over the cached roster map
+
+import copy
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+import daily_player_props
+import daily_update
+from artifacts import load_artifact
+from bench import best_ms, print_report
+from ids import TEAM_IDS
+from nba_players_map import PlayerTeamIndex, build_player_team_map, normalize_player_name, normalize_team_name
+from schema import schedule_time
+from team_feature_store import TeamFeatureStore
+from tree_predictor import serving_model
+
+REPEATS = 50
+
+
+def predict_games_per_game(games, team_art, store):
+    """Reference: one feature dict / DataFrame / predict per side of each game."""
+    t_features = team_art["feature_cols"]
+    t_model = serving_model(team_art)
+    for game in games:
+        h_id, a_id = TEAM_IDS.get(game.get("home_team")), TEAM_IDS.get(game.get("away_team"))
+        if not (h_id in store and a_id in store):
+            continue
+        game_date = schedule_time(game.get("commence_time"))
+        game_date = None if pd.isna(game_date) else game_date
+        feat_home = pd.DataFrame([store.matchup(h_id, a_id, home=1, game_date=game_date)])[t_features]
+        feat_away = pd.DataFrame([store.matchup(a_id, h_id, home=0, game_date=game_date)])[t_features]
+        pred_home = round(t_model.predict(feat_home)[0], 1)
+        pred_away = round(t_model.predict(feat_away)[0], 1)
+        winner = game["home_team"] if pred_home > pred_away else game["away_team"]
+        game["openbet_prediction"] = {
+            "predicted_home_score": pred_home,
+            "predicted_away_score": pred_away,
+            "predicted_margin": round(abs(pred_home - pred_away), 1),
+            "message": f"{winner} to Win",
+        }
+    return games
+
+
+def make_slate(store, n_games, commence_time="2026-01-15T00:00:00Z"):
+    names = [name for name, tid in TEAM_IDS.items() if tid in store][: 2 * n_games]
+    return [
+        {"home_team": names[i], "away_team": names[i + 1], "commence_time": commence_time}
+        for i in range(0, len(names) - 1, 2)
+    ]
+
+
+def benchmark(team_art, store, n_games=15):
+    games = make_slate(store, n_games)
+    per_game = predict_games_per_game(copy.deepcopy(games), team_art, store)
+    # no prediction cache: time the inference itself
+    batched_art = {k: v for k, v in team_art.items() if k != "model_version"}
+    batched = daily_update.predict_games(copy.deepcopy(games), batched_art, store)
+    assert [g.get("openbet_prediction") for g in per_game] == [g.get("openbet_prediction") for g in batched]
+
+    per_game_ms = best_ms(lambda: predict_games_per_game(copy.deepcopy(games), team_art, store), REPEATS)
+    batched_ms = best_ms(lambda: daily_update.predict_games(copy.deepcopy(games), batched_art, store), REPEATS)
+    return {
+        "games": len(games),
+        "per_game_ms": round(per_game_ms, 3),
+        "batched_ms": round(batched_ms, 3),
+        "per_game_us_per_game": round(per_game_ms * 1e3 / len(games), 1),
+        "batched_us_per_game": round(batched_ms * 1e3 / len(games), 1),
+    }
+
+
+# ---------- PLAYER PROPS ----------
+
+def predict_props_per_outcome(props, artifact):
+    """Reference: a one-row predict for every prop outcome."""
+    table = artifact["latest_player_stats"]
+    cols = artifact["feature_cols"]
+    for prop in props:
+        prop["prop_prediction"] = prop["edge_vs_line"] = None
+        key, label = daily_player_props.PROP_MODELS.get(prop["market"], (None, None))
+        if key is None or prop["player"] not in table:
+            continue
+        row = table[prop["player"]]
+        X = pd.DataFrame([[row.get(c, 0.0) for c in cols]], columns=cols)
+        pred = round(float(serving_model(artifact, key).predict(X)[0]), 1)
+        prop["prop_prediction"] = {"expected_value": pred, "label": label, "model": "rf_player_prop"}
+        prop["edge_vs_line"] = round(pred - float(prop["line"]), 1)
+    return props
+
+
+def make_prop_slate(players, n_games=10, n_books=8, per_team=8, seed=0):
+    """Odds-API-shaped prop rows: every player's Over / Under for every book and market."""
+    rng = np.random.default_rng(seed)
+    events = []
+    for g in range(n_games):
+        roster = [players[(g * 2 * per_team + i) % len(players)] for i in range(2 * per_team)]
+        books = []
+        for b in range(n_books):
+            markets = [
+                {"key": market, "outcomes": [
+                    {"name": side, "description": name, "point": float(rng.integers(2, 30)) + 0.5, "price": -110}
+                    for name in roster for side in ("Over", "Under")
+                ]}
+                for market in daily_player_props.MARKETS
+            ]
+            books.append({"key": f"book{b}", "title": f"Book {b}", "markets": markets})
+        events.append(({"id": f"event{g}", "home_team": "Home", "away_team": "Away"}, {"bookmakers": books}))
+    props = []
+    for ev, odds in events:
+        props.extend(daily_player_props.build_event_props(ev, odds, {}))
+    return props
+
+
+def benchmark_props(artifact, n_games=10, n_books=8):
+    props = make_prop_slate(list(artifact["latest_player_stats"]), n_games, n_books)
+    expected = predict_props_per_outcome(copy.deepcopy(props), artifact)
+    assert daily_player_props.predict_props(copy.deepcopy(props), artifact, memo={}) == expected
+
+    memo = {}
+    daily_player_props.predict_props(copy.deepcopy(props), artifact, memo)
+    return {
+        "props": len(props),
+        "players": len({p["player"] for p in props}),
+        "per_outcome_ms": round(best_ms(lambda: predict_props_per_outcome(copy.deepcopy(props), artifact), 1), 1),
+        "batched_ms": round(best_ms(lambda: daily_player_props.predict_props(copy.deepcopy(props), artifact, {}), 5), 1),
+        "memoized_ms": round(best_ms(lambda: daily_player_props.predict_props(copy.deepcopy(props), artifact, memo), 5), 1),
+    }
+
+
+# ---------- PROP SIDES ----------
+
+def map_player_to_side_linear(player_name, home_team, away_team, player_team_map):
+    """Reference: the per-outcome lookup with a full last-name scan."""
+    if not player_name:
+        return "UNKNOWN"
+    norm_name = normalize_player_name(player_name)
+    home_norm = normalize_team_name(home_team)
+    away_norm = normalize_team_name(away_team)
+
+    player_team_norm = player_team_map.get(norm_name)
+    if player_team_norm:
+        if player_team_norm in home_norm or home_norm in player_team_norm:
+            return "HOME"
+        if player_team_norm in away_norm or away_norm in player_team_norm:
+            return "AWAY"
+
+    norm_parts = norm_name.split()
+    if len(norm_parts) > 1:
+        last_name = norm_parts[-1]
+        for roster_name, roster_team in player_team_map.items():
+            roster_parts = roster_name.split()
+            if len(roster_parts) > 1 and roster_parts[-1] == last_name:
+                if roster_team in home_norm or home_norm in roster_team:
+                    return "HOME"
+                if roster_team in away_norm or away_norm in roster_team:
+                    return "AWAY"
+    return "UNKNOWN"
+
+
+def sides_linear(props, player_team_map):
+    return [map_player_to_side_linear(p["player"], p["home_team"], p["away_team"], player_team_map) for p in props]
+
+
+def sides_indexed(props, player_team_map):
+    index = PlayerTeamIndex(player_team_map)
+    return [index.side(p["player"], p["home_team"], p["away_team"]) for p in props]
+
+
+def make_side_slate(player_team_map, n_games=10, n_books=8):
+    """make_prop_slate() over real roster names (title-cased, as books send them),
+    with a third of the names changed so they miss the exact lookup."""
+    teams = sorted(set(player_team_map.values()))
+    props = []
+    for g in range(n_games):
+        home, away = teams[(2 * g) % len(teams)], teams[(2 * g + 1) % len(teams)]
+        names = [n.title() for n, t in player_team_map.items() if t in (home, away)]
+        names = [f"X{n}" if i % 3 == 0 else n for i, n in enumerate(names)]
+        for prop in make_prop_slate(names, 1, n_books, per_team=max(1, len(names) // 2), seed=g):
+            prop.update(home_team=home.title(), away_team=away.title(), game_id=f"event{g}")
+            props.append(prop)
+    return props
+
+
+def benchmark_sides(player_team_map, n_games=10, n_books=8):
+    props = make_side_slate(player_team_map, n_games, n_books)
+    assert sides_indexed(props, player_team_map) == sides_linear(props, player_team_map)
+    return {
+        "outcomes": len(props),
+        "roster": len(player_team_map),
+        "linear_ms": round(best_ms(lambda: sides_linear(props, player_team_map), 3), 1),
+        "indexed_ms": round(best_ms(lambda: sides_indexed(props, player_team_map), 10), 1),
+    }
+
+
+def main():
+    if sys.argv[1:] == ["sides"]:
+        report = benchmark_sides(build_player_team_map())
+        print_report(report)
+        return
+
+    if sys.argv[1:] == ["props"]:
+        if daily_player_props.player_artifact is None:
+            print("Train the prop model first (player_prop_model.py)")
+            return
+        report = benchmark_props(daily_player_props.player_artifact)
+        print_report(report)
+        return
+
+    n_games = int(sys.argv[1]) if len(sys.argv) > 1 else 15
+    if not os.path.exists(daily_update.TEAM_MODEL_PATH):
+        print("Train the team model first (model_train.py)")
+        return
+    team_art = load_artifact(daily_update.TEAM_MODEL_PATH)
+    report = benchmark(team_art, TeamFeatureStore.load(), n_games)
+    print_report(report)
+
+
+if __name__ == "__main__":
+    main()
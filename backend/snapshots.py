@@ -0,0 +1,24 @@
+# snapshots.py
+# Atomic publishing of the JSON snapshots the API serves.
+
+import json
+import os
+import tempfile
+
+
+def write_json_atomic(path, payload, indent=2):
+    """
+    Write JSON to a temp file in the same directory, then os.replace() it
+    over the target. Readers (app.py) never see a half-written snapshot.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp_", suffix=".json", dir=directory)
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(payload, f, indent=indent)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -0,0 +1,159 @@
+# team_estimators.py
+# Estimator registry for the team score model.
+#
+#   gbr  GradientBoostingRegressor, the original model (single-threaded)
+#   hgb  HistGradientBoostingRegressor: histogram splits, multithreaded, and
+#        early stopping on a held-out slice of the training rows
+#
+# The backend is picked with OPENBET_TEAM_ESTIMATOR (default gbr). Every fit
+# goes through fit_and_evaluate(), which reports fit time, predict throughput
+# and MAE/RMSE/R², so runs and backends can be compared from the run reports.
+#
+#   python team_estimators.py          *benchmark every backend on the current data
+
+import copy
+import os
+import sys
+
+import numpy as np
+from sklearn.ensemble import GradientBoostingRegressor, HistGradientBoostingRegressor
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+
+from bench import best_time, print_table, timed
+
+ESTIMATOR_ENV = "OPENBET_TEAM_ESTIMATOR"
+DEFAULT_ESTIMATOR = "gbr"
+RANDOM_STATE = 42
+PREDICT_REPEATS = 3
+
+
+def _gbr():
+    return GradientBoostingRegressor(
+        loss="squared_error",
+        n_estimators=400,
+        learning_rate=0.03,
+        max_depth=3,
+        subsample=0.7,
+        random_state=RANDOM_STATE,
+    )
+
+
+def _hgb():
+    return HistGradientBoostingRegressor(
+        loss="squared_error",
+        learning_rate=0.05,
+        max_iter=1000,
+        max_leaf_nodes=8,
+        min_samples_leaf=20,
+        l2_regularization=1.0,
+        early_stopping=True,
+        validation_fraction=0.15,
+        n_iter_no_change=30,
+        random_state=RANDOM_STATE,
+    )
+
+
+ESTIMATORS = {
+    "gbr": _gbr,
+    "hgb": _hgb,
+}
+
+# Backends that can add stages to an existing fit (team_retrain.py), and the
+# parameter that sets their stage count. hgb's early stopping would cut a
+# warm start short, so it always refits.
+WARM_STARTABLE = {
+    "gbr": "n_estimators",
+}
+
+
+def estimator_name(name=None):
+    """Explicit name, else $OPENBET_TEAM_ESTIMATOR, else the default."""
+    name = (name or os.environ.get(ESTIMATOR_ENV) or DEFAULT_ESTIMATOR).lower()
+    if name not in ESTIMATORS:
+        raise ValueError(f"{ESTIMATOR_ENV} must be one of {sorted(ESTIMATORS)}, got {name!r}")
+    return name
+
+
+def make_estimator(name=None):
+    return ESTIMATORS[estimator_name(name)]()
+
+
+def time_split(X, y, train_frac=0.8):
+    """Chronological split; rows must already be sorted by date."""
+    split_idx = int(len(X) * train_frac)
+    return X.iloc[:split_idx], X.iloc[split_idx:], y.iloc[:split_idx], y.iloc[split_idx:]
+
+
+def stage_count(model):
+    for attr in ("n_iter_", "n_estimators_"):
+        if hasattr(model, attr):
+            return int(getattr(model, attr))
+    return None
+
+
+def evaluate(name, model, n_train, X_test, y_test, fit_s):
+    """Score a fitted model on the held-out rows. Returns (report, y_pred)."""
+    y_pred = model.predict(X_test)
+    best = best_time(lambda: model.predict(X_test), PREDICT_REPEATS)
+
+    report = {
+        "estimator": name,
+        "n_train": n_train,
+        "n_test": len(X_test),
+        "iterations": stage_count(model),
+        "fit_s": round(fit_s, 3),
+        "predict_rows_per_s": round(len(X_test) / best) if best > 0 else None,
+        "MAE": float(mean_absolute_error(y_test, y_pred)),
+        "RMSE": float(np.sqrt(mean_squared_error(y_test, y_pred))),
+        "R2": float(r2_score(y_test, y_pred)),
+    }
+    return report, y_pred
+
+
+def fit_and_evaluate(name, X_train, y_train, X_test, y_test):
+    """Fit one backend and score it on the held-out rows. Returns (model, report, y_pred)."""
+    name = estimator_name(name)
+    model = ESTIMATORS[name]()
+
+    _, fit_s = timed(lambda: model.fit(X_train, y_train))
+    report, y_pred = evaluate(name, model, len(X_train), X_test, y_test, fit_s)
+    return model, report, y_pred
+
+
+def warm_start_fit(name, model, X, y, extra_stages):
+    """
+    Copy of a fitted model with `extra_stages` more boosting stages fit on
+    (X, y); the existing stages are kept as they are. Returns (model, fit_s).
+    """
+    param = WARM_STARTABLE[name]
+    model = copy.deepcopy(model)
+    model.set_params(warm_start=True, **{param: stage_count(model) + extra_stages})
+
+    _, fit_s = timed(lambda: model.fit(X, y))
+
+    model.set_params(warm_start=False)
+    return model, fit_s
+
+
+def benchmark(X, y, names=None):
+    """fit_and_evaluate every backend on the same chronological split."""
+    X_train, X_test, y_train, y_test = time_split(X, y)
+    return [fit_and_evaluate(n, X_train, y_train, X_test, y_test)[1] for n in (names or ESTIMATORS)]
+
+
+def main():
+    from team_features import FEATURE_COLS, build_team_features, load_team_data
+
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    data_dir = os.path.join(base_dir, "data", "box_scores")
+    names = sys.argv[1:] or None
+
+    _, full_data = build_team_features(*load_team_data(data_dir))
+    X = full_data[FEATURE_COLS].astype(float).fillna(0.0)
+    y = full_data["teamScore"].astype(float)
+    print(f"Benchmarking on {len(X):,} team-games")
+    print_table(benchmark(X, y, names))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+# team_feature_store.py
+# Persisted per-team feature state, updated one game at a time.
+#
+# For every team the store keeps exactly what the team features need:
+#   - the last ROLLING_WINDOW values of each rolled stat (ring buffers; the
+#     L3/L5 windows are the tail of the same buffers)
+#   - sum / count of home-game margins (expanding home strength)
+#   - date and venue of the last game (rest days / fatigue)
+# Appending a game is O(1), so the nightly refresh is O(new games) however much
+# history is behind it. The one exception is home strength: training takes an
+# expanding mean over whatever the box-score CSVs still hold (the workflow
+# trims them), so every sync recomputes the home sums from the synced frame in
+# one vectorized pass instead of adding up every game since the store was
+# created. daily_update.py reads its pre-game features from here.
+
+import json
+import os
+from collections import deque
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from snapshots import write_json_atomic
+from team_features import (
+    FEATURES_TO_ROLL,
+    NS_PER_DAY,
+    POSSESSION_INPUTS,
+    ROLLING_WINDOW,
+    SHORT_WINDOWS,
+    TEAM_FEATURES,
+    fatigue_index,
+    matchup_features,
+    matchup_matrix,
+)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STORE_PATH = os.path.join(BASE_DIR, "data", "team_feature_store.json")
+
+BUFFER_COLS = FEATURES_TO_ROLL + ["net_margin"]
+BUFFER_LEN = max([ROLLING_WINDOW] + [w for _, w in SHORT_WINDOWS.values()])
+STORE_VERSION = 1
+
+
+def _nan_mean(values):
+    arr = np.asarray(values, dtype=float)
+    arr = arr[~np.isnan(arr)]
+    return float(arr.mean()) if arr.size else float("nan")
+
+
+def _to_float(x):
+    try:
+        return float(x)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+class TeamState:
+    """Running feature state for one team."""
+
+    def __init__(self, buffers=None, home_sum=0.0, home_count=0, last_date=None, last_home=None, games=0):
+        self.buffers = {
+            col: deque([_to_float(v) for v in (buffers or {}).get(col, [])], maxlen=BUFFER_LEN)
+            for col in BUFFER_COLS
+        }
+        self.home_sum = home_sum
+        self.home_count = home_count
+        self.last_date = pd.Timestamp(last_date) if last_date else None
+        self.last_home = last_home
+        self.games = games
+        self._features = None
+
+    def add_game(self, row):
+        """row: dict with the BUFFER_COLS values, `home` and `gameDateTimeEst`."""
+        for col in BUFFER_COLS:
+            self.buffers[col].append(_to_float(row.get(col)))
+        margin = _to_float(row.get("net_margin"))
+        if row.get("home") == 1 and not np.isnan(margin):
+            self.home_sum += margin
+            self.home_count += 1
+        self.last_date = pd.Timestamp(row["gameDateTimeEst"])
+        self.last_home = int(row["home"]) if pd.notna(row.get("home")) else None
+        self.games += 1
+        self._features = None
+
+    def features(self):
+        """Team-level features for this team's next game (memoized until the next add_game)."""
+        if self._features is None:
+            self._features = self._compute_features()
+        return dict(self._features)
+
+    def _compute_features(self):
+        feats = {
+            "home_strength_rating": self.home_sum / self.home_count if self.home_count else 0.0,
+        }
+        for f in FEATURES_TO_ROLL:
+            feats[f"rolling_{f}"] = _nan_mean(self.buffers[f])
+        for out_col, (src, window) in SHORT_WINDOWS.items():
+            feats[out_col] = _nan_mean(list(self.buffers[src])[-window:])
+        return feats
+
+    def fatigue(self, game_date, home):
+        """
+        fatigue_index for a game on `game_date`, from rest days and last venue.
+        `game_date` is on the box-score clock (schema.schedule_time for Odds API times).
+        """
+        if self.last_date is None:
+            rest = 3
+        else:
+            delta = pd.Timestamp(game_date) - self.last_date
+            rest = min(int(np.floor(delta.value / NS_PER_DAY)), 7)
+        prev_home = np.nan if self.last_home is None else self.last_home
+        return int(fatigue_index(np.array([rest]), np.array([prev_home]), np.array([home]))[0])
+
+    def to_dict(self):
+        return {
+            "buffers": {
+                col: [None if np.isnan(v) else v for v in buf] for col, buf in self.buffers.items()
+            },
+            "home_sum": self.home_sum,
+            "home_count": self.home_count,
+            "last_date": self.last_date.isoformat() if self.last_date is not None else None,
+            "last_home": self.last_home,
+            "games": self.games,
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(
+            buffers=d.get("buffers"),
+            home_sum=d.get("home_sum", 0.0),
+            home_count=d.get("home_count", 0),
+            last_date=d.get("last_date"),
+            last_home=d.get("last_home"),
+            games=d.get("games", 0),
+        )
+
+
+class TeamFeatureStore:
+    def __init__(self, teams=None, path=STORE_PATH):
+        self.teams = teams or {}
+        self.path = path
+
+    # ---------- persistence ----------
+
+    @classmethod
+    def load(cls, path=STORE_PATH):
+        try:
+            with open(path, "r") as f:
+                raw = json.load(f)
+        except (OSError, ValueError):
+            return cls(path=path)
+        if raw.get("version") != STORE_VERSION:
+            print("Team feature store version changed; rebuilding from scratch.")
+            return cls(path=path)
+        teams = {int(tid): TeamState.from_dict(d) for tid, d in raw.get("teams", {}).items()}
+        return cls(teams, path=path)
+
+    def save(self):
+        write_json_atomic(self.path, {
+            "version": STORE_VERSION,
+            "updated": datetime.now().isoformat(),
+            "teams": {str(tid): st.to_dict() for tid, st in sorted(self.teams.items())},
+        })
+
+    # ---------- updates ----------
+
+    def sync(self, df_stats):
+        """
+        Apply every game newer than the team's last stored game, in date order.
+        df_stats: team-game rows as returned by team_features.filter_games().
+        Returns the number of team-games applied.
+        """
+        df = df_stats.dropna(subset=["gameDateTimeEst"])
+        if df.empty:
+            return 0
+
+        last_dates = pd.Series(
+            {tid: st.last_date for tid, st in self.teams.items() if st.last_date is not None},
+            dtype="datetime64[ns, UTC]",
+        )
+        cutoff = df["teamId"].map(last_dates)
+        new = df[cutoff.isna() | (df["gameDateTimeEst"] > cutoff)]
+        if not new.empty:
+            self._apply(new)
+        self._rebase_home_strength(df_stats)
+        return len(new)
+
+    def _apply(self, new):
+        new = new.sort_values(["teamId", "gameDateTimeEst"], kind="mergesort").copy()
+        for col in POSSESSION_INPUTS:
+            if col not in new.columns:
+                new[col] = 0
+        new["possessions"] = (
+            new["fieldGoalsAttempted"].astype(float)
+            + 0.44 * new["freeThrowsAttempted"].astype(float)
+            - new["reboundsOffensive"].astype(float)
+            + new["turnovers"].astype(float)
+        )
+        new["net_margin"] = new["teamScore"].astype(float) - new["opponentScore"].astype(float)
+        for col in BUFFER_COLS:
+            if col not in new.columns:
+                new[col] = 0.0
+
+        cols = ["teamId", "home", "gameDateTimeEst"] + BUFFER_COLS
+        for row in new[cols].to_dict("records"):
+            tid = int(row["teamId"])
+            if tid not in self.teams:
+                self.teams[tid] = TeamState()
+            self.teams[tid].add_game(row)
+
+    def _rebase_home_strength(self, df_stats):
+        """Home strength over the games in df_stats only, the window the model trains on."""
+        margin = df_stats["teamScore"].astype(float) - df_stats["opponentScore"].astype(float)
+        is_home = (df_stats["home"] == 1) & margin.notna()
+        totals = margin[is_home].groupby(df_stats.loc[is_home, "teamId"].astype(int)).agg(["sum", "count"])
+        for tid, st in self.teams.items():
+            home_sum, home_count = totals.loc[tid] if tid in totals.index else (0.0, 0)
+            if (home_sum, home_count) != (st.home_sum, st.home_count):
+                st.home_sum, st.home_count = float(home_sum), int(home_count)
+                st._features = None
+
+    # ---------- serving ----------
+
+    def __contains__(self, team_id):
+        return team_id in self.teams
+
+    def team_features(self, team_id):
+        return self.teams[team_id].features()
+
+    def matchup(self, team_id, opp_id, home, game_date=None):
+        """One FEATURE_COLS row for `team_id` vs `opp_id`, fatigue included when the date is known."""
+        team, opp = self.teams[team_id], self.teams[opp_id]
+        fatigue = opp_fatigue = 0
+        if game_date is not None:
+            fatigue = team.fatigue(game_date, home)
+            opp_fatigue = opp.fatigue(game_date, 1 - home)
+        return matchup_features(
+            team.features(), opp.features(), home, fatigue=fatigue, opp_fatigue=opp_fatigue
+        )
+
+    def team_matrix(self, team_ids):
+        """TEAM_FEATURES rows for team_ids, each team's features computed once."""
+        feats = {tid: self.teams[tid].features() for tid in set(team_ids)}
+        rows = [[feats[tid][f] for f in TEAM_FEATURES] for tid in team_ids]
+        return np.array(rows, dtype=float).reshape(len(team_ids), len(TEAM_FEATURES))
+
+    def fatigues(self, team_ids, game_dates, home):
+        """
+        fatigue_index per team for a game on game_dates (box-score clock, see
+        schema.schedule_time; NaT -> fatigue 0).
+        """
+        states = [self.teams[tid] for tid in team_ids]
+        dates = pd.DatetimeIndex(game_dates)
+        known = np.array([st.last_date is not None for st in states], dtype=bool)
+        last = np.array([st.last_date.value if st.last_date is not None else 0 for st in states], dtype=np.int64)
+        prev_home = np.array([np.nan if st.last_home is None else st.last_home for st in states], dtype=float)
+        rest = np.where(known, np.minimum((dates.asi8 - last) // NS_PER_DAY, 7), 3)
+        fatigue = fatigue_index(rest, prev_home, np.asarray(home))
+        return np.where(dates.isna(), 0, fatigue)
+
+    def matchups(self, team_ids, opp_ids, home, game_dates):
+        """matchup() for many games at once, as one FEATURE_COLS matrix."""
+        home = np.asarray(home)
+        return matchup_matrix(
+            self.team_matrix(team_ids),
+            self.team_matrix(opp_ids),
+            home,
+            fatigue=self.fatigues(team_ids, game_dates, home),
+            opp_fatigue=self.fatigues(opp_ids, game_dates, 1 - home),
+        )
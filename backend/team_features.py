@@ -0,0 +1,343 @@
+# team_features.py
+# The one team feature pipeline used by model_train.py (training),
+# update_history.py (backtest), evaluation/evaluate_team_model.py and, through
+# latest_team_stats()/matchup_features(), daily_update.py (serving).
+#
+# Everything is vectorized: fatigue via np.select, home strength and the
+# L3/L5/L10 windows via segment prefix sums over the team-sorted frame
+# (windows.py), and the opponent mirror by pairing the two rows of each gameId
+# through array indexing.
+# build_team_features() caches its output on disk keyed by a hash of the
+# inputs and of every module the features come from (FEATURE_CODE), so
+# unchanged data is never re-engineered.
+
+import hashlib
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+
+import schema
+from artifacts import LatestTable
+from windows import lagged_mean, lagged_means, lagged_value, segment_starts
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(BASE_DIR, "data", "cache")
+CACHE_KEEP = 3
+# the modules build_team_features() output depends on: a change in any of
+# them invalidates the cache
+FEATURE_CODE = ("team_features.py", "windows.py", "schema.py", "ids.py")
+NS_PER_DAY = 86_400 * 10**9
+NAT_I8 = np.iinfo(np.int64).min
+
+EXCLUDED_LABELS = ["Preseason", "All-Star Game"]
+
+POSSESSION_INPUTS = ["fieldGoalsAttempted", "freeThrowsAttempted", "reboundsOffensive", "turnovers"]
+
+FEATURES_TO_ROLL = [
+    "teamScore",
+    "opponentScore",
+    "fieldGoalsPercentage",
+    "possessions",
+    "reboundsTotal",
+    "assists",
+]
+ROLLING_WINDOW = 10
+
+# output column -> (source column, window)
+SHORT_WINDOWS = {
+    "L3_teamScore": ("teamScore", 3),
+    "L3_oppScore": ("opponentScore", 3),
+    "L5_teamScore": ("teamScore", 5),
+    "L5_oppScore": ("opponentScore", 5),
+    "L5_net_margin": ("net_margin", 5),
+}
+
+# team-level features copied onto the opponent's row as opp_<name>
+MIRRORED = [
+    "fatigue_index",
+    "home_strength_rating",
+    "rolling_teamScore",
+    "rolling_opponentScore",
+    "rolling_possessions",
+    "rolling_fieldGoalsPercentage",
+    "L3_teamScore",
+    "L3_oppScore",
+    "L5_teamScore",
+    "L5_oppScore",
+    "L5_net_margin",
+]
+
+TEAM_FEATURES = [
+    "home_strength_rating",
+    "rolling_teamScore",
+    "rolling_possessions",
+    "rolling_fieldGoalsPercentage",
+    "rolling_opponentScore",
+    "L3_teamScore",
+    "L3_oppScore",
+    "L5_teamScore",
+    "L5_oppScore",
+    "L5_net_margin",
+]
+
+FEATURE_COLS = [
+    "home",
+    "fatigue_index",
+    "home_strength_rating",
+    "rolling_teamScore",
+    "rolling_possessions",
+    "rolling_fieldGoalsPercentage",
+    "rolling_opponentScore",
+    "L3_teamScore",
+    "L3_oppScore",
+    "L5_teamScore",
+    "L5_oppScore",
+    "L5_net_margin",
+    "opp_rolling_teamScore",
+    "opp_rolling_possessions",
+    "opp_rolling_opponentScore",
+    "opp_rolling_fieldGoalsPercentage",
+    "opp_L3_teamScore",
+    "opp_L3_oppScore",
+    "opp_L5_teamScore",
+    "opp_L5_oppScore",
+    "opp_L5_net_margin",
+    "opp_fatigue_index",
+    "opp_home_strength_rating",
+]
+
+
+# ---------- LOADING / FILTERING ----------
+
+def load_team_data(data_dir, metrics=None):
+    """Games.csv + TeamStatistics.csv in the compact schema (int32 IDs, UTC datetimes, ...)."""
+    df_games = schema.read_csv(os.path.join(data_dir, "Games.csv"), "Games", metrics)
+    df_stats = schema.read_csv(os.path.join(data_dir, "TeamStatistics.csv"), "TeamStatistics", metrics)
+    return df_games, df_stats
+
+
+def filter_games(df_games, df_stats):
+    """
+    Drop preseason / All-Star games and duplicates, keep only games with both
+    sides present, sorted by (teamId, gameDateTimeEst).
+    """
+    if "gameLabel" in df_games.columns and "gameId" in df_games.columns:
+        valid_ids = df_games.loc[~df_games["gameLabel"].isin(EXCLUDED_LABELS), "gameId"].unique()
+        df_stats = df_stats[df_stats["gameId"].isin(valid_ids)]
+
+    df_stats = df_stats.drop_duplicates(subset=["gameId", "teamId"], keep="first")
+    game_counts = df_stats["gameId"].value_counts()
+    df_stats = df_stats[df_stats["gameId"].isin(game_counts[game_counts == 2].index)]
+
+    return df_stats.sort_values(["teamId", "gameDateTimeEst"], kind="mergesort").reset_index(drop=True)
+
+
+# ---------- FEATURES ----------
+
+def fatigue_index(rest_days, prev_home, home):
+    """0 rested, 1 home-home back-to-back, 3 road-road, 2 mixed."""
+    return np.select(
+        [rest_days > 1, (prev_home == 1) & (home == 1), (prev_home == 0) & (home == 0)],
+        [0, 1, 3],
+        default=2,
+    )
+
+
+def add_team_features(df_stats):
+    """
+    Per team-game features computed from strictly earlier games of the same
+    team. Expects the output of filter_games() (sorted by team, date): every
+    team is one contiguous block, so all windows come from a single pass of
+    prefix sums over those blocks (see windows.py).
+    """
+    df = df_stats.copy()
+    starts = segment_starts(df["teamId"])
+
+    for col in POSSESSION_INPUTS:
+        if col not in df.columns:
+            df[col] = 0
+    df["possessions"] = (
+        df["fieldGoalsAttempted"].astype(float)
+        + 0.44 * df["freeThrowsAttempted"].astype(float)
+        - df["reboundsOffensive"].astype(float)
+        + df["turnovers"].astype(float)
+    )
+
+    # Fatigue
+    dates = df["gameDateTimeEst"]
+    date_ns = dates.dt.tz_localize(None).to_numpy(dtype="datetime64[ns]").astype(np.int64).astype(float)
+    date_ns[dates.isna().to_numpy()] = np.nan
+    prev_ns = lagged_value(date_ns, starts)
+    prev_i8 = np.where(np.isnan(prev_ns), NAT_I8, prev_ns).astype(np.int64)
+    df["prev_game_date"] = pd.Series(prev_i8.view("datetime64[ns]"), index=df.index).dt.tz_localize("UTC")
+    df["prev_home"] = lagged_value(df["home"].astype(float), starts)
+    rest = pd.Series(np.floor((date_ns - prev_ns) / NS_PER_DAY), index=df.index)
+    df["rest_days"] = rest.fillna(3).clip(upper=7)
+    df["fatigue_index"] = fatigue_index(
+        df["rest_days"].to_numpy(), df["prev_home"].to_numpy(), df["home"].to_numpy()
+    )
+
+    # Home strength: expanding mean of earlier home-game margins
+    df["point_margin"] = df["teamScore"].astype(float) - df["opponentScore"].astype(float)
+    df["home_margin_only"] = df["point_margin"].where(df["home"] == 1)
+    df["home_strength_rating"] = np.nan_to_num(lagged_mean(df["home_margin_only"], starts), nan=0.0)
+
+    # Rolling L10
+    for f in FEATURES_TO_ROLL:
+        if f not in df.columns:
+            df[f] = 0.0
+    rolling = lagged_mean(df[FEATURES_TO_ROLL], starts, ROLLING_WINDOW)
+    for i, f in enumerate(FEATURES_TO_ROLL):
+        df[f"rolling_{f}"] = rolling[:, i]
+
+    # Recent form (L3/L5), one prefix-sum pass over all source columns
+    df["net_margin"] = df["point_margin"]
+    sources = sorted({src for src, _ in SHORT_WINDOWS.values()})
+    windows = sorted({w for _, w in SHORT_WINDOWS.values()})
+    means = dict(zip(windows, lagged_means(df[sources], starts, windows)))
+    for out_col, (src, window) in SHORT_WINDOWS.items():
+        df[out_col] = means[window][:, sources.index(src)]
+
+    return df
+
+
+def add_opponent_features(df_model):
+    """
+    Attach opp_<feature> for every MIRRORED feature. Each gameId has exactly
+    two rows, so a stable argsort on gameId puts them next to each other and
+    the partner of row i is found by index instead of a merge.
+    """
+    game_ids = df_model["gameId"].to_numpy()
+    order = np.argsort(game_ids, kind="stable")
+    first, second = order[0::2], order[1::2]
+
+    partner = np.empty(len(df_model), dtype=np.int64)
+    partner[first] = second
+    partner[second] = first
+
+    team_ids = df_model["teamId"].to_numpy()
+    opp_ids = df_model["opponentTeamId"].to_numpy()
+    valid = (game_ids[partner] == game_ids) & (team_ids[partner] == opp_ids)
+
+    full = df_model.copy()
+    full["opp_teamId"] = team_ids[partner]
+    mirrored = df_model[MIRRORED].to_numpy()[partner]
+    for i, col in enumerate(MIRRORED):
+        full[f"opp_{col}"] = mirrored[:, i]
+
+    full = full[valid]
+    full = full.dropna(subset=["gameDateTimeEst"])
+    # default sort kind on the same (team, date) input order as the old merge,
+    # so ties land where they always did and trained models reproduce exactly
+    return full.sort_values("gameDateTimeEst").reset_index(drop=True)
+
+
+# ---------- CACHED ENTRY POINT ----------
+
+def _source_hash():
+    h = hashlib.sha256()
+    for name in FEATURE_CODE:
+        with open(os.path.join(BASE_DIR, name), "rb") as f:
+            h.update(name.encode())
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def input_hash(df_games, df_stats):
+    h = hashlib.sha256(_source_hash().encode())
+    for df in (df_games, df_stats):
+        h.update(",".join(map(str, df.columns)).encode())
+        h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()[:24]
+
+
+def _prune_cache():
+    files = sorted(
+        (os.path.join(CACHE_DIR, f) for f in os.listdir(CACHE_DIR) if f.startswith("team_features_")),
+        key=os.path.getmtime,
+    )
+    for old in files[:-CACHE_KEEP]:
+        os.remove(old)
+
+
+def build_team_features(df_games, df_stats, use_cache=True):
+    """
+    Returns (df_model, full_data):
+      df_model  - one row per team-game with team-level features
+      full_data - df_model joined with the opponent's features, date-sorted,
+                  ready for X = full_data[FEATURE_COLS]
+    """
+    cache_path = None
+    if use_cache:
+        cache_path = os.path.join(CACHE_DIR, f"team_features_{input_hash(df_games, df_stats)}.pkl")
+        if os.path.exists(cache_path):
+            try:
+                return joblib.load(cache_path)
+            except Exception as e:
+                print("Ignoring unreadable feature cache:", e)
+
+    df_model = add_team_features(filter_games(df_games, df_stats))
+    full_data = add_opponent_features(df_model)
+    for c in FEATURE_COLS:
+        if c not in full_data.columns:
+            full_data[c] = 0.0
+
+    if cache_path is not None:
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            joblib.dump((df_model, full_data), cache_path)
+            _prune_cache()
+        except OSError as e:
+            print("Could not write feature cache:", e)
+
+    return df_model, full_data
+
+
+# ---------- SERVING ----------
+
+def latest_team_stats(df_model):
+    """teamId -> that team's last TEAM_FEATURES values (what matchup_features reads), as a LatestTable."""
+    return LatestTable.from_frame(df_model, "teamId", TEAM_FEATURES)
+
+
+def matchup_features(team_stats, opp_stats, home, fatigue=0, opp_fatigue=0):
+    """
+    One model input row (FEATURE_COLS order) for `team` playing `opp`.
+    Fatigue defaults to 0 when the game date / previous venue is unknown.
+    """
+    row = {"home": int(home), "fatigue_index": fatigue, "opp_fatigue_index": opp_fatigue}
+    for f in TEAM_FEATURES:
+        row[f] = team_stats.get(f, 0)
+    for f in MIRRORED:
+        if f != "fatigue_index":
+            row[f"opp_{f}"] = opp_stats.get(f, 0)
+    return {c: row.get(c, 0) for c in FEATURE_COLS}
+
+
+# FEATURE_COLS positions filled from the team's / the opponent's TEAM_FEATURES vector
+_TEAM_SLOTS = [FEATURE_COLS.index(f) for f in TEAM_FEATURES]
+_OPP_SLOTS = [
+    (j, FEATURE_COLS.index(f"opp_{f}"))
+    for j, f in enumerate(TEAM_FEATURES)
+    if f in MIRRORED and f"opp_{f}" in FEATURE_COLS
+]
+
+
+def matchup_matrix(team_rows, opp_rows, home, fatigue=0, opp_fatigue=0):
+    """
+    matchup_features for many games at once: one FEATURE_COLS row per pair.
+    team_rows / opp_rows: (n, len(TEAM_FEATURES)) arrays; home / fatigue
+    scalars or length-n arrays.
+    """
+    team_rows = np.asarray(team_rows, dtype=float).reshape(-1, len(TEAM_FEATURES))
+    opp_rows = np.asarray(opp_rows, dtype=float).reshape(-1, len(TEAM_FEATURES))
+    X = np.zeros((len(team_rows), len(FEATURE_COLS)))
+    X[:, FEATURE_COLS.index("home")] = home
+    X[:, FEATURE_COLS.index("fatigue_index")] = fatigue
+    X[:, FEATURE_COLS.index("opp_fatigue_index")] = opp_fatigue
+    X[:, _TEAM_SLOTS] = team_rows
+    for j, slot in _OPP_SLOTS:
+        X[:, slot] = opp_rows[:, j]
+    return X
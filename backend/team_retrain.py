@@ -0,0 +1,120 @@
+# team_retrain.py
+# Nightly retrain policy for the team model (model_train.py).
+#
+# A full fit rebuilds every boosting stage on the whole history. Most nights
+# only a handful of games were added, so instead the previous nba_model.pkl
+# (or, on a fresh checkout such as the nightly CI job, the registry's current
+# version in data/models/) is warm-started: WARM_STAGES extra stages are fit on the most recent
+# WARM_WINDOW training rows, and the stages already in the model are kept.
+# A full fit still happens when:
+#   - OPENBET_TEAM_RETRAIN=full, or there is no usable previous model
+#     (missing, other backend / features, backend can't warm-start)
+#   - the last full fit is FULL_RETRAIN_DAYS old, or the model has MAX_STAGES
+#   - the validation gate fails: the warm-started model's holdout MAE is more
+#     than GATE_TOLERANCE worse than the previous model's on the same holdout,
+#     or more than DRIFT_TOLERANCE worse than at the last full fit (so small
+#     nightly losses can't pile up)
+# OPENBET_TEAM_RETRAIN=incremental skips the age / size checks (not the gate).
+
+import os
+from datetime import datetime
+
+import joblib
+
+import team_estimators
+
+RETRAIN_ENV = "OPENBET_TEAM_RETRAIN"
+RETRAIN_MODES = ("auto", "full", "incremental")
+FULL_RETRAIN_DAYS = 7
+WARM_STAGES = 25
+WARM_WINDOW = 600
+MAX_STAGES = 1000
+GATE_TOLERANCE = 0.01
+DRIFT_TOLERANCE = 0.02
+
+
+def retrain_mode(mode=None):
+    """Explicit mode, else $OPENBET_TEAM_RETRAIN, else auto."""
+    mode = (mode or os.environ.get(RETRAIN_ENV) or "auto").lower()
+    if mode not in RETRAIN_MODES:
+        raise ValueError(f"{RETRAIN_ENV} must be one of {list(RETRAIN_MODES)}, got {mode!r}")
+    return mode
+
+
+def load_previous(path, registry=None):
+    """The previous team artifact: the live file, else the registry's current version, else None."""
+    try:
+        return joblib.load(path)
+    except Exception:
+        pass
+    if registry is None:
+        return None
+    try:
+        return registry.load_current()
+    except Exception:
+        return None
+
+
+def full_fit_reason(prev, estimator, feature_cols, mode, now):
+    """Why tonight needs a full fit, or None when a warm start is allowed."""
+    if mode == "full":
+        return f"{RETRAIN_ENV}=full"
+    if estimator not in team_estimators.WARM_STARTABLE:
+        return f"{estimator} can't warm-start"
+    if not prev or "model" not in prev:
+        return "no previous model"
+    if prev.get("estimator", team_estimators.DEFAULT_ESTIMATOR) != estimator:
+        return "estimator changed"
+    if list(prev.get("feature_cols", [])) != list(feature_cols):
+        return "feature columns changed"
+    if mode == "incremental":
+        return None
+
+    training = prev.get("training") or {}
+    full_fit_at = training.get("full_fit_at")
+    if not full_fit_at:
+        return "previous model has no full-fit date"
+    age_days = (now - datetime.fromisoformat(full_fit_at)).days
+    if age_days >= FULL_RETRAIN_DAYS:
+        return f"last full fit {age_days} days ago"
+    if team_estimators.stage_count(prev["model"]) + WARM_STAGES > MAX_STAGES:
+        return f"model would exceed {MAX_STAGES} stages"
+    return None
+
+
+def train_team_model(estimator, X_train, y_train, X_test, y_test, prev=None, mode=None, now=None):
+    """
+    Warm-start or fully refit the team model. Returns (model, report, y_pred,
+    training) where `training` goes into the artifact for the next night.
+    """
+    mode = retrain_mode(mode)
+    now = now or datetime.now()
+    reason = full_fit_reason(prev, estimator, list(X_train.columns), mode, now)
+
+    if reason is None:
+        prev_report, _ = team_estimators.evaluate(estimator, prev["model"], len(X_train), X_test, y_test, 0.0)
+        model, fit_s = team_estimators.warm_start_fit(
+            estimator, prev["model"], X_train.iloc[-WARM_WINDOW:], y_train.iloc[-WARM_WINDOW:], WARM_STAGES
+        )
+        report, y_pred = team_estimators.evaluate(estimator, model, len(X_train), X_test, y_test, fit_s)
+
+        full_fit_mae = (prev.get("training") or {}).get("full_fit_MAE", float("inf"))
+        limit = min(prev_report["MAE"] * (1 + GATE_TOLERANCE), full_fit_mae * (1 + DRIFT_TOLERANCE))
+        if report["MAE"] <= limit:
+            print(f"Incremental retrain: +{WARM_STAGES} stages on the last {min(WARM_WINDOW, len(X_train))} rows")
+            training = dict(prev.get("training") or {}, mode="incremental", trained_at=now.isoformat())
+            report.update(mode="incremental", previous_MAE=prev_report["MAE"])
+            return model, report, y_pred, training
+
+        reason = f"validation gate (MAE {report['MAE']:.3f}, limit {limit:.3f})"
+
+    print(f"Full retrain: {reason}")
+    model, report, y_pred = team_estimators.fit_and_evaluate(estimator, X_train, y_train, X_test, y_test)
+    training = {
+        "mode": "full",
+        "full_fit_at": now.isoformat(),
+        "full_fit_MAE": report["MAE"],
+        "trained_at": now.isoformat(),
+    }
+    report.update(mode="full", reason=reason)
+    return model, report, y_pred, training
@@ -161,10 +161,28 @@ class TestPlayerProps:
                 )
                 break
 
+    def test_projections_join_on_resolved_player_id(self, client, monkeypatch, tmp_path):
+        import app as app_module
+        (tmp_path / "player_props.json").write_text(json.dumps({"props": [
+            {"player": "Alperen Şengün", "market": "player_points", "line": 20.5},
+            {"player": "Kelly Oubre Jr", "market": "player_rebounds", "line": 5.5},
+            {"player": "Nobody", "market": "player_points", "line": 9.5},
+        ]}))
+        (tmp_path / "todays_player_projections.json").write_text(json.dumps({"projections": [
+            {"player_id": "1630578", "name": "Alperen Sengun", "points": 21.0},
+            {"player_id": "1626162", "name": "Kelly Oubre Jr.", "reboundsTotal": 4.75},
+        ]}))
+        monkeypatch.setattr(app_module, "DATA_DIR", str(tmp_path))
+        monkeypatch.setattr(app_module, "BASE_DIR", str(tmp_path))
+        sengun, oubre, nobody = client.get("/api/player-props").get_json()
+        assert sengun["prop_prediction"] == {"expected_value": 21.0} and sengun["edge_vs_line"] == 0.5
+        assert oubre["edge_vs_line"] == -0.75
+        assert "prop_prediction" not in nobody
+
 
 #test arbitrage
 class TestArbitrage:
-    @patch("app.requests.get")
+    @patch("app.odds_client.get")
     def test_returns_list_when_arb_found(self, mock_get, client):
         mock_response = MagicMock()
         mock_response.raise_for_status.return_value = None
@@ -205,7 +223,7 @@ class TestArbitrage:
         data = resp.get_json()
         assert isinstance(data, list)
 
-    @patch("app.requests.get")
+    @patch("app.odds_client.get")
     def test_arb_result_fields(self, mock_get, client):
         """Arbitrage objects must expose the fields the ArbitrageTable component uses."""
         mock_response = MagicMock()
@@ -0,0 +1,58 @@
+#pytest backend/tests/test_artifacts.py -v
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from artifacts import LatestTable, load_artifact, save_artifact
+
+
+@pytest.fixture()
+def frame():
+    return pd.DataFrame({
+        "teamId": [7, 9, 7, 9, 7],
+        "rolling_teamScore": [100.0, 101.0, 102.0, 103.5, 104.25],
+        "home_strength_rating": [1.0, 2.0, np.nan, 4.0, 5.0],
+        "teamName": pd.Categorical(["A", "B", "A", "B", "A"]),
+        "unused": ["x"] * 5,
+    })
+
+
+class TestLatestTable:
+    def test_last_row_per_id_reads_like_a_dict(self, frame):
+        table = LatestTable.from_frame(frame, "teamId", ["rolling_teamScore", "home_strength_rating"], ["teamName"])
+        assert len(table) == 2 and set(table) == {7, 9}
+        assert table[7] == {"rolling_teamScore": 104.25, "home_strength_rating": 5.0, "teamName": "A"}
+        assert table[np.int32(9)]["rolling_teamScore"] == 103.5
+        assert 8 not in table and table.get(8) is None
+        assert dict(table.items())[9]["teamName"] == "B"
+        assert table.array.dtype == np.float32
+
+    def test_matrix_for_batched_callers(self, frame):
+        table = LatestTable.from_frame(frame, "teamId", ["rolling_teamScore", "home_strength_rating"])
+        np.testing.assert_array_equal(table.matrix([9, 7], ["home_strength_rating"]), [[4.0], [5.0]])
+
+    def test_string_keys_and_old_records(self):
+        table = LatestTable.from_records({"LeBron James": {"pts": 25, "ast": "n/a"}}, ["pts", "ast", "reb"])
+        row = table["LeBron James"]
+        assert row["pts"] == 25 and np.isnan(row["ast"]) and np.isnan(row["reb"])
+
+
+class TestSaveLoad:
+    def test_mmap_round_trip(self, frame, tmp_path):
+        X = frame[["rolling_teamScore"]].to_numpy()
+        model = RandomForestRegressor(n_estimators=5, random_state=0).fit(X, frame["home_strength_rating"].fillna(0))
+        table = LatestTable.from_frame(frame, "teamId", ["rolling_teamScore"])
+        path = str(tmp_path / "model.pkl")
+
+        assert save_artifact({"model": model, "latest_stats": table}, path) > 0
+        loaded = load_artifact(path)
+        assert isinstance(loaded["latest_stats"].array, np.memmap)
+        assert loaded["latest_stats"][7] == table[7]
+        np.testing.assert_array_equal(loaded["model"].predict(X), model.predict(X))
@@ -0,0 +1,37 @@
+#pytest backend/tests/test_bench.py -v
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench import best_ms, best_time, print_report, print_table, timed
+
+
+class TestTiming:
+    def test_timed_returns_the_result(self):
+        result, seconds = timed(lambda: time.sleep(0.01) or 42)
+        assert result == 42 and seconds >= 0.01
+
+    def test_best_time_is_the_fastest_call(self):
+        delays = iter([0.03, 0.01, 0.02])
+        calls = []
+        best = best_time(lambda: calls.append(time.sleep(next(delays))), repeats=3)
+        assert len(calls) == 3
+        assert 0.01 <= best < 0.02
+        assert best_ms(lambda: None, 2) < 10
+
+
+class TestReports:
+    def test_one_line_report(self, capsys):
+        print_report({"rows": 1200, "flat_ms": 0.1234, "note": None}, "nba_model.pkl model")
+        assert capsys.readouterr().out == "nba_model.pkl model: rows 1,200  flat_ms 0.123  note -\n"
+
+    def test_table_aligns_columns(self, capsys):
+        print_table([{"layout": "per_target", "fit_s": 1.5}, {"layout": "online", "fit_s": 12.25}])
+        assert capsys.readouterr().out.splitlines() == [
+            "    layout   fit_s",
+            "per_target   1.500",
+            "    online  12.250",
+        ]
@@ -0,0 +1,276 @@
+#pytest backend/tests/test_daily_player_props.py -v
+
+import copy
+import json
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+import requests
+from sklearn.ensemble import RandomForestRegressor
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import daily_player_props
+from artifacts import LatestTable
+from daily_player_props import PROP_MODELS, build_event_props, map_player_to_side, predict_props
+from nba_players_map import PlayerTeamIndex
+from odds_client import OddsResponse
+from odds_refresh_planner import RefreshPlanner
+from slate_benchmark import make_prop_slate, make_side_slate, map_player_to_side_linear, predict_props_per_outcome
+from tree_predictor import add_flat_models
+
+COLS = ["rolling_points", "rolling_reboundsTotal", "rolling_assists", "home_flag"]
+PLAYERS = [f"Player {i}" for i in range(6)]
+ROSTER = {
+    "lebron james": "los angeles lakers",
+    "jalen williams": "oklahoma city thunder",
+    "jaylin williams": "oklahoma city thunder",
+    "robert williams iii": "portland trail blazers",
+    "gary trent jr": "milwaukee bucks",
+    "jaren jackson jr": "memphis grizzlies",
+    "nikola jokic": "denver nuggets",
+}
+
+
+class CountingModel:
+    """Wraps a model and records the size of every predict batch."""
+
+    def __init__(self, model):
+        self.model = model
+        self.calls = []
+
+    def predict(self, X):
+        self.calls.append(len(X))
+        return self.model.predict(X)
+
+
+@pytest.fixture(scope="module")
+def artifact():
+    rng = np.random.default_rng(3)
+    X = pd.DataFrame(rng.normal(size=(200, len(COLS))), columns=COLS)
+    art = {"feature_cols": COLS}
+    for i, (key, _) in enumerate(PROP_MODELS.values()):
+        y = 10 + 3 * X.iloc[:, i] + rng.normal(size=200)
+        art[key] = RandomForestRegressor(n_estimators=10, random_state=42).fit(X, y)
+    art["latest_player_stats"] = LatestTable(PLAYERS, COLS, rng.normal(size=(len(PLAYERS), len(COLS))))
+    return art
+
+
+@pytest.fixture()
+def counting(artifact):
+    return {k: CountingModel(v) if k in {key for key, _ in PROP_MODELS.values()} else v for k, v in artifact.items()}
+
+
+def _props(players=PLAYERS, n_books=3):
+    return make_prop_slate(players, n_games=2, n_books=n_books, per_team=len(players) // 2)
+
+
+class TestPredictProps:
+    def test_matches_per_outcome_predictions(self, artifact):
+        props = _props()
+        expected = predict_props_per_outcome(copy.deepcopy(props), artifact)
+        assert predict_props(props, artifact, memo={}) == expected
+        assert all(p["prop_prediction"] is not None for p in props if p["market"] in PROP_MODELS)
+        assert all(p["prop_prediction"] is None for p in props if p["market"] not in PROP_MODELS)
+
+    def test_flat_models_give_same_predictions(self, artifact):
+        props = _props()
+        flat = add_flat_models(dict(artifact), pd.DataFrame(np.zeros((5, len(COLS))), columns=COLS))
+        assert predict_props(copy.deepcopy(props), flat, memo={}) == predict_props(props, artifact, memo={})
+
+    def test_one_batch_per_market_and_memoized(self, counting):
+        memo = {}
+        predict_props(_props(), counting, memo)
+        for key, _ in PROP_MODELS.values():
+            assert counting[key].calls == [len(PLAYERS)]
+
+        # next refresh: only the new player is predicted
+        predict_props(_props(PLAYERS[:2] + ["Player 0", "Nobody"]), counting, memo)
+        predict_props(_props(PLAYERS[:4]), counting, memo)
+        for key, _ in PROP_MODELS.values():
+            assert counting[key].calls == [len(PLAYERS)]
+        assert ("player_points", "Nobody") not in memo
+
+    def test_failed_predictions_are_retried_next_cycle(self, artifact):
+        class Flaky:
+            def __init__(self, model):
+                self.model, self.failures = model, 1
+
+            def predict(self, X):
+                if self.failures:
+                    self.failures -= 1
+                    raise RuntimeError("worker crashed")
+                return self.model.predict(X)
+
+        flaky = {**artifact, "points_model": Flaky(artifact["points_model"])}
+        memo = {}
+        first = predict_props(_props(), flaky, memo)
+        assert all(p["prop_prediction"] is None for p in first if p["market"] == "player_points")
+        assert not any(market == "player_points" for market, _ in memo)
+
+        again = predict_props(_props(), flaky, memo)
+        assert again == predict_props_per_outcome(_props(), artifact)
+
+    def test_edge_and_unknown_players(self, artifact):
+        ev = {"id": "e1", "home_team": "Home", "away_team": "Away"}
+        odds = {"bookmakers": [{"key": "b", "markets": [{"key": "player_points", "outcomes": [
+            {"name": "Over", "description": "Player 1", "point": 20.5},
+            {"name": "Over", "description": "Nobody", "point": 20.5},
+            {"name": "Under", "description": "Player 1", "point": None},
+        ]}]}]}
+        known, unknown, no_line = predict_props(build_event_props(ev, odds, {}), artifact, memo={})
+        expected = known["prop_prediction"]["expected_value"]
+        assert known["prop_prediction"]["label"] == "points"
+        assert known["edge_vs_line"] == round(expected - 20.5, 1)
+        assert unknown["prop_prediction"] is None and unknown["edge_vs_line"] is None
+        assert no_line["prop_prediction"]["expected_value"] == expected and no_line["edge_vs_line"] is None
+
+    def test_sportsbook_spellings_resolve_to_table_rows(self, artifact):
+        table = LatestTable(["Kelly Oubre Jr.", "Alperen Sengun"], COLS, np.ones((2, len(COLS))))
+        art = {**artifact, "latest_player_stats": table}
+        expected = predict_props_per_outcome(_props(["Kelly Oubre Jr.", "Alperen Sengun"]), art)
+        got = predict_props(_props(["Kelly Oubre Jr", "Alperen Şengün"]), art, memo={})
+        assert [p["prop_prediction"] for p in got] == [p["prop_prediction"] for p in expected]
+        assert got[0]["prop_prediction"] is not None
+
+    def test_no_model_leaves_props_unscored(self):
+        props = predict_props(_props(), None, memo={})
+        assert all(p["prop_prediction"] is None and p["edge_vs_line"] is None for p in props)
+
+    def test_reload_clears_memo(self, monkeypatch):
+        monkeypatch.setattr(daily_player_props, "player_artifact", daily_player_props.player_artifact)
+        monkeypatch.setattr(daily_player_props, "load_player_model", lambda: None)
+        daily_player_props._predictions[("player_points", "Player 0")] = 1.0
+        daily_player_props.reload_player_model()
+        assert daily_player_props._predictions == {}
+
+
+class TestMapPlayerToSide:
+    @pytest.mark.parametrize("player, home, away, side", [
+        ("LeBron James", "Los Angeles Lakers", "Denver Nuggets", "HOME"),
+        ("Nikola Jokić", "Los Angeles Lakers", "Denver Nuggets", "UNKNOWN"),
+        ("Nikola Jokic", "Los Angeles Lakers", "The Denver Nuggets", "AWAY"),
+        ("Mark Williams", "Portland Trail Blazers", "Oklahoma City Thunder", "AWAY"),  # last-name fallback
+        ("Gary Trent Jr.", "Memphis Grizzlies", "Milwaukee Bucks", "AWAY"),
+        ("Someone", "Memphis Grizzlies", "Milwaukee Bucks", "UNKNOWN"),
+        ("", "Memphis Grizzlies", "Milwaukee Bucks", "UNKNOWN"),
+        (None, "Memphis Grizzlies", "Milwaukee Bucks", "UNKNOWN"),
+    ])
+    def test_matches_linear_scan(self, player, home, away, side):
+        assert map_player_to_side_linear(player, home, away, ROSTER) == side
+        assert map_player_to_side(player, home, away, ROSTER) == side
+        assert map_player_to_side(player, home, away, PlayerTeamIndex(ROSTER)) == side
+
+    def test_full_slate_matches_linear_scan(self):
+        props = make_side_slate(ROSTER, n_games=3, n_books=2)
+        index = PlayerTeamIndex(ROSTER)
+        got = [index.side(p["player"], p["home_team"], p["away_team"]) for p in props]
+        assert got == [map_player_to_side_linear(p["player"], p["home_team"], p["away_team"], ROSTER) for p in props]
+        assert {"HOME", "AWAY"} <= set(got)
+
+    def test_resolved_once_per_player_and_matchup(self, monkeypatch):
+        index = PlayerTeamIndex(ROSTER)
+        calls = []
+        resolve = index._resolve
+        monkeypatch.setattr(index, "_resolve", lambda *args: calls.append(args) or resolve(*args))
+        ev = {"id": "e1", "home_team": "Memphis Grizzlies", "away_team": "Milwaukee Bucks"}
+        odds = {"bookmakers": [
+            {"key": book, "markets": [{"key": market, "outcomes": [
+                {"name": side, "description": name, "point": 10.5}
+                for name in ("Gary Trent Jr.", "Jaren Jackson Jr.") for side in ("Over", "Under")
+            ]} for market in ("player_points", "player_rebounds")]}
+            for book in ("b1", "b2")
+        ]}
+        props = build_event_props(ev, odds, index)
+        assert len(props) == 16 and len(calls) == 2
+        assert [p["team_side"] for p in props[:4]] == ["AWAY", "AWAY", "HOME", "HOME"]
+
+
+def _event_odds(player, point, remaining):
+    odds = {"bookmakers": [{"key": "fd", "markets": [{"key": "player_points", "outcomes": [
+        {"name": "Over", "description": player, "point": point, "price": -110},
+    ]}]}]}
+    return OddsResponse(200, json.dumps(odds), {"x-requests-remaining": str(remaining)})
+
+
+class FakeClient:
+    """Odds API stand-in: `events` for the events call, {event_id: callable} for event odds."""
+
+    def __init__(self, events, handlers):
+        self.events = events
+        self.handlers = handlers
+
+    def get(self, path, params=None, timeout=None):
+        if path == "events":
+            return OddsResponse(200, json.dumps(self.events), {"x-requests-remaining": "100"})
+        return self.handlers[path.split("/")[1]]()
+
+
+class TestFetchPlayerProps:
+    @pytest.fixture()
+    def fetch(self, monkeypatch, tmp_path):
+        tip = (datetime.now(timezone.utc) + timedelta(hours=3)).isoformat().replace("+00:00", "Z")
+        events = [{"id": f"ev{i}", "home_team": "Home", "away_team": "Away", "commence_time": tip} for i in range(1, 6)]
+        previous = tmp_path / "player_props.json"
+        previous.write_text(json.dumps({"props": [{"game_id": "ev2", "player": "Carried Over", "market": "player_points"}]}))
+        monkeypatch.setattr(daily_player_props, "OUTPUT_FILE", str(previous))
+        monkeypatch.setattr(daily_player_props, "player_artifact", None)
+        planner = RefreshPlanner(state_path=str(tmp_path / "state.json"))
+
+        def _fetch(handlers):
+            monkeypatch.setattr(daily_player_props, "get_client", lambda key: FakeClient(events, handlers))
+            return daily_player_props.fetch_player_props({}, planner), planner
+        return _fetch
+
+    def test_concurrent_results_keep_event_order_and_lowest_quota(self, fetch):
+        ev3_done = threading.Event()
+
+        def ev1():
+            ev3_done.wait(2)
+            time.sleep(0.05)  # lands after ev3, although it was sent first
+            return _event_odds("First", 10.5, remaining=99)
+
+        def ev3():
+            ev3_done.set()
+            return _event_odds("Third", 30.5, remaining=95)
+
+        props, planner = fetch({
+            "ev1": ev1,
+            "ev2": lambda: _event_odds("Second", 20.5, remaining=97),
+            "ev3": ev3,
+            "ev4": lambda: _event_odds("Fourth", 40.5, remaining=96),
+            "ev5": lambda: _event_odds("Fifth", 50.5, remaining=98),
+        })
+        assert [p["player"] for p in props] == ["First", "Second", "Third", "Fourth", "Fifth"]
+        assert planner.remaining == 95
+
+    def test_rate_limited_event_keeps_previous_props(self, fetch):
+        props, _ = fetch({
+            "ev1": lambda: _event_odds("First", 10.5, remaining=99),
+            "ev2": lambda: OddsResponse(429, "", {}),
+            "ev3": lambda: _event_odds("Third", 30.5, remaining=98),
+            "ev4": lambda: OddsResponse(204, ""),
+            "ev5": lambda: _event_odds("Fifth", 50.5, remaining=97),
+        })
+        assert [(p["game_id"], p["player"]) for p in props] == [
+            ("ev1", "First"), ("ev2", "Carried Over"), ("ev3", "Third"), ("ev5", "Fifth"),
+        ]
+
+    def test_one_failing_event_does_not_drop_the_others(self, fetch):
+        def broken():
+            raise requests.ConnectionError("connection reset")
+
+        props, _ = fetch({
+            "ev1": lambda: _event_odds("First", 10.5, remaining=99),
+            "ev2": broken,
+            "ev3": lambda: OddsResponse(200, "{not json"),
+            "ev4": lambda: OddsResponse(500, "boom"),
+            "ev5": lambda: _event_odds("Fifth", 50.5, remaining=97),
+        })
+        assert [p["player"] for p in props] == ["First", "Fifth"]
@@ -0,0 +1,160 @@
+#pytest backend/tests/test_daily_update.py -v
+
+import copy
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import GradientBoostingRegressor
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import daily_update
+from artifacts import LatestTable
+from ids import TEAM_IDS
+from player_features import FEATURE_COLS as PLAYER_FEATURES, TARGETS
+from player_models import fit_player_models, predict_targets
+from slate_benchmark import predict_games_per_game
+from team_feature_store import TeamFeatureStore, TeamState
+from team_features import FEATURE_COLS, TEAM_FEATURES, matchup_features
+from tree_predictor import add_flat_models
+
+NAMES = list(TEAM_IDS)[:8]
+TEAMS = [TEAM_IDS[n] for n in NAMES]
+
+
+def _slate(commence_time="2026-01-11T00:00:00Z"):
+    return [{"home_team": NAMES[i], "away_team": NAMES[i + 1], "commence_time": commence_time} for i in range(0, 8, 2)]
+
+
+@pytest.fixture(scope="module")
+def team_art():
+    rng = np.random.default_rng(5)
+    X = pd.DataFrame(rng.normal(size=(300, len(FEATURE_COLS))), columns=FEATURE_COLS)
+    X["home"] = rng.integers(0, 2, size=300)
+    y = 110 + 4 * X["home"] + 3 * X["rolling_teamScore"] - 3 * X["opp_rolling_teamScore"] + rng.normal(size=300)
+    model = GradientBoostingRegressor(n_estimators=30, random_state=42).fit(X, y)
+    latest = LatestTable(TEAMS, TEAM_FEATURES, rng.normal(size=(len(TEAMS), len(TEAM_FEATURES))))
+    return {"model": model, "latest_stats": latest, "feature_cols": list(FEATURE_COLS)}
+
+
+@pytest.fixture(scope="module")
+def store():
+    rng = np.random.default_rng(6)
+    day = pd.Timestamp("2026-01-10", tz="UTC")
+    teams = {}
+    for i, tid in enumerate(TEAMS):
+        state = TeamState()
+        for g in range(6):
+            row = {c: float(rng.normal(110, 8)) for c in ["teamScore", "opponentScore", "possessions"]}
+            row.update(fieldGoalsPercentage=0.47, reboundsTotal=44.0, assists=25.0,
+                       net_margin=row["teamScore"] - row["opponentScore"],
+                       home=g % 2, gameDateTimeEst=day - pd.Timedelta(days=2 * (6 - g) + i % 2))
+            state.add_game(row)
+        teams[tid] = state
+    return TeamFeatureStore(teams, path="unused.json")
+
+
+@pytest.fixture(scope="module")
+def play_art():
+    rng = np.random.default_rng(7)
+    X = pd.DataFrame(rng.normal(size=(200, len(PLAYER_FEATURES))), columns=PLAYER_FEATURES)
+    Y = pd.DataFrame({t: np.abs(5 + X.iloc[:, i] + rng.normal(size=200)) for i, t in enumerate(TARGETS)})
+    fields, _ = fit_player_models("online", X, Y)
+    # 3 players per team for the first 4 teams; player 0 was traded to team 5 (roster map)
+    n = 12
+    latest = LatestTable(
+        np.arange(100, 100 + n), PLAYER_FEATURES, rng.normal(size=(n, len(PLAYER_FEATURES))),
+        labels={
+            "firstName": [f"First{i}" for i in range(n)],
+            "lastName": [f"Last{i}" for i in range(n)],
+            "playerName": [f"First{i} Last{i}" for i in range(n)],
+            "playerteamId": [str(TEAMS[i // 3]) for i in range(n)],
+        },
+    )
+    return {**fields, "latest_stats": latest, "feature_cols": list(PLAYER_FEATURES)}
+
+
+class TestProjectPlayers:
+    def test_todays_teams_from_schedule_and_slate(self, tmp_path):
+        sched = tmp_path / "schedule.csv"
+        pd.DataFrame({
+            "gameDateTimeEst": ["2026-01-11 19:30:00", "2026-01-12 19:00:00"],
+            "homeTeamId": [TEAMS[0], TEAMS[2]],
+            "awayTeamId": [TEAMS[1], TEAMS[3]],
+        }).to_csv(sched, index=False)
+        games = [
+            {"home_team": NAMES[4], "away_team": NAMES[5], "commence_time": "2026-01-12T00:30:00Z"},  # 7:30pm ET on the 11th
+            {"home_team": NAMES[6], "away_team": NAMES[7], "commence_time": "2026-01-13T00:30:00Z"},  # tomorrow
+        ]
+        day = pd.Timestamp("2026-01-11").date()
+        assert daily_update.todays_team_ids(games, day, str(sched)) == set(TEAMS[:2]) | set(TEAMS[4:6])
+
+    def test_roster_map_overrides_last_box_score_team(self, play_art):
+        roster = {"first0 last0": "miami heat", "first1 last1": "nowhere"}
+        teams = daily_update.current_team_ids(play_art["latest_stats"], roster)
+        assert teams[0] == TEAM_IDS["Miami Heat"]
+        assert teams[1] == teams[2] == TEAMS[0]
+
+    def test_only_players_on_todays_teams_in_one_batch(self, play_art):
+        latest = play_art["latest_stats"]
+        got = daily_update.project_players(play_art, {TEAMS[0], TEAMS[3]}, {"first0 last0": "miami heat"})
+        assert [p["player_id"] for p in got] == ["101", "102", "109", "110", "111"]
+        expected = predict_targets(play_art, pd.DataFrame(latest.matrix([101]), columns=PLAYER_FEATURES))[0]
+        assert got[0]["name"] == "First1 Last1"
+        assert [got[0][t] for t in TARGETS] == [round(float(v), 2) for v in expected]
+        assert len(daily_update.project_players(play_art)) == len(latest)
+        assert daily_update.project_players(play_art, set()) == []
+
+
+class TestPredictGames:
+    def test_batched_slate_matches_per_game(self, team_art, store):
+        games = _slate()
+        games[1]["commence_time"] = None  # unknown date: no fatigue
+        games.append({"home_team": "Nowhere", "away_team": games[0]["home_team"]})
+        expected = predict_games_per_game(copy.deepcopy(games), team_art, store)
+        got = daily_update.predict_games(copy.deepcopy(games), team_art, store)
+        assert [g.get("openbet_prediction") for g in got] == [g.get("openbet_prediction") for g in expected]
+        assert "openbet_prediction" not in got[-1]
+
+    def test_flat_model_gives_same_slate(self, team_art, store):
+        games = _slate()
+        flat_art = add_flat_models(dict(team_art), pd.DataFrame(np.zeros((5, len(FEATURE_COLS))), columns=FEATURE_COLS))
+        assert "flat_model" in flat_art
+        expected = daily_update.predict_games(copy.deepcopy(games), team_art, store)
+        assert daily_update.predict_games(copy.deepcopy(games), flat_art, store) == expected
+
+    def test_evening_tipoff_rest_days_on_box_score_clock(self):
+        # both teams last played away at 8pm ET on the 9th (box scores: Eastern wall time labelled UTC);
+        # tonight's 7pm ET tip (00:00Z on the 12th) is 47h later: rest 1, as training sees it
+        last = pd.Timestamp("2026-01-09 20:00", tz="UTC")
+        teams = {}
+        for tid in TEAMS[:2]:
+            state = TeamState()
+            state.add_game({"teamScore": 100.0, "opponentScore": 98.0, "possessions": 99.0, "net_margin": 2.0,
+                            "home": 0, "gameDateTimeEst": last})
+            teams[tid] = state
+        store = TeamFeatureStore(teams, path="unused.json")
+        game = {"home_team": NAMES[0], "away_team": NAMES[1], "commence_time": "2026-01-12T00:00:00Z"}
+
+        no_latest = LatestTable([], TEAM_FEATURES, np.empty((0, len(TEAM_FEATURES))))
+        X, playable = daily_update.slate_matrix([game], store, no_latest)
+        eastern = pd.Timestamp("2026-01-11 19:00", tz="UTC")
+        expected = [teams[TEAMS[0]].fatigue(eastern, 1), teams[TEAMS[1]].fatigue(eastern, 0)]
+        assert playable == [0]
+        assert X[:, FEATURE_COLS.index("fatigue_index")].tolist() == expected == [2, 3]
+        # differenced against the raw UTC tip-off it would be 52h: rest 2, "rested"
+        assert teams[TEAMS[1]].fatigue(pd.Timestamp("2026-01-12 00:00", tz="UTC"), 0) == 0
+
+    def test_falls_back_to_latest_stats_without_store(self, team_art):
+        games = _slate()
+        got = daily_update.predict_games(copy.deepcopy(games), team_art, TeamFeatureStore(path="unused.json"))
+        latest = team_art["latest_stats"]
+        for game in got:
+            h, a = TEAM_IDS[game["home_team"]], TEAM_IDS[game["away_team"]]
+            rows = pd.DataFrame([matchup_features(latest[h], latest[a], 1), matchup_features(latest[a], latest[h], 0)])
+            pred_home, pred_away = (round(p, 1) for p in team_art["model"].predict(rows))
+            assert game["openbet_prediction"]["predicted_home_score"] == pred_home
+            assert game["openbet_prediction"]["predicted_away_score"] == pred_away
@@ -0,0 +1,76 @@
+#pytest backend/tests/test_ids.py -v
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ids import normalize_id, normalize_ids
+
+
+def _values(series):
+    return [None if pd.isna(v) else v for v in series.tolist()]
+
+
+class TestNormalizeIds:
+    def test_complete_numeric_columns_are_int32(self):
+        for raw in ([1610612737, 1610612738], [1610612737.0, 1610612738.0], ["1610612737", "1610612738.0"]):
+            out = normalize_ids(pd.Series(raw))
+            assert out.dtype == np.int32
+            assert out.tolist() == [1610612737, 1610612738]
+
+    def test_nan_becomes_na(self):
+        out = normalize_ids(pd.Series([1610612737.0, np.nan, 1610612738.0]))
+        assert out.dtype == "Int32"
+        assert _values(out) == [1610612737, None, 1610612738]
+
+    def test_inf_is_missing_not_int_min(self):
+        out = normalize_ids(pd.Series([np.inf, 22500001.0, -np.inf]))
+        assert out.dtype == "Int32"
+        assert _values(out) == [None, 22500001, None]
+        assert _values(normalize_ids(pd.Series(["inf", "22500001"]))) == [None, 22500001]
+
+    def test_non_integer_floats_do_not_change_the_dtype(self):
+        out = normalize_ids(pd.Series([1610612737.0, 1.5]))
+        assert out.dtype == "Int32"
+        assert _values(out) == [1610612737, None]
+        assert normalize_ids(pd.Series([4e9, 1.0])).dtype == "Int32"  # beyond int32 is not an ID either
+
+    def test_float_encoded_strings_with_whitespace(self):
+        out = normalize_ids(pd.Series([" 1610612737.0 ", "1610612738", "", None, "  "]))
+        assert out.dtype == "Int32"
+        assert _values(out) == [1610612737, 1610612738, None, None, None]
+
+    def test_non_numeric_ids_keep_the_string_form(self):
+        out = normalize_ids(pd.Series([" abc ", "12.0", None]))
+        assert out.tolist() == ["abc", "12", ""]
+
+
+class TestNormalizeId:
+    @pytest.mark.parametrize("raw, expected", [
+        (1610612737, 1610612737),
+        (1610612737.0, 1610612737),
+        (" 1610612737.0 ", 1610612737),
+        (np.int64(22500001), 22500001),
+        (np.nan, None),
+        (np.inf, None),
+        ("-inf", None),
+        (1.5, None),
+        ("", None),
+        (None, None),
+        (" abc ", "abc"),
+    ])
+    def test_scalar_forms(self, raw, expected):
+        assert normalize_id(raw) == expected
+
+    @pytest.mark.parametrize("raw", [
+        [1610612737.0, np.nan, np.inf, 1.5, -np.inf],
+        [" 1610612737.0 ", "22500001", "", "inf", "nan"],
+        [1610612737, 22500001],
+    ])
+    def test_agrees_with_normalize_ids(self, raw):
+        assert [normalize_id(x) for x in raw] == _values(normalize_ids(pd.Series(raw)))
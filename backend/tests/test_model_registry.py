@@ -0,0 +1,94 @@
+#pytest backend/tests/test_model_registry.py -v
+
+import sys
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import model_registry
+from model_registry import ModelRegistry, PredictionCache, fingerprint
+
+
+@pytest.fixture()
+def frame():
+    return pd.DataFrame({"a": [1.0, 2.0, 3.0], "b": [4.0, 5.0, 6.0]})
+
+
+@pytest.fixture()
+def registry(tmp_path):
+    return ModelRegistry("team", root=str(tmp_path / "models"), live_path=str(tmp_path / "nba_model.pkl"))
+
+
+class TestFingerprint:
+    def test_same_inputs_same_version(self, frame):
+        v = fingerprint(data=(frame, np.arange(3)), code=("team_estimators.py",), params={"estimator": "gbr"})
+        assert v == fingerprint(data=(frame.copy(), np.arange(3)), code=("team_estimators.py",), params={"estimator": "gbr"})
+        assert len(v) == 16
+
+    def test_data_code_and_params_all_count(self, frame):
+        base = fingerprint(data=(frame,), code=("team_estimators.py",), params={"estimator": "gbr"})
+        changed = frame.copy()
+        changed.loc[2, "b"] = 6.5
+        assert fingerprint(data=(changed,), code=("team_estimators.py",), params={"estimator": "gbr"}) != base
+        assert fingerprint(data=(frame,), code=("team_retrain.py",), params={"estimator": "gbr"}) != base
+        assert fingerprint(data=(frame,), code=("team_estimators.py",), params={"estimator": "hgb"}) != base
+
+
+class TestModelRegistry:
+    def test_register_publishes_and_records(self, registry, tmp_path):
+        registry.register("v1", {"model": "m1"}, scores={"MAE": 10.4}, timing={"fit": 1.9})
+        assert registry.has("v1") and registry.current == "v1"
+        assert joblib.load(registry.live_path) == {"model": "m1", "model_version": "v1"}
+
+        reopened = ModelRegistry("team", root=str(tmp_path / "models"), live_path=registry.live_path)
+        assert reopened.current == "v1"
+        assert reopened.versions["v1"]["scores"] == {"MAE": 10.4}
+        assert not reopened.has("v2")
+
+    def test_rollback_and_promote(self, registry):
+        registry.register("v1", {"model": "m1"})
+        registry.register("v2", {"model": "m2"})
+        assert registry.rollback() == "v1"
+        assert joblib.load(registry.live_path)["model"] == "m1"
+        registry.promote("v2")
+        assert joblib.load(registry.live_path)["model"] == "m2"
+        with pytest.raises(KeyError):
+            registry.promote("nope")
+
+    def test_keeps_only_recent_versions(self, registry, monkeypatch):
+        monkeypatch.setattr(model_registry, "KEEP_VERSIONS", 2)
+        for i in range(4):
+            registry.register(f"v{i}", {"model": i})
+            registry.versions[f"v{i}"]["created_at"] = f"2026-01-0{i + 1}"
+        assert sorted(registry.versions) == ["v2", "v3"]
+        assert not Path(registry.artifact_path("v0")).exists()
+
+
+class TestPredictionCache:
+    def test_cached_per_version_and_input(self, frame):
+        cache = PredictionCache(size=2)
+        calls = []
+
+        def predict(X):
+            calls.append(len(X))
+            return np.asarray(X)[:, 0] * 2
+
+        art = {"model_version": "v1"}
+        first = cache.predict(art, "model", frame, predict)
+        first[0] = -1  # callers get a copy
+        np.testing.assert_array_equal(cache.predict(art, "model", frame, predict), [2.0, 4.0, 6.0])
+        assert len(calls) == 1 and cache.hits == 1
+
+        cache.predict({"model_version": "v2"}, "model", frame, predict)
+        cache.predict(art, "model", frame.iloc[:1], predict)
+        assert len(calls) == 3 and len(cache.entries) == 2
+
+        # unregistered artifacts are never cached
+        cache.predict({}, "model", frame, predict)
+        cache.predict({}, "model", frame, predict)
+        assert len(calls) == 5
@@ -0,0 +1,130 @@
+#pytest backend/tests/test_odds_client.py -v
+
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from odds_client import OddsApiClient, request_key
+from odds_refresh_planner import RefreshPlanner
+
+
+def _raw(status, text="[]", headers=None):
+    r = MagicMock()
+    r.status_code = status
+    r.text = text
+    r.headers = headers or {}
+    return r
+
+
+@pytest.fixture()
+def make_client(tmp_path):
+    def _make(mode="live", **kwargs):
+        return OddsApiClient(
+            api_key="test-key",
+            mode=mode,
+            cache_dir=str(tmp_path / "cache"),
+            recordings_dir=str(tmp_path / "recordings"),
+            **kwargs,
+        )
+    return _make
+
+
+# retries / backoff
+class TestRetries:
+    @patch("odds_client.time.sleep")
+    def test_retries_on_429_then_succeeds(self, mock_sleep, make_client):
+        client = make_client(cache_ttl=0)
+        client.session.get = MagicMock(side_effect=[_raw(429), _raw(503), _raw(200, '[{"id": "a"}]')])
+        resp = client.get("events")
+        assert resp.status_code == 200
+        assert resp.json() == [{"id": "a"}]
+        assert client.stats["retries"] == 2
+        assert mock_sleep.call_count == 2
+
+    @patch("odds_client.time.sleep")
+    def test_honours_retry_after(self, mock_sleep, make_client):
+        client = make_client(cache_ttl=0)
+        client.session.get = MagicMock(side_effect=[_raw(429, headers={"Retry-After": "3"}), _raw(200)])
+        client.get("events")
+        mock_sleep.assert_called_once_with(3.0)
+
+    @patch("odds_client.time.sleep")
+    def test_gives_up_after_max_retries(self, mock_sleep, make_client):
+        client = make_client(cache_ttl=0, max_retries=2)
+        client.session.get = MagicMock(return_value=_raw(500))
+        resp = client.get("events")
+        assert resp.status_code == 500
+        assert client.session.get.call_count == 3
+        with pytest.raises(requests.HTTPError):
+            resp.raise_for_status()
+
+    def test_client_errors_are_not_retried(self, make_client):
+        client = make_client(cache_ttl=0)
+        client.session.get = MagicMock(return_value=_raw(422))
+        assert client.get("events/x/odds").status_code == 422
+        assert client.session.get.call_count == 1
+
+    def test_api_key_is_sent_but_not_part_of_key(self, make_client):
+        client = make_client(cache_ttl=0)
+        client.session.get = MagicMock(return_value=_raw(200))
+        client.get("odds", params={"markets": "h2h"})
+        _, kwargs = client.session.get.call_args
+        assert kwargs["params"]["apiKey"] == "test-key"
+        assert request_key("odds", {"markets": "h2h", "apiKey": "a"}) == request_key("odds", {"markets": "h2h"})
+
+
+# disk cache + record / replay
+class TestCacheAndReplay:
+    def test_second_call_served_from_cache(self, make_client):
+        client = make_client(cache_ttl=60)
+        client.session.get = MagicMock(return_value=_raw(200, '{"ok": 1}', {"x-requests-remaining": "10"}))
+        first = client.get("odds", params={"markets": "h2h"})
+        second = client.get("odds", params={"markets": "h2h"})
+        assert client.session.get.call_count == 1
+        assert second.from_cache and not first.from_cache
+        assert second.json() == {"ok": 1}
+        assert first.headers["X-Requests-Remaining"] == "10"
+        assert "x-requests-remaining" not in second.headers
+
+    def test_cache_hits_do_not_rewind_the_quota(self, make_client, tmp_path):
+        client = make_client(cache_ttl=60)
+        client.session.get = MagicMock(side_effect=[
+            _raw(200, "[]", {"x-requests-remaining": "100", "x-requests-used": "400"}),
+            _raw(200, "[]", {"x-requests-remaining": "90", "x-requests-used": "410"}),
+        ])
+        planner = RefreshPlanner(state_path=str(tmp_path / "state.json"))
+        planner.record_quota(client.get("events").headers)
+        planner.record_quota(client.get("events/ev1/odds").headers)
+        planner.record_quota(client.get("events").headers)  # cached, fetched at 100 remaining
+        assert planner.remaining == 90
+
+    def test_errors_are_not_cached(self, make_client):
+        client = make_client(cache_ttl=60)
+        client.session.get = MagicMock(return_value=_raw(422))
+        client.get("odds")
+        client.get("odds")
+        assert client.session.get.call_count == 2
+
+    def test_replay_serves_recording_offline(self, make_client):
+        recorder = make_client(mode="record", cache_ttl=0)
+        recorder.session.get = MagicMock(return_value=_raw(200, '[{"id": "ev1"}]', {"x-requests-remaining": "7"}))
+        recorder.get("events")
+
+        replayer = make_client(mode="replay")
+        replayer.session.get = MagicMock(side_effect=AssertionError("network used in replay"))
+        replayed = replayer.get("events")
+        assert replayed.json() == [{"id": "ev1"}]
+        assert replayed.from_cache and "x-requests-remaining" not in replayed.headers
+
+    def test_replay_missing_recording_raises(self, make_client):
+        with pytest.raises(requests.ConnectionError):
+            make_client(mode="replay").get("events")
+
+    def test_rejects_unknown_mode(self, make_client):
+        with pytest.raises(ValueError):
+            make_client(mode="bogus")
@@ -0,0 +1,124 @@
+#pytest backend/tests/test_odds_refresh_planner.py -v
+
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from odds_refresh_planner import RefreshPlanner, consensus_lines, line_movement
+
+
+NOW = datetime(2026, 1, 15, 18, 0, tzinfo=timezone.utc)
+
+
+def _event(event_id, hours_from_now):
+    return {
+        "id": event_id,
+        "commence_time": (NOW + timedelta(hours=hours_from_now)).isoformat().replace("+00:00", "Z"),
+    }
+
+
+def _odds(point, price=-110):
+    return {
+        "bookmakers": [
+            {"key": "fd", "markets": [{"key": "player_points", "outcomes": [
+                {"name": "Over", "description": "Jayson Tatum", "point": point, "price": price},
+            ]}]},
+        ]
+    }
+
+
+@pytest.fixture()
+def planner(tmp_path):
+    return RefreshPlanner(state_path=str(tmp_path / "state.json"))
+
+
+# event planning
+class TestPlan:
+    def test_started_games_are_skipped(self, planner):
+        to_fetch, skipped = planner.plan([_event("live", -1), _event("later", 3)], now=NOW)
+        assert to_fetch == ["later"]
+        assert skipped == {"live": "started"}
+
+    def test_closest_tipoff_comes_first(self, planner):
+        events = [_event("far", 30), _event("soon", 0.5), _event("mid", 5)]
+        to_fetch, _ = planner.plan(events, now=NOW)
+        assert to_fetch == ["soon", "mid", "far"]
+
+    def test_recently_fetched_event_is_fresh(self, planner):
+        planner.record_event_odds("ev", _event("ev", 10)["commence_time"], _odds(25.5), now=NOW)
+        to_fetch, skipped = planner.plan([_event("ev", 10)], now=NOW + timedelta(minutes=30))
+        assert to_fetch == []
+        assert skipped == {"ev": "fresh"}
+
+    def test_refreshes_once_interval_elapsed(self, planner):
+        planner.record_event_odds("ev", _event("ev", 10)["commence_time"], _odds(25.5), now=NOW)
+        to_fetch, _ = planner.plan([_event("ev", 10)], now=NOW + timedelta(minutes=61))
+        assert to_fetch == ["ev"]
+
+    def test_moving_lines_refresh_sooner(self, planner):
+        tip = _event("ev", 10)["commence_time"]
+        planner.record_event_odds("ev", tip, _odds(25.5), now=NOW - timedelta(hours=2))
+        planner.record_event_odds("ev", tip, _odds(27.5), now=NOW)
+        to_fetch, _ = planner.plan([_event("ev", 10)], now=NOW + timedelta(minutes=35))
+        assert to_fetch == ["ev"]
+
+    def test_quota_caps_the_plan(self, planner):
+        planner.record_quota({"x-requests-remaining": "60", "x-requests-used": "440"})
+        events = [_event(f"ev{i}", i + 1) for i in range(5)]
+        to_fetch, skipped = planner.plan(events, now=NOW, cost_per_event=5)
+        # 60 remaining - 50 reserve = 2 calls at 5 credits
+        assert to_fetch == ["ev0", "ev1"]
+        assert {skipped[e] for e in ["ev2", "ev3", "ev4"]} == {"quota"}
+
+    def test_late_responses_do_not_raise_the_balance(self, planner, tmp_path):
+        # sent in order 99, 98, 97 but completed 97, 99, 98
+        for remaining in ("97", "99", "98"):
+            planner.record_quota({"x-requests-remaining": remaining})
+        assert planner.remaining == 97
+
+        # the next run (new planner) accepts a higher balance, e.g. after the monthly reset
+        planner.save()
+        next_run = RefreshPlanner.load(state_path=str(tmp_path / "state.json"))
+        next_run.record_quota({"x-requests-remaining": "500"})
+        assert next_run.remaining == 500
+
+    def test_unknown_quota_does_not_limit(self, planner):
+        to_fetch, _ = planner.plan([_event(f"ev{i}", i + 1) for i in range(20)], now=NOW)
+        assert len(to_fetch) == 20
+
+
+# line movement + persistence
+class TestLinesAndState:
+    def test_consensus_uses_median_across_books(self):
+        data = {"bookmakers": [
+            {"markets": [{"key": "player_points", "outcomes": [
+                {"name": "Over", "description": "A", "point": p, "price": -110}]}]}
+            for p in (24.5, 25.5, 26.5)
+        ]}
+        assert consensus_lines(data) == {"player_points|A|Over": [25.5, -110.0]}
+
+    def test_line_movement_share(self):
+        prev = {"a": [1.0, -110.0], "b": [2.0, -110.0]}
+        cur = {"a": [1.5, -110.0], "b": [2.0, -112.0], "c": [3.0, -110.0]}
+        assert line_movement(prev, cur) == 0.5
+        assert line_movement({}, cur) is None
+
+    def test_state_round_trip(self, planner):
+        planner.record_quota({"x-requests-remaining": "123"})
+        tip = (datetime.now(timezone.utc) + timedelta(hours=5)).isoformat()
+        planner.record_event_odds("ev", tip, _odds(20.5))
+        planner.save()
+        loaded = RefreshPlanner.load(planner.state_path)
+        assert loaded.remaining == 123
+        assert "ev" in loaded.state["events"]
+
+    def test_featured_skipped_when_all_games_started(self, planner):
+        planner.record_featured(now=NOW - timedelta(hours=1))
+        games = [{"commence_time": _event("g", -0.5)["commence_time"]}]
+        assert planner.should_refresh_featured(games, now=NOW) is False
+        games.append({"commence_time": _event("g2", 2)["commence_time"]})
+        assert planner.should_refresh_featured(games, now=NOW) is True
@@ -0,0 +1,53 @@
+#pytest backend/tests/test_parallel_fit.py -v
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from parallel_fit import CPU_BUDGET_ENV, cpu_budget, fit_models, split_budget
+
+
+def _jobs():
+    rng = np.random.default_rng(11)
+    X = rng.normal(size=(300, 3))
+    return {
+        f"t{i}": (RandomForestRegressor(n_estimators=10, random_state=42), X, X[:, i] * 2 + rng.normal(0, 0.1, 300))
+        for i in range(3)
+    }
+
+
+class TestBudget:
+    def test_split_never_oversubscribes(self):
+        for n_tasks in range(1, 6):
+            for budget in range(1, 17):
+                outer, inner = split_budget(n_tasks, budget)
+                assert outer <= n_tasks
+                assert outer * inner <= max(budget, 1)
+                assert outer >= 1 and inner >= 1
+
+    def test_four_targets_on_eight_cores(self):
+        assert split_budget(4, 8) == (4, 2)
+
+    def test_env_budget(self, monkeypatch):
+        monkeypatch.setenv(CPU_BUDGET_ENV, "3")
+        assert cpu_budget() == 3
+        assert cpu_budget(5) == 5
+
+
+class TestFitModels:
+    @pytest.mark.parametrize("budget", [1, 3])
+    def test_pool_matches_sequential_fit(self, budget):
+        jobs = _jobs()
+        models, timings = fit_models(jobs, budget=budget, verbose=False)
+        assert list(models) == list(jobs) == list(timings)
+
+        X = jobs["t0"][1]
+        for name, (_, X_fit, y) in _jobs().items():
+            ref = RandomForestRegressor(n_estimators=10, random_state=42).fit(X_fit, y)
+            np.testing.assert_allclose(models[name].predict(X), ref.predict(X))
+            assert models[name].n_jobs == max(1, budget // 3)
@@ -0,0 +1,47 @@
+#pytest backend/tests/test_pipeline_metrics.py -v
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pipeline_metrics
+from pipeline_metrics import StageMetrics, write_stage
+
+
+@pytest.fixture()
+def reports(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline_metrics, "REPORTS_DIR", str(tmp_path))
+    monkeypatch.setenv(pipeline_metrics.RUN_ID_ENV, "20260115_060000")
+    return tmp_path
+
+
+def _stage(name, wall_s, orchestrator=False):
+    return dict(StageMetrics(name, orchestrator).summary(), wall_s=wall_s)
+
+
+class TestRunReport:
+    def test_standalone_stages_add_up(self, reports):
+        write_stage(_stage("model_train", 10.0))
+        path = write_stage(_stage("daily_update", 2.5))
+        report = json.loads(Path(path).read_text())
+        assert [s["stage"] for s in report["stages"]] == ["model_train", "daily_update"]
+        assert report["total_wall_s"] == 12.5
+
+    def test_orchestrator_is_not_counted_twice(self, reports):
+        write_stage(_stage("model_train", 10.0))
+        write_stage(_stage("daily_update", 2.5))
+        path = write_stage(_stage("run_openbet_all", 14.0, orchestrator=True))
+        report = json.loads(Path(path).read_text())
+        assert report["stages"][-1]["orchestrator"] is True
+        assert "orchestrator" not in report["stages"][0]
+        assert report["total_wall_s"] == 14.0
+
+    def test_old_reports_are_pruned(self, reports, monkeypatch):
+        monkeypatch.setattr(pipeline_metrics, "MAX_REPORTS", 2)
+        for day in (1, 2, 3):
+            write_stage(_stage("model_train", 1.0), run_id=f"2026010{day}_060000")
+        assert sorted(p.name for p in reports.iterdir()) == ["run_20260102_060000.json", "run_20260103_060000.json"]
@@ -0,0 +1,112 @@
+#pytest backend/tests/test_player_features.py -v
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ids import TEAM_IDS
+from player_features import (
+    FEATURE_COLS,
+    add_opponent_context,
+    add_team_ids,
+    build_player_features,
+    latest_player_rows,
+    load_valid_game_ids,
+    read_player_stats,
+    team_game_totals,
+)
+
+LAKERS, CLIPPERS, SUNS = ("Los Angeles", "Lakers"), ("LA", "Clippers"), ("Phoenix", "Suns")
+TEAM_NUM = {"Lakers": 1, "Clippers": 2, "Suns": 3}
+
+
+def _rows():
+    rows = []
+    matchups = [(1, "2024-09-20", LAKERS, SUNS), (2, "2024-10-25", LAKERS, CLIPPERS),
+                (3, "2024-10-27", SUNS, CLIPPERS), (4, "2024-10-29", CLIPPERS, LAKERS),
+                (5, "2024-11-02", SUNS, LAKERS), (6, "2024-11-04", CLIPPERS, SUNS)]
+    for gid, day, home, away in matchups:
+        for team, opp, flag in [(home, away, 1), (away, home, 0)]:
+            for k in range(2):
+                rows.append({
+                    "firstName": f"{team[1]}{k}", "lastName": "X", "personId": TEAM_NUM[team[1]] * 10 + k,
+                    "gameId": gid, "gameDateTimeEst": f"{day} 19:30:00",
+                    "playerteamCity": team[0], "playerteamName": team[1],
+                    "opponentteamCity": opp[0], "opponentteamName": opp[1],
+                    "gameLabel": "", "home": flag, "numMinutes": 30.0 + gid,
+                    "points": 10.0 * gid + k, "assists": 2.0, "reboundsTotal": 5.0 + k,
+                    "threePointersMade": 1.0, "plusMinusPoints": 3,
+                })
+    return pd.DataFrame(rows)
+
+
+@pytest.fixture()
+def csv_path(tmp_path):
+    path = tmp_path / "PlayerStatistics.csv"
+    _rows().to_csv(path, index=False)
+    return path
+
+
+class TestPlayerFeatures:
+    def test_chunked_read_filters_and_downcasts(self, csv_path):
+        df, rows_read = read_player_stats(csv_path, "2024-10-01", valid_game_ids=[2, 3, 4, 5], chunksize=5)
+        assert rows_read == 24
+        assert sorted(df["gameId"].unique()) == [2, 3, 4, 5]
+        assert "plusMinusPoints" not in df.columns
+        assert df["points"].dtype == np.float32
+        assert df["personId"].dtype == np.int32
+        assert df["home"].dtype == np.int8
+        assert isinstance(df["playerteamCity"].dtype, pd.CategoricalDtype)
+
+    def test_valid_game_ids_drop_preseason_and_all_star(self, tmp_path):
+        path = tmp_path / "Games.csv"
+        pd.DataFrame({
+            "gameId": ["1.0", "2", "3", "4"],
+            "gameLabel": ["Preseason", None, "All-Star Game", "NBA Cup"],
+            "hometeamName": ["Lakers"] * 4,
+        }).to_csv(path, index=False)
+        assert sorted(load_valid_game_ids(path)) == [2, 4]
+
+    def test_team_ids_split_los_angeles(self, csv_path):
+        df = add_team_ids(read_player_stats(csv_path, "2024-10-01")[0])
+        ids = dict(zip(df["playerteamName"].astype(str), df["playerteamId"]))
+        assert ids["Lakers"] == TEAM_IDS["Los Angeles Lakers"]
+        assert ids["Clippers"] == TEAM_IDS["LA Clippers"]
+
+    def test_rolling_uses_previous_games_only(self, csv_path):
+        df_model = build_player_features(read_player_stats(csv_path, "2024-01-01")[0])
+        laker = df_model[df_model["firstName"] == "Lakers0"].sort_values("gameDateTimeEst")
+        assert np.isnan(laker["rolling_points"].iloc[0])
+        assert laker["rolling_points"].tolist()[1:] == pytest.approx([10.0, 15.0, 70 / 3])
+
+    def test_opponent_context_is_as_of(self, csv_path):
+        df = add_team_ids(read_player_stats(csv_path, "2024-01-01")[0])
+        totals = team_game_totals(df)
+        lakers = totals[totals["playerteamId"] == TEAM_IDS["Los Angeles Lakers"]]
+        # min_periods=3: the Lakers' 4th game is the first with a value
+        assert lakers["Opp_L10_points_Allowed"].isna().tolist() == [True, True, True, False]
+
+        # a Lakers opponent on a later date without a Lakers row still sees their last value
+        probe = df.iloc[[0]].copy()
+        probe["opponentteamId"] = TEAM_IDS["Los Angeles Lakers"]
+        probe["gameDateTimeEst"] = pd.Timestamp("2024-12-01", tz="UTC")
+        got = add_opponent_context(probe, totals)
+        assert got["Opp_L10_points_Allowed"].iloc[0] == lakers["Opp_L10_points_Allowed"].iloc[-1]
+
+    def test_latest_rows_per_player(self, csv_path):
+        df_model = build_player_features(read_player_stats(csv_path, "2024-01-01")[0])
+        latest = latest_player_rows(df_model)
+        assert len(latest) == 6
+        row = next(r for r in latest.values() if r["firstName"] == "Suns1")
+        assert row["playerName"] == "Suns1 X"
+        # only the model's feature columns are kept, from the player's last game
+        last = df_model[df_model["firstName"] == "Suns1"].iloc[-1]
+        assert last["gameId"] == 6
+        assert set(row) == set(FEATURE_COLS) | {"firstName", "lastName", "playerName", "playerteamId"}
+        assert row["playerteamId"] == str(last["playerteamId"])
+        assert row["rolling_points"] == pytest.approx(last["rolling_points"])
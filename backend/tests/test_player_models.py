@@ -0,0 +1,71 @@
+#pytest backend/tests/test_player_models.py -v
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from player_models import (
+    LAYOUT_ENV,
+    LAYOUTS,
+    artifact_targets,
+    benchmark,
+    fit_player_models,
+    layout_name,
+    predict_targets,
+)
+
+TARGETS = ["points", "reboundsTotal", "assists", "threePointersMade"]
+
+
+@pytest.fixture()
+def split():
+    rng = np.random.default_rng(5)
+    X = pd.DataFrame(rng.normal(size=(600, 3)), columns=["home", "rolling_points", "rolling_numMinutes"])
+    Y = pd.DataFrame({
+        "points": 15 + 6 * X["rolling_points"] + rng.normal(0, 1, len(X)),
+        "reboundsTotal": 5 + 2 * X["rolling_numMinutes"] + rng.normal(0, 0.5, len(X)),
+        "assists": 3 + X["rolling_points"] - X["rolling_numMinutes"],
+        "threePointersMade": (1 + 0.5 * X["home"]).clip(0),
+    })
+    return X.iloc[:500], Y.iloc[:500], X.iloc[500:], Y.iloc[500:]
+
+
+class TestLayouts:
+    def test_env_selects_layout(self, monkeypatch):
+        monkeypatch.delenv(LAYOUT_ENV, raising=False)
+        assert layout_name() == "per_target"
+        monkeypatch.setenv(LAYOUT_ENV, "multi_output")
+        assert layout_name() == "multi_output"
+        with pytest.raises(ValueError):
+            layout_name("gbr")
+
+    @pytest.mark.parametrize("layout", LAYOUTS)
+    def test_predicts_every_target(self, split, layout):
+        X_train, Y_train, X_test, Y_test = split
+        fields, _ = fit_player_models(layout, X_train, Y_train, budget=1)
+        assert artifact_targets(fields) == TARGETS
+
+        pred = predict_targets(fields, X_test)
+        assert pred.shape == (len(X_test), len(TARGETS))
+        assert predict_targets(fields, X_test.iloc[:1]).shape == (1, len(TARGETS))
+        # each column tracks its own target, whatever its scale
+        for i, t in enumerate(TARGETS):
+            assert np.corrcoef(pred[:, i], Y_test[t])[0, 1] > 0.8
+
+    def test_old_artifact_without_layout(self, split):
+        X_train, Y_train, X_test, _ = split
+        fields, _ = fit_player_models("per_target", X_train, Y_train, budget=1)
+        old = {"models": fields["models"]}
+        np.testing.assert_allclose(predict_targets(old, X_test), predict_targets(fields, X_test))
+
+    def test_benchmark_reports(self, split):
+        reports = benchmark(*split, budget=1)
+        assert [r["layout"] for r in reports] == list(LAYOUTS)
+        for r in reports:
+            assert r["fit_s"] > 0 and r["artifact_mb"] > 0 and r["predict_row_ms"] > 0
+            assert all(f"MAE_{t}" in r for t in TARGETS)
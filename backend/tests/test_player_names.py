@@ -0,0 +1,101 @@
+#pytest backend/tests/test_player_names.py -v
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from player_names import PlayerNameResolver, canonical_name, load_aliases
+
+PLAYERS = {
+    1629651: "Nic Claxton",
+    1626162: "Kelly Oubre Jr.",
+    1630578: "Alperen Sengun",
+    1629661: "Cameron Johnson",
+    1630529: "Herbert Jones",
+    1628983: "Shai Gilgeous-Alexander",
+    203999: "Nikola Jokic",
+    1631107: "Nikola Jovic",
+    1631114: "Jalen Williams",
+    1631119: "Jaylin Williams",
+    1629060: "Rui Hachimura",
+    1628398: "Moritz Wagner",
+}
+
+
+@pytest.fixture()
+def resolver():
+    return PlayerNameResolver(PLAYERS)
+
+
+class TestCanonicalName:
+    @pytest.mark.parametrize("raw, canonical", [
+        ("Kelly Oubre Jr.", "kelly oubre"),
+        ("Alperen Şengün", "alperen sengun"),
+        ("Shai Gilgeous-Alexander", "shai gilgeous alexander"),
+        ("P.J. Washington", "pj washington"),
+        ("  De'Aaron   Fox ", "deaaron fox"),
+        ("Trey Murphy III", "trey murphy"),
+        ("Nene", "nene"),
+        (None, ""),
+    ])
+    def test_canonical_forms(self, raw, canonical):
+        assert canonical_name(raw) == canonical
+
+
+class TestResolver:
+    @pytest.mark.parametrize("name, person_id", [
+        ("Kelly Oubre Jr", 1626162),               # suffix / punctuation
+        ("Alperen Şengün", 1630578),               # accents
+        ("SHAI GILGEOUS ALEXANDER", 1628983),      # case / hyphen
+        ("Nicolas Claxton", 1629651),              # first-name prefix
+        ("Herb Jones", 1630529),
+        ("Cam Johnson", 1629661),
+        ("Kely Oubre", 1626162),                   # typo, same last name
+        ("Nikola Jovic", 1631107),                 # exact beats the near-identical name
+    ])
+    def test_resolves_variants(self, resolver, name, person_id):
+        assert resolver.resolve(name) == person_id
+        assert not resolver.unresolved
+
+    @pytest.mark.parametrize("name", ["J. Williams", "Jaylen Williams", "Moe Wagner", "Bob Nobody"])
+    def test_ambiguous_or_unknown_names_are_reported(self, resolver, name):
+        assert resolver.resolve(name) is None
+        assert resolver.unresolved == {name}
+
+    def test_aliases_and_duplicate_names(self):
+        resolver = PlayerNameResolver({**PLAYERS, 1: "Jalen Williams"}, aliases={"Moe Wagner": "Moritz Wagner"})
+        assert resolver.resolve("Moe Wagner") == 1628398
+        assert resolver.resolve("Jalen Williams") is None  # two players share the name
+        assert resolver.learned == {}
+
+    def test_resolve_many_and_learned_matches_saved_for_review(self, resolver, tmp_path):
+        path = tmp_path / "aliases.json"
+        path.write_text(json.dumps({"aliases": {"herb jones": "herbert jones"}, "learned": {"old match": "x y"}}))
+        got = resolver.resolve_many(["Cam Johnson", "Herb Jones", "Cam Johnson", "Nobody Here", "Nic Claxton"])
+        assert got == {"Cam Johnson": 1629661, "Herb Jones": 1630529, "Nic Claxton": 1629651}
+
+        resolver.save(str(path))
+        payload = json.loads(path.read_text())
+        assert payload["aliases"] == {"herb jones": "herbert jones"}
+        # already a hand-made alias: not repeated under "learned"
+        assert payload["learned"] == {"cam johnson": "cameron johnson", "old match": "x y"}
+        assert payload["unresolved"] == ["Nobody Here"]
+        assert load_aliases(str(path)) == payload["aliases"]
+        assert load_aliases(str(tmp_path / "missing.json")) == {}
+
+    def test_fuzzy_matches_are_never_persisted_as_aliases(self, tmp_path):
+        path = tmp_path / "aliases.json"
+        # the book means Jaylin Williams, who this model doesn't know: "J" prefix-matches Jalen
+        first_run = PlayerNameResolver({1631114: "Jalen Williams"}, load_aliases(str(path)))
+        assert first_run.resolve("J. Williams") == 1631114
+        first_run.save(str(path))
+        assert json.loads(path.read_text())["learned"] == {"j williams": "jalen williams"}
+
+        # next run: still a fuzzy lookup, so once Jaylin is known the prefix is ambiguous again
+        next_run = PlayerNameResolver({1631114: "Jalen Williams", 1631119: "Jaylin Williams"}, load_aliases(str(path)))
+        assert next_run.resolve("J. Williams") is None
+        assert load_aliases(str(path)) == {}
@@ -0,0 +1,111 @@
+#pytest backend/tests/test_player_online.py -v
+
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import player_online
+from model_registry import REGISTRY_DIR, ModelRegistry
+from player_online import FULL_REFIT_DAYS, update_online_model
+
+FEATURES = ["home", "rolling_points", "rolling_numMinutes"]
+TARGETS = ["points", "assists"]
+NOW = datetime(2026, 1, 15, 6, 0)
+
+
+def _rows(n, start, seed):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "gameDateTimeEst": pd.date_range(start, periods=n, freq="h", tz="UTC"),
+        "home": rng.integers(0, 2, n),
+        "rolling_points": rng.normal(15, 6, n),
+        "rolling_numMinutes": rng.normal(28, 6, n),
+    })
+    df["points"] = (0.9 * df["rolling_points"] + 2 * df["home"] + rng.normal(0, 2, n)).clip(0)
+    df["assists"] = (0.1 * df["rolling_numMinutes"] + rng.normal(0, 0.5, n)).clip(0)
+    return df
+
+
+@pytest.fixture()
+def season():
+    return _rows(1000, "2025-10-21", 1)
+
+
+@pytest.fixture()
+def full(season):
+    fields, baseline, report = update_online_model(None, season, FEATURES, TARGETS, now=NOW, budget=1)
+    prev = dict(fields, feature_cols=FEATURES, latest_stats={})
+    return prev, baseline, report
+
+
+class TestOnlineModel:
+    def test_first_run_is_full_refit_against_baseline(self, season, full):
+        prev, baseline, report = full
+        assert report["mode"] == "full" and report["n_new"] == len(season)
+        assert set(report["MAE"]) == set(report["baseline_MAE"]) == set(TARGETS)
+        # a linear signal: the SGD model should be about as good as the forests
+        assert report["MAE"]["points"] < report["baseline_MAE"]["points"] * 1.1
+        assert prev["online_state"]["trained_through"] == season["gameDateTimeEst"].max().isoformat()
+        assert (prev["model"].predict(season[FEATURES]) >= 0).all()
+
+    def test_nightly_update_learns_only_new_rows(self, season, full):
+        prev, baseline, _ = full
+        before = prev["model"].models["points"].t_
+        new_rows = _rows(40, season["gameDateTimeEst"].max() + pd.Timedelta(hours=1), 2)
+        fields, _, report = update_online_model(
+            prev, pd.concat([season, new_rows]), FEATURES, TARGETS, baseline=baseline, now=NOW + timedelta(days=1)
+        )
+        assert report["mode"] == "incremental" and report["n_new"] == 40
+        assert "baseline_MAE" in report and "MAE" in report
+        assert fields["model"].models["points"].t_ == before + 40
+        assert fields["online_state"]["trained_through"] == new_rows["gameDateTimeEst"].max().isoformat()
+        assert fields["online_state"]["full_fit_at"] == NOW.isoformat()
+        assert "latest_stats" not in fields
+
+    def test_no_new_rows_is_a_no_op(self, season, full):
+        prev, baseline, _ = full
+        fields, _, report = update_online_model(prev, season, FEATURES, TARGETS, baseline, now=NOW + timedelta(days=1))
+        assert report == {"mode": "incremental", "n_new": 0}
+        assert fields["model"] is prev["model"]
+
+    def test_periodic_and_feature_change_refits(self, season, full):
+        prev, baseline, _ = full
+        late = NOW + timedelta(days=FULL_REFIT_DAYS)
+        assert update_online_model(prev, season, FEATURES, TARGETS, baseline, now=late, budget=1)[2]["mode"] == "full"
+        changed = dict(prev, feature_cols=FEATURES[:2])
+        assert update_online_model(changed, season, FEATURES, TARGETS, baseline, now=NOW, budget=1)[2]["mode"] == "full"
+
+
+class TestFreshCheckout:
+    """CI restores data/models/ from its cache; the live pkl files are not there."""
+
+    def test_previous_model_and_baseline_come_from_the_registry_dir(self, season, full, tmp_path):
+        assert Path(player_online.BASELINE_PATH).parent == Path(REGISTRY_DIR)
+
+        prev, baseline, _ = full
+        live = tmp_path / "player_prop_models.pkl"
+        registry = ModelRegistry("players", root=str(tmp_path / "models"), live_path=str(live))
+        registry.register("v1", dict(prev))
+        player_online.save_baseline(baseline, str(tmp_path / "models" / "baseline.pkl"))
+        live.unlink()
+
+        loaded = player_online.load_previous(str(live), registry)
+        new_rows = _rows(10, season["gameDateTimeEst"].max() + pd.Timedelta(hours=1), 3)
+        _, _, report = update_online_model(
+            loaded, pd.concat([season, new_rows]), FEATURES, TARGETS,
+            baseline=player_online.load_baseline(str(tmp_path / "models" / "baseline.pkl")),
+            now=NOW + timedelta(days=1),
+        )
+        assert report["mode"] == "incremental" and report["n_new"] == 10
+        assert "baseline_MAE" in report
+
+    def test_nothing_saved_means_a_full_refit(self, tmp_path):
+        registry = ModelRegistry("players", root=str(tmp_path / "models"), live_path=str(tmp_path / "p.pkl"))
+        assert player_online.load_previous(str(tmp_path / "p.pkl"), registry) is None
+        assert player_online.load_baseline(str(tmp_path / "missing.pkl")) is None
@@ -0,0 +1,134 @@
+#pytest backend/tests/test_refresh_daemon.py -v
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import daily_player_props
+import daily_update
+import nba_players_map
+import refresh_daemon
+from refresh_daemon import Refresher
+
+ARTIFACTS = {
+    "team": (daily_update, "TEAM_MODEL_PATH"),
+    "players": (daily_update, "PLAYER_MODEL_PATH"),
+    "props": (daily_player_props, "PLAYER_MODEL_PATH"),
+    "store": (refresh_daemon, "STORE_PATH"),
+    "schedule": (refresh_daemon, "SCHEDULE_PATH"),
+    "roster": (nba_players_map, "CACHE_FILE"),
+}
+
+
+@pytest.fixture()
+def daemon(monkeypatch, tmp_path):
+    """A Refresher over temp artifact files, with every loader and odds fetch stubbed."""
+    files = {}
+    for name, (module, attr) in ARTIFACTS.items():
+        files[name] = tmp_path / name
+        files[name].write_text(name)
+        monkeypatch.setattr(module, attr, str(files[name]))
+
+    loads = []
+
+    class FakeStore:
+        @staticmethod
+        def load():
+            loads.append("store")
+            return "team store"
+
+    def load_artifacts():
+        loads.append("models")
+        return {"team": "model"}, {"players": "model"}
+
+    monkeypatch.setattr(daily_update, "load_artifacts", load_artifacts)
+    monkeypatch.setattr(refresh_daemon, "TeamFeatureStore", FakeStore)
+    monkeypatch.setattr(daily_player_props, "reload_player_model", lambda: loads.append("props"))
+    monkeypatch.setattr(refresh_daemon, "load_game_days", lambda: loads.append("schedule") or set())
+    monkeypatch.setattr(nba_players_map, "build_player_team_map", lambda: loads.append("roster") or {"a b": "team"})
+
+    calls = []
+    monkeypatch.setattr(daily_update, "fetch_games", lambda: calls.append("games") or [{"id": "g1"}])
+    monkeypatch.setattr(daily_update, "predict_games", lambda games, team_art, store: calls.append("predict"))
+    monkeypatch.setattr(daily_update, "todays_team_ids", lambda games: {1, 2})
+    monkeypatch.setattr(daily_update, "project_players",
+                        lambda art, team_ids, roster: calls.append("project") or [{"player": "a b"}])
+    monkeypatch.setattr(daily_update, "publish",
+                        lambda games, projections: calls.append(("publish", projections is not None)))
+    monkeypatch.setattr(daily_player_props, "fetch_player_props", lambda roster: calls.append("props") or [{}])
+    monkeypatch.setattr(daily_player_props, "write_snapshot", lambda props: calls.append("snapshot"))
+
+    def touch(name):
+        mtime = os.path.getmtime(files[name]) + 10
+        os.utime(files[name], (mtime, mtime))
+
+    refresher = Refresher()
+    refresher.files, refresher.loads, refresher.calls, refresher.touch = files, loads, calls, touch
+    return refresher
+
+
+class TestReloadIfChanged:
+    def test_first_cycle_loads_everything(self, daemon):
+        assert daemon.reload_if_changed() == set(ARTIFACTS)
+        assert sorted(daemon.loads) == ["models", "props", "roster", "schedule", "store"]
+        assert daemon.team_store == "team store" and daemon.player_team_map == {"a b": "team"}
+
+    def test_unchanged_artifacts_are_not_reloaded(self, daemon):
+        daemon.reload_if_changed()
+        daemon.loads.clear()
+        assert daemon.reload_if_changed() == set()
+        assert daemon.loads == []
+
+    @pytest.mark.parametrize("name, load", [
+        ("team", "models"),
+        ("players", "models"),
+        ("props", "props"),
+        ("store", "store"),
+        ("schedule", "schedule"),
+        ("roster", "roster"),
+    ])
+    def test_only_the_changed_artifact_reloads(self, daemon, name, load):
+        daemon.reload_if_changed()
+        daemon.loads.clear()
+        daemon.touch(name)
+        assert daemon.reload_if_changed() == {name}
+        assert daemon.loads == [load]
+
+    def test_roster_written_by_the_first_build_is_not_reloaded(self, daemon, monkeypatch):
+        daemon.files["roster"].unlink()
+        monkeypatch.setattr(nba_players_map, "build_player_team_map",
+                            lambda: daemon.files["roster"].write_text("{}") or {})
+        daemon.reload_if_changed()
+        assert daemon.reload_if_changed() == set()
+
+
+class TestRefresh:
+    def test_projections_are_republished_only_when_inputs_change(self, daemon):
+        assert daemon.refresh()
+        assert daemon.calls == ["games", "predict", "project", ("publish", True), "props", "snapshot"]
+
+        daemon.calls.clear()
+        assert daemon.refresh()
+        assert daemon.calls == ["games", "predict", ("publish", False), "props", "snapshot"]
+
+        daemon.calls.clear()
+        daemon.touch("roster")
+        daemon.refresh()
+        assert "project" in daemon.calls
+
+    def test_skips_the_cycle_without_models(self, daemon, monkeypatch):
+        monkeypatch.setattr(daily_update, "load_artifacts", lambda: None)
+        assert not daemon.refresh()
+        assert daemon.calls == []
+
+    def test_run_once_survives_a_failing_cycle(self, daemon, monkeypatch):
+        def broken():
+            raise ConnectionError("odds api down")
+
+        monkeypatch.setattr(daily_update, "fetch_games", broken)
+        monkeypatch.setattr(refresh_daemon.signal, "signal", lambda *args: None)
+        refresh_daemon.run(once=True)  # logged, not raised
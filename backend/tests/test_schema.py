@@ -0,0 +1,64 @@
+#pytest backend/tests/test_schema.py -v
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from schema import apply_schema, frame_mb, schedule_time
+
+
+def _raw_team_stats(n=200):
+    return pd.DataFrame({
+        "gameId": [f"{22500000 + i // 2}.0" for i in range(n)],
+        "teamId": np.where(np.arange(n) % 2, 1610612737.0, 1610612738.0),
+        "coachId": [1627754] * n,
+        "gameDateTimeEst": ["2025-11-01 19:30:00"] * n,
+        "teamCity": ["Atlanta", "Boston"] * (n // 2),
+        "gameLabel": [""] * n,
+        "home": [1, 0] * (n // 2),
+        "win": [1.0, np.nan] * (n // 2),
+        "teamScore": np.arange(n, dtype=np.int64) + 90,
+        "fieldGoalsPercentage": np.linspace(0.4, 0.5, n),
+    })
+
+
+class TestSchema:
+    def test_compact_dtypes(self):
+        df = apply_schema(_raw_team_stats(), verbose=False)
+        assert df["gameId"].dtype == np.int32
+        assert df["teamId"].dtype == np.int32
+        assert df["coachId"].dtype == np.int32
+        assert isinstance(df["gameDateTimeEst"].dtype, pd.DatetimeTZDtype)
+        assert isinstance(df["teamCity"].dtype, pd.CategoricalDtype)
+        assert df["home"].dtype == np.int8
+        assert df["win"].dtype == np.float32  # blanks keep NaN
+        assert df["teamScore"].dtype == np.float32
+        assert df["fieldGoalsPercentage"].dtype == np.float32
+        assert df["teamId"].iloc[1] == 1610612737
+
+    def test_memory_shrinks_and_is_recorded(self):
+        raw = _raw_team_stats()
+        before = frame_mb(raw)
+
+        class _Stage:
+            notes = {}
+
+            def note(self, key, value):
+                self.notes[key] = value
+
+        stage = _Stage()
+        df = apply_schema(raw, "TeamStatistics", metrics=stage, verbose=False)
+        assert frame_mb(df) < before / 2
+        assert stage.notes["memory_TeamStatistics"]["rows"] == 200
+        assert stage.notes["memory_TeamStatistics"]["after_mb"] < stage.notes["memory_TeamStatistics"]["before_mb"]
+
+    def test_schedule_time_is_eastern_wall_clock(self):
+        got = schedule_time(["2026-01-12T00:30:00Z", "2026-07-12T00:30:00Z", None])
+        expected = pd.DatetimeIndex(["2026-01-11 19:30", "2026-07-11 20:30", pd.NaT], tz="UTC")
+        pd.testing.assert_index_equal(got, expected)
+        assert schedule_time("2026-01-12T00:30:00Z") == expected[0]
+        assert schedule_time(None) is pd.NaT
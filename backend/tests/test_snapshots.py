@@ -0,0 +1,28 @@
+#pytest backend/tests/test_snapshots.py -v
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from snapshots import write_json_atomic
+
+
+class TestWriteJsonAtomic:
+    def test_writes_and_replaces(self, tmp_path):
+        path = tmp_path / "nested" / "odds.json"
+        write_json_atomic(str(path), {"games": [1]})
+        write_json_atomic(str(path), {"games": [1, 2]})
+        assert json.loads(path.read_text()) == {"games": [1, 2]}
+        assert [p.name for p in path.parent.iterdir()] == ["odds.json"]
+
+    def test_failed_write_keeps_the_old_snapshot(self, tmp_path):
+        path = tmp_path / "odds.json"
+        write_json_atomic(str(path), {"games": [1]})
+        with pytest.raises(TypeError):
+            write_json_atomic(str(path), {"games": object()})
+        assert json.loads(path.read_text()) == {"games": [1]}
+        assert [p.name for p in tmp_path.iterdir()] == ["odds.json"]
@@ -0,0 +1,66 @@
+#pytest backend/tests/test_team_estimators.py -v
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from team_estimators import (
+    ESTIMATOR_ENV,
+    ESTIMATORS,
+    benchmark,
+    estimator_name,
+    fit_and_evaluate,
+    time_split,
+)
+
+REPORT_KEYS = {"estimator", "n_train", "n_test", "iterations", "fit_s", "predict_rows_per_s", "MAE", "RMSE", "R2"}
+
+
+@pytest.fixture()
+def data():
+    rng = np.random.default_rng(3)
+    X = pd.DataFrame(rng.normal(size=(1500, 4)), columns=list("abcd"))
+    y = pd.Series(110 + 6 * X["a"] - 3 * X["b"] + rng.normal(0, 1, len(X)))
+    return X, y
+
+
+class TestRegistry:
+    def test_default_is_gbr(self, monkeypatch):
+        monkeypatch.delenv(ESTIMATOR_ENV, raising=False)
+        assert estimator_name() == "gbr"
+
+    def test_env_selects_backend(self, monkeypatch):
+        monkeypatch.setenv(ESTIMATOR_ENV, "HGB")
+        assert estimator_name() == "hgb"
+        assert estimator_name("gbr") == "gbr"
+
+    def test_unknown_backend_raises(self):
+        with pytest.raises(ValueError):
+            estimator_name("xgboost")
+
+
+class TestFitAndEvaluate:
+    def test_time_split_is_chronological(self, data):
+        X, y = data
+        X_train, X_test, y_train, y_test = time_split(X, y)
+        assert len(X_train) == 1200 and len(X_test) == 300
+        assert X_train.index[-1] + 1 == X_test.index[0]
+
+    def test_report_for_every_backend(self, data):
+        reports = benchmark(*data)
+        assert [r["estimator"] for r in reports] == list(ESTIMATORS)
+        for r in reports:
+            assert set(r) == REPORT_KEYS
+            assert r["MAE"] < 2.0 and r["R2"] > 0.9
+            assert r["predict_rows_per_s"] > 0
+
+    def test_hgb_stops_early(self, data):
+        X_train, X_test, y_train, y_test = time_split(*data)
+        model, report, y_pred = fit_and_evaluate("hgb", X_train, y_train, X_test, y_test)
+        assert report["iterations"] < model.max_iter
+        assert len(y_pred) == len(X_test)
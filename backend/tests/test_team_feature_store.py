@@ -0,0 +1,140 @@
+#pytest backend/tests/test_team_feature_store.py -v
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import team_features
+from team_feature_store import TeamFeatureStore
+from team_features import (
+    FEATURE_COLS,
+    TEAM_FEATURES,
+    add_team_features,
+    build_team_features,
+    filter_games,
+    load_team_data,
+)
+
+A, B, C = 1610612737, 1610612738, 1610612739
+
+
+def _raw(n_games=30):
+    rng = np.random.default_rng(3)
+    teams = [A, B, C]
+    day = pd.Timestamp("2025-10-21", tz="UTC")
+    rows, games = [], []
+    for gid in range(1, n_games + 1):
+        home, away = rng.choice(teams, size=2, replace=False)
+        day += pd.Timedelta(days=int(rng.integers(1, 3)))
+        hs, as_ = rng.integers(90, 130, size=2)
+        games.append({"gameId": gid, "gameLabel": ""})
+        for team, opp, flag, ts, os_ in [(home, away, 1, hs, as_), (away, home, 0, as_, hs)]:
+            rows.append({
+                "gameId": gid, "teamId": int(team), "opponentTeamId": int(opp), "home": flag,
+                "gameDateTimeEst": day, "teamScore": float(ts), "opponentScore": float(os_),
+                "fieldGoalsPercentage": rng.uniform(0.4, 0.55), "fieldGoalsAttempted": 85,
+                "freeThrowsAttempted": 22, "reboundsOffensive": 9, "turnovers": 13,
+                "reboundsTotal": 44, "assists": 26,
+            })
+    return pd.DataFrame(games), pd.DataFrame(rows)
+
+
+def _stats():
+    return filter_games(*_raw())
+
+
+@pytest.fixture()
+def store(tmp_path):
+    return TeamFeatureStore(path=str(tmp_path / "store.json"))
+
+
+class TestTeamFeatureStore:
+    def test_matches_batch_pipeline(self, store):
+        stats = _stats()
+        df_model = add_team_features(stats)
+        # the batch features of each team's last game use every game before it
+        last_idx = df_model.groupby("teamId").tail(1).index
+        store.sync(stats.drop(index=last_idx))
+        for _, row in df_model.loc[last_idx].iterrows():
+            feats = store.team_features(int(row["teamId"]))
+            for f in TEAM_FEATURES:
+                assert feats[f] == pytest.approx(row[f], nan_ok=True), f
+
+    def test_sync_only_applies_new_games(self, store):
+        stats = _stats()
+        cutoff = stats["gameDateTimeEst"].sort_values().iloc[40]
+        assert store.sync(stats[stats["gameDateTimeEst"] <= cutoff]) > 0
+        applied = store.sync(stats)
+        assert applied == (stats["gameDateTimeEst"] > cutoff).sum()
+        assert store.sync(stats) == 0
+        assert sum(t.games for t in store.teams.values()) == len(stats)
+
+    def test_round_trip(self, store):
+        store.sync(_stats())
+        store.save()
+        loaded = TeamFeatureStore.load(store.path)
+        assert loaded.teams.keys() == store.teams.keys()
+        for tid in store.teams:
+            assert loaded.team_features(tid) == pytest.approx(store.team_features(tid), nan_ok=True)
+
+    def test_matchup_fatigue_from_rest_and_venue(self, store):
+        day = pd.Timestamp("2025-11-01", tz="UTC")
+        base = {"gameId": 1, "gameDateTimeEst": day, "teamScore": 100.0, "opponentScore": 95.0}
+        store.sync(pd.DataFrame([
+            {**base, "teamId": A, "opponentTeamId": B, "home": 0},
+            {**base, "teamId": B, "opponentTeamId": A, "home": 1, "teamScore": 95.0, "opponentScore": 100.0},
+        ]))
+        row = store.matchup(A, B, home=0, game_date=day + pd.Timedelta(days=1))
+        assert list(row) == FEATURE_COLS
+        assert row["fatigue_index"] == 3      # road back-to-back
+        assert row["opp_fatigue_index"] == 1  # home back-to-back
+        rested = store.matchup(A, B, home=0, game_date=day + pd.Timedelta(days=3))
+        assert rested["fatigue_index"] == 0
+        assert rested["opp_home_strength_rating"] == -5
+
+    def test_batched_matchups_match_single_rows(self, store):
+        store.sync(_stats())
+        day = max(st.last_date for st in store.teams.values()) + pd.Timedelta(days=1)
+        dates = pd.DatetimeIndex([day, day + pd.Timedelta(days=4), pd.NaT], tz="UTC")
+        teams, opps, home = [A, B, C], [B, C, A], np.array([1, 0, 1])
+        X = store.matchups(teams, opps, home, dates)
+        for i in range(3):
+            date = None if pd.isna(dates[i]) else dates[i]
+            row = store.matchup(teams[i], opps[i], home=int(home[i]), game_date=date)
+            np.testing.assert_array_equal(X[i], np.array(list(row.values()), dtype=float))
+
+    def test_features_recomputed_after_new_game(self, store):
+        stats = _stats()
+        last = stats.groupby("teamId").tail(1).index
+        store.sync(stats.drop(index=last))
+        before = store.team_features(A)
+        assert store.team_features(A) == before
+        store.sync(stats)
+        assert store.team_features(A) != before
+
+
+class TestTrainingParity:
+    def test_store_matches_training_on_a_trimmed_csv(self, store, tmp_path, monkeypatch):
+        """Last night's store saw older games; tonight's CSV has been trimmed."""
+        monkeypatch.setattr(team_features, "CACHE_DIR", str(tmp_path / "cache"))
+        games, rows = _raw(n_games=80)
+        store.sync(filter_games(games, rows[rows["gameId"] <= 50]))
+
+        # the workflow drops the oldest games from the CSVs
+        games, rows = games[games["gameId"] > 30], rows[rows["gameId"] > 30]
+        games.to_csv(tmp_path / "Games.csv", index=False)
+        rows.to_csv(tmp_path / "TeamStatistics.csv", index=False)
+        df_model, _ = build_team_features(*load_team_data(str(tmp_path)))
+
+        # training's features for each team's last game use every earlier game in the CSV
+        last_idx = df_model.groupby("teamId").tail(1).index
+        store.sync(df_model.drop(index=last_idx))
+        for _, row in df_model.loc[last_idx].iterrows():
+            feats = store.team_features(int(row["teamId"]))
+            for f in TEAM_FEATURES:
+                assert feats[f] == pytest.approx(row[f], nan_ok=True), f
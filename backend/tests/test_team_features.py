@@ -0,0 +1,107 @@
+#pytest backend/tests/test_team_features.py -v
+
+import shutil
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import team_features
+from team_features import (
+    FEATURE_COLS,
+    build_team_features,
+    fatigue_index,
+    latest_team_stats,
+    matchup_features,
+)
+
+A, B, C = 1610612737, 1610612738, 1610612739
+
+
+def _games():
+    # (gameId, date, home team, away team, home score, away score)
+    rows = [
+        (1, "2025-11-01", A, B, 110, 100),
+        (2, "2025-11-02", B, A, 105, 99),
+        (3, "2025-11-05", A, C, 120, 90),
+        (4, "2025-11-06", C, B, 101, 111),
+        (5, "2025-11-08", A, B, 95, 97),
+    ]
+    stats = []
+    for gid, day, home, away, hs, as_ in rows:
+        for team, opp, home_flag, ts, os_ in [(home, away, 1, hs, as_), (away, home, 0, as_, hs)]:
+            stats.append({
+                "gameId": gid, "teamId": team, "opponentTeamId": opp, "home": home_flag,
+                "gameDateTimeEst": pd.Timestamp(day, tz="UTC"),
+                "teamScore": ts, "opponentScore": os_, "fieldGoalsPercentage": 0.5,
+                "fieldGoalsAttempted": 80, "freeThrowsAttempted": 20,
+                "reboundsOffensive": 10, "turnovers": 12, "reboundsTotal": 44, "assists": 25,
+            })
+    df_games = pd.DataFrame({"gameId": [r[0] for r in rows], "gameLabel": [""] * len(rows)})
+    return df_games, pd.DataFrame(stats)
+
+
+@pytest.fixture()
+def features(tmp_path, monkeypatch):
+    monkeypatch.setattr(team_features, "CACHE_DIR", str(tmp_path / "cache"))
+    return build_team_features(*_games())
+
+
+class TestTeamFeatures:
+    def test_fatigue_rules(self):
+        rest = np.array([3, 1, 1, 1])
+        prev_home = np.array([1, 1, 0, 1])
+        home = np.array([1, 1, 0, 0])
+        assert fatigue_index(rest, prev_home, home).tolist() == [0, 1, 3, 2]
+
+    def test_features_only_use_earlier_games(self, features):
+        df_model, _ = features
+        a = df_model[df_model["teamId"] == A].reset_index(drop=True)
+        assert np.isnan(a.loc[0, "rolling_teamScore"])
+        assert a.loc[1, "rolling_teamScore"] == 110
+        assert a.loc[2, "L3_teamScore"] == pytest.approx((110 + 99) / 2)
+        # only A's home games (+10, +30) count towards home strength
+        assert a.loc[0, "home_strength_rating"] == 0
+        assert a.loc[2, "home_strength_rating"] == 10
+        assert a.loc[3, "home_strength_rating"] == 20
+        # back-to-back home then road game
+        assert a.loc[1, "fatigue_index"] == 2
+
+    def test_opponent_mirror_matches_partner_row(self, features):
+        df_model, full_data = features
+        assert len(full_data) == len(df_model) == 10
+        by_key = df_model.set_index(["gameId", "teamId"])
+        for _, row in full_data.iterrows():
+            opp = by_key.loc[(row["gameId"], row["opponentTeamId"])]
+            assert row["opp_teamId"] == row["opponentTeamId"]
+            assert row["opp_L5_net_margin"] == pytest.approx(opp["L5_net_margin"], nan_ok=True)
+        assert full_data["gameDateTimeEst"].is_monotonic_increasing
+
+    def test_output_is_cached_by_input(self, features, tmp_path):
+        cached = list((tmp_path / "cache").iterdir())
+        assert len(cached) == 1
+        _, again = build_team_features(*_games())
+        pd.testing.assert_frame_equal(again, features[1])
+        assert len(list((tmp_path / "cache").iterdir())) == 1
+
+    @pytest.mark.parametrize("name", team_features.FEATURE_CODE)
+    def test_cache_key_covers_every_feature_module(self, tmp_path, monkeypatch, name):
+        for module in team_features.FEATURE_CODE:
+            shutil.copy(Path(team_features.BASE_DIR) / module, tmp_path / module)
+        monkeypatch.setattr(team_features, "BASE_DIR", str(tmp_path))
+        before = team_features.input_hash(*_games())
+        with open(tmp_path / name, "a") as f:
+            f.write("\n# changed\n")
+        assert team_features.input_hash(*_games()) != before
+
+    def test_matchup_features_match_training_columns(self, features):
+        df_model, _ = features
+        latest = latest_team_stats(df_model)
+        row = matchup_features(latest[A], latest[B], home=1)
+        assert list(row) == FEATURE_COLS
+        assert row["home"] == 1 and row["fatigue_index"] == 0
+        assert row["opp_rolling_teamScore"] == latest[B]["rolling_teamScore"]
@@ -0,0 +1,103 @@
+#pytest backend/tests/test_team_retrain.py -v
+
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import team_retrain
+from model_registry import ModelRegistry
+from team_estimators import stage_count, time_split
+from team_retrain import FULL_RETRAIN_DAYS, WARM_STAGES, retrain_mode, train_team_model
+
+NOW = datetime(2026, 1, 15, 6, 0)
+
+
+@pytest.fixture(scope="module")
+def split():
+    rng = np.random.default_rng(9)
+    X = pd.DataFrame(rng.normal(size=(800, 3)), columns=["a", "b", "c"])
+    y = pd.Series(110 + 5 * X["a"] - 2 * X["b"] + rng.normal(0, 1, len(X)))
+    return time_split(X, y)
+
+
+@pytest.fixture(scope="module")
+def first_fit(split):
+    X_train, X_test, y_train, y_test = split
+    model, report, _, training = train_team_model("gbr", X_train, y_train, X_test, y_test, now=NOW)
+    return {"model": model, "feature_cols": ["a", "b", "c"], "estimator": "gbr", "training": training}, report
+
+
+def _train(split, prev, **kwargs):
+    X_train, X_test, y_train, y_test = split
+    return train_team_model("gbr", X_train, y_train, X_test, y_test, prev=prev, **kwargs)
+
+
+class TestRetrainPolicy:
+    def test_first_fit_is_full(self, first_fit):
+        prev, report = first_fit
+        assert report["mode"] == "full" and report["reason"] == "no previous model"
+        assert prev["training"]["full_fit_at"] == NOW.isoformat()
+        assert prev["training"]["full_fit_MAE"] == report["MAE"]
+
+    def test_next_night_warm_starts(self, split, first_fit):
+        prev, _ = first_fit
+        model, report, _, training = _train(split, prev, now=NOW + timedelta(days=1))
+        assert report["mode"] == "incremental"
+        assert stage_count(model) == stage_count(prev["model"]) + WARM_STAGES
+        assert training["full_fit_at"] == NOW.isoformat()
+        # the previous model is left untouched
+        assert stage_count(prev["model"]) == 400
+
+    def test_periodic_full_fit(self, split, first_fit):
+        prev, _ = first_fit
+        _, report, _, training = _train(split, prev, now=NOW + timedelta(days=FULL_RETRAIN_DAYS))
+        assert report["mode"] == "full" and "days ago" in report["reason"]
+        assert training["full_fit_at"] == (NOW + timedelta(days=FULL_RETRAIN_DAYS)).isoformat()
+
+    def test_changed_features_or_backend_force_full_fit(self, split, first_fit):
+        prev, _ = first_fit
+        assert _train(split, dict(prev, feature_cols=["a", "b"]), now=NOW)[1]["mode"] == "full"
+        X_train, X_test, y_train, y_test = split
+        report = train_team_model("hgb", X_train, y_train, X_test, y_test, prev=prev, now=NOW)[1]
+        assert report["mode"] == "full"
+
+    def test_validation_gate_falls_back_to_full_fit(self, split, first_fit, monkeypatch):
+        prev, _ = first_fit
+        # demand the warm start beat the last full fit by a wide margin
+        monkeypatch.setattr(team_retrain, "DRIFT_TOLERANCE", -0.5)
+        _, report, _, _ = _train(split, prev, now=NOW + timedelta(days=1))
+        assert report["mode"] == "full" and report["reason"].startswith("validation gate")
+
+    def test_mode_from_env(self, split, first_fit, monkeypatch):
+        prev, _ = first_fit
+        monkeypatch.setenv(team_retrain.RETRAIN_ENV, "full")
+        assert retrain_mode() == "full"
+        assert _train(split, prev, now=NOW + timedelta(days=1))[1]["mode"] == "full"
+        with pytest.raises(ValueError):
+            retrain_mode("nightly")
+
+
+class TestLoadPrevious:
+    def test_fresh_checkout_warm_starts_from_the_registry(self, split, first_fit, tmp_path):
+        # CI restores data/models/ from the cache, but not the untracked live nba_model.pkl
+        prev, _ = first_fit
+        live = tmp_path / "nba_model.pkl"
+        registry = ModelRegistry("team", root=str(tmp_path / "models"), live_path=str(live))
+        registry.register("v1", dict(prev))
+        live.unlink()
+
+        loaded = team_retrain.load_previous(str(live), registry)
+        assert loaded["model_version"] == "v1" and loaded["training"] == prev["training"]
+        assert _train(split, loaded, now=NOW + timedelta(days=1))[1]["mode"] == "incremental"
+
+    def test_nothing_to_load(self, tmp_path):
+        registry = ModelRegistry("team", root=str(tmp_path / "models"), live_path=str(tmp_path / "nba_model.pkl"))
+        assert registry.load_current() is None
+        assert team_retrain.load_previous(str(tmp_path / "nba_model.pkl"), registry) is None
+        assert team_retrain.load_previous(str(tmp_path / "nba_model.pkl")) is None
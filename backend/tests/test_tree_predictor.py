@@ -0,0 +1,83 @@
+#pytest backend/tests/test_tree_predictor.py -v
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.compose import TransformedTargetRegressor
+from sklearn.ensemble import GradientBoostingRegressor, HistGradientBoostingRegressor, RandomForestRegressor
+from sklearn.preprocessing import StandardScaler
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tree_predictor import FLAT_MAX_ROWS, FlatEnsemble, add_flat_models, flatten, serving_model
+
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(400, 5)), columns=list("abcde"))
+    Y = pd.DataFrame({
+        "points": 20 + 3 * X["a"] - 2 * X["b"] + rng.normal(size=400),
+        "assists": 5 + X["c"] + 0.5 * rng.normal(size=400),
+    })
+    return X, Y
+
+
+class TestFlatten:
+    def test_gbr_matches_sklearn_exactly(self, data):
+        X, Y = data
+        model = GradientBoostingRegressor(n_estimators=60, max_depth=3, random_state=42).fit(X, Y["points"])
+        np.testing.assert_array_equal(flatten(model).predict(X), model.predict(X))
+
+    def test_forest_matches_sklearn_exactly(self, data):
+        X, Y = data
+        model = RandomForestRegressor(n_estimators=20, min_samples_split=10, random_state=42).fit(X, Y["points"])
+        flat = flatten(model)
+        np.testing.assert_array_equal(flat.predict(X), model.predict(X))
+        # one row, as daily_player_props.py scores it
+        np.testing.assert_array_equal(flat.predict(X.iloc[:1]), model.predict(X.iloc[:1]))
+
+    def test_multi_output_forest_matches_sklearn_exactly(self, data):
+        X, Y = data
+        model = TransformedTargetRegressor(
+            regressor=RandomForestRegressor(n_estimators=10, random_state=42), transformer=StandardScaler()
+        ).fit(X, Y)
+        got = flatten(model).predict(X)
+        assert got.shape == (len(X), 2)
+        np.testing.assert_array_equal(got, model.predict(X))
+
+    def test_unsupported_models_raise_type_error(self, data):
+        X, Y = data
+        with pytest.raises(TypeError):
+            flatten(HistGradientBoostingRegressor(max_iter=10).fit(X, Y["points"]))
+
+
+class TestServing:
+    def test_add_flat_models_stores_checked_copies(self, data):
+        X, Y = data
+        artifact = {
+            "model": GradientBoostingRegressor(n_estimators=20, random_state=42).fit(X, Y["points"]),
+            "models": {
+                "points": RandomForestRegressor(n_estimators=5, random_state=42).fit(X, Y["points"]),
+                "assists": HistGradientBoostingRegressor(max_iter=10).fit(X, Y["assists"]),
+            },
+        }
+        add_flat_models(artifact, X.tail(50))
+        assert isinstance(artifact["flat_model"], FlatEnsemble)
+        assert set(artifact["flat_models"]) == {"points"}
+
+        models = serving_model(artifact, "models")
+        assert isinstance(models["points"], FlatEnsemble)
+        assert models["assists"] is artifact["models"]["assists"]
+
+    def test_falls_back_to_sklearn(self, data):
+        X, Y = data
+        model = GradientBoostingRegressor(n_estimators=10, random_state=42).fit(X, Y["points"])
+        assert serving_model({"model": model}) is model
+
+        artifact = add_flat_models({"model": model}, X)
+        assert isinstance(serving_model(artifact), FlatEnsemble)
+        assert serving_model(artifact, n_rows=FLAT_MAX_ROWS + 1) is model
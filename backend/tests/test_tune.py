@@ -0,0 +1,63 @@
+#pytest backend/tests/test_tune.py -v
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import tune
+from tune import FoldCache, candidates, successive_halving, walk_forward_folds
+
+SPACE = {"n_estimators": [5, 20], "max_depth": [1, 3, None]}
+
+
+@pytest.fixture()
+def cache(tmp_path):
+    rng = np.random.default_rng(4)
+    X = rng.normal(size=(400, 3))
+    y = 3 * X[:, 0] + np.sin(2 * X[:, 1]) + rng.normal(0, 0.1, 400)
+    return FoldCache.build(X, y, n_folds=3, root=str(tmp_path))
+
+
+class TestFolds:
+    def test_walk_forward_never_tests_on_the_past(self):
+        folds = walk_forward_folds(1000, n_folds=5, min_train_frac=0.5)
+        assert folds[0][0] == 500 and folds[-1][1] == 1000
+        for (train_end, test_end), (next_train_end, _) in zip(folds, folds[1:]):
+            assert train_end < test_end == next_train_end
+
+    def test_cache_is_reused_for_the_same_matrix(self, cache, tmp_path):
+        X, y = cache.arrays()
+        assert isinstance(X, np.memmap)
+        again = FoldCache.build(np.array(X), np.array(y), n_folds=3, root=str(tmp_path))
+        assert again.path == cache.path
+        other = FoldCache.build(np.array(X), np.array(y) + 1, n_folds=3, root=str(tmp_path))
+        assert other.path != cache.path
+
+
+class TestSearch:
+    def test_candidates_grid_and_sample(self):
+        assert len(candidates(SPACE)) == 6
+        sample = candidates(SPACE, max_candidates=4, seed=1)
+        assert len(sample) == 4 and sample == candidates(SPACE, max_candidates=4, seed=1)
+
+    def test_halving_prunes_and_ranks(self, cache):
+        results = successive_halving(cache, "rf", candidates(SPACE), eta=2, budget=1, verbose=False)
+        assert [r["folds"] for r in results] == sorted((r["folds"] for r in results), reverse=True)
+        assert results[0]["folds"] == 3
+        assert sum(r["folds"] == 1 for r in results) == 3  # 6 -> 3 -> 2
+        # stumps can't fit the signal; they never survive the first fold
+        assert all(r["params"]["max_depth"] != 1 for r in results if r["folds"] > 1)
+
+    def test_rerun_fits_nothing_new(self, cache, monkeypatch):
+        first = successive_halving(cache, "rf", candidates(SPACE), eta=2, budget=1, verbose=False)
+
+        def boom(*args):
+            raise AssertionError("refit a cached candidate")
+
+        monkeypatch.setattr(tune, "_fit_fold", boom)
+        rerun = successive_halving(FoldCache(cache.path), "rf", candidates(SPACE), eta=2, budget=1, verbose=False)
+        assert [r["MAE"] for r in rerun] == [r["MAE"] for r in first]
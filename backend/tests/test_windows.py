@@ -0,0 +1,54 @@
+#pytest backend/tests/test_windows.py -v
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from windows import lagged_mean, lagged_means, lagged_value, segment_starts
+
+
+@pytest.fixture()
+def blocks():
+    rng = np.random.default_rng(7)
+    keys = np.repeat([5, 2, 9, 4], [1, 7, 12, 3])
+    values = rng.normal(100, 10, size=(len(keys), 3))
+    values[rng.random(values.shape) < 0.2] = np.nan
+    return keys, values
+
+
+def _pandas_lagged(keys, values, window):
+    df = pd.DataFrame(values)
+    grouped = df.groupby(keys, sort=False)
+    if window is None:
+        return grouped.transform(lambda x: x.expanding().mean().shift()).to_numpy()
+    return grouped.transform(lambda x: x.rolling(window, min_periods=1).mean().shift()).to_numpy()
+
+
+class TestWindows:
+    def test_segment_starts(self):
+        assert segment_starts(np.array([3, 3, 1, 1, 1, 7])).tolist() == [0, 0, 2, 2, 2, 5]
+        assert segment_starts(np.array([], dtype=int)).tolist() == []
+
+    @pytest.mark.parametrize("window", [1, 3, 5, 10, None])
+    def test_matches_pandas_grouped_rolling(self, blocks, window):
+        keys, values = blocks
+        got = lagged_mean(values, segment_starts(keys), window)
+        np.testing.assert_allclose(got, _pandas_lagged(keys, values, window), rtol=1e-12)
+
+    def test_multiple_windows_share_one_pass(self, blocks):
+        keys, values = blocks
+        starts = segment_starts(keys)
+        l3, l10 = lagged_means(values[:, 0], starts, [3, 10])
+        assert l3.shape == (len(keys),)
+        np.testing.assert_allclose(l3, lagged_mean(values[:, 0], starts, 3))
+        np.testing.assert_allclose(l10, lagged_mean(values[:, 0], starts, 10))
+
+    def test_lagged_value_resets_per_block(self):
+        starts = segment_starts(np.array([1, 1, 2, 2, 2]))
+        got = lagged_value(np.array([10.0, 11.0, 20.0, 21.0, 22.0]), starts)
+        np.testing.assert_array_equal(got, [np.nan, 10.0, np.nan, 20.0, 21.0])
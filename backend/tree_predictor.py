@@ -0,0 +1,229 @@
+# tree_predictor.py
+# Flattened tree ensembles for low-latency serving.
+#
+# sklearn's predict() validates its input, converts DataFrames and dispatches
+# per tree (RandomForest through a joblib pool), which costs far more than
+# the traversal when daily_update.py / daily_player_props.py score one or a
+# handful of rows. flatten() copies a fitted GradientBoostingRegressor,
+# RandomForestRegressor or TransformedTargetRegressor(forest, StandardScaler)
+# into contiguous node arrays (feature, threshold, children, value) shared by
+# all trees. FlatEnsemble.predict() then walks every tree for every row at
+# once, one vectorized step per tree level.
+#
+# Results match sklearn bit for bit: inputs are rounded to float32 as sklearn
+# does, leaves are summed tree by tree in the same order (a sequential
+# cumsum), and the same scale / init / averaging is applied. The training
+# scripts store the flat copies next to the sklearn models (add_flat_models)
+# after checking them against sklearn on held-out rows; serving code picks
+# them up through serving_model() and falls back to sklearn when they're absent
+# or the batch is large enough (FLAT_MAX_ROWS) for sklearn's Cython loop to win.
+#
+#   python tree_predictor.py     *sklearn vs flat latency on the saved artifacts
+
+import copy
+import os
+
+import numpy as np
+from sklearn.compose import TransformedTargetRegressor
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+from sklearn.preprocessing import StandardScaler
+
+from bench import best_ms, print_report
+
+# above this many rows per predict call, serving_model() hands back sklearn
+FLAT_MAX_ROWS = 64
+
+
+class FlatEnsemble:
+    """Every tree of an ensemble in one set of node arrays."""
+
+    def __init__(self, trees, n_features, scale=1.0, base=0.0, average=False, out_scale=None, out_shift=None):
+        offsets = np.cumsum([0] + [t.node_count for t in trees])
+        self.roots = offsets[:-1].astype(np.intp)
+        self.n_features = n_features
+        self.n_outputs = trees[0].n_outputs
+        self.scale = scale
+        self.base = base
+        self.average = average
+        self.out_scale = out_scale
+        self.out_shift = out_shift
+
+        features, thresholds, lefts, rights, nan_lefts, values = [], [], [], [], [], []
+        for tree, offset in zip(trees, self.roots):
+            nodes = np.arange(tree.node_count)
+            leaf = tree.children_left < 0
+            # leaves point at themselves, so walking past them is a no-op
+            features.append(np.where(leaf, 0, tree.feature))
+            thresholds.append(tree.threshold)
+            lefts.append(np.where(leaf, nodes, tree.children_left) + offset)
+            rights.append(np.where(leaf, nodes, tree.children_right) + offset)
+            nan_lefts.append(getattr(tree, "missing_go_to_left", np.zeros(tree.node_count, dtype=np.uint8)))
+            values.append(tree.value[:, :, 0])
+        self.feature = np.concatenate(features).astype(np.intp)
+        self.threshold = np.concatenate(thresholds).astype(np.float64)
+        self.left = np.concatenate(lefts).astype(np.intp)
+        self.right = np.concatenate(rights).astype(np.intp)
+        self.nan_left = np.concatenate(nan_lefts).astype(bool)
+        self.value = np.ascontiguousarray(np.concatenate(values), dtype=np.float64)
+        self.depth = max(t.max_depth for t in trees)
+
+    def leaves(self, X):
+        """(rows, trees) index of the leaf each row lands in, per tree."""
+        # sklearn compares float32 inputs against float64 thresholds
+        X = np.asarray(getattr(X, "values", X), dtype=np.float32).astype(np.float64).reshape(-1, self.n_features)
+        # plain ndarray views: indexing a memory-mapped artifact's np.memmap goes through Python
+        feature, threshold, left, right, nan_left = (
+            np.asarray(a) for a in (self.feature, self.threshold, self.left, self.right, self.nan_left)
+        )
+        idx = np.tile(self.roots, len(X))
+        # only (row, tree) pairs still on a split node take the next step, so
+        # deep forests don't pay for their deepest branch on every row
+        active = np.flatnonzero(left[idx] != idx)
+        rows = active // len(self.roots)
+        for _ in range(self.depth):
+            if not len(active):
+                break
+            node = idx[active]
+            x = X[rows, feature[node]]
+            go_left = np.where(np.isnan(x), nan_left[node], x <= threshold[node])
+            node = np.where(go_left, left[node], right[node])
+            idx[active] = node
+            keep = left[node] != node
+            active, rows = active[keep], rows[keep]
+        return idx.reshape(len(X), len(self.roots))
+
+    def predict(self, X):
+        vals = np.asarray(self.value)[self.leaves(X)]  # rows x trees x outputs
+        if self.scale != 1.0:
+            vals = self.scale * vals
+        if self.average:
+            out = np.cumsum(vals, axis=1)[:, -1] / len(self.roots)
+        else:
+            start = np.full((len(vals), 1, self.n_outputs), self.base, dtype=np.float64)
+            out = np.cumsum(np.concatenate([start, vals], axis=1), axis=1)[:, -1]
+        if self.out_scale is not None:
+            out = out * self.out_scale
+        if self.out_shift is not None:
+            out = out + self.out_shift
+        return out[:, 0] if self.n_outputs == 1 else out
+
+
+def flatten(model):
+    """FlatEnsemble for a fitted model; TypeError for anything it can't reproduce exactly."""
+    if isinstance(model, GradientBoostingRegressor):
+        if model.init_ == "zero":
+            base = 0.0
+        elif hasattr(model.init_, "constant_"):
+            base = float(np.ravel(model.init_.constant_)[0])
+        else:
+            raise TypeError(f"unsupported GBR init: {model.init_!r}")
+        trees = [est[0].tree_ for est in model.estimators_]
+        return FlatEnsemble(trees, model.n_features_in_, scale=model.learning_rate, base=base)
+
+    if isinstance(model, RandomForestRegressor):
+        trees = [est.tree_ for est in model.estimators_]
+        return FlatEnsemble(trees, model.n_features_in_, average=True)
+
+    if isinstance(model, TransformedTargetRegressor) and isinstance(model.transformer_, StandardScaler):
+        flat = flatten(model.regressor_)
+        scaler = model.transformer_
+        flat.out_scale = scaler.scale_
+        flat.out_shift = scaler.mean_
+        return flat
+
+    raise TypeError(f"can't flatten {type(model).__name__}")
+
+
+def _sequential(model):
+    """Shallow copy predicting with n_jobs=1: threaded forests sum trees in no fixed order."""
+    model = copy.copy(model)
+    if hasattr(model, "regressor_"):
+        model.regressor_ = _sequential(model.regressor_)
+    if hasattr(model, "n_jobs"):
+        model.n_jobs = 1
+    return model
+
+
+def add_flat_models(artifact, X_check, keys=("model", "models")):
+    """
+    Store flat_<key> next to each tree model in `artifact` (dicts of models
+    too), checked against sklearn on X_check first. Models that can't be
+    flattened, or that don't match, are left to sklearn.
+    """
+    for key in keys:
+        if key not in artifact:
+            continue
+        models = artifact[key]
+        flat = {}
+        for name, model in (models.items() if isinstance(models, dict) else [(None, models)]):
+            try:
+                candidate = flatten(model)
+            except TypeError:
+                continue
+            expected, got = _sequential(model).predict(X_check), candidate.predict(X_check)
+            if np.array_equal(expected, got):
+                flat[name] = candidate
+            else:
+                print(f"WARNING: flat {key} {name or ''} differs from sklearn "
+                      f"(max {np.max(np.abs(expected - got)):.2e}); serving with sklearn")
+        if isinstance(models, dict):
+            if flat:
+                artifact[f"flat_{key}"] = flat
+        elif None in flat:
+            artifact[f"flat_{key}"] = flat[None]
+    return artifact
+
+
+def serving_model(artifact, key="model", n_rows=1):
+    """The flat copy of artifact[key] when there is one, else the sklearn model(s)."""
+    flat = artifact.get(f"flat_{key}")
+    # sklearn's compiled traversal wins once there are enough rows to amortize its overhead
+    if flat is None or n_rows > FLAT_MAX_ROWS:
+        return artifact[key]
+    if isinstance(flat, dict):
+        return {**artifact[key], **flat}
+    return flat
+
+
+# ---------- BENCHMARK ----------
+
+def benchmark(model, X):
+    """sklearn vs flat predict latency (ms) on 1 row and on all of X."""
+    import pandas as pd
+
+    flat = flatten(model)
+    assert np.array_equal(model.predict(X), flat.predict(X))
+    row = X.iloc[:1] if isinstance(X, pd.DataFrame) else X[:1]
+    return {
+        "rows": len(X),
+        "sklearn_1_row_ms": round(best_ms(lambda: model.predict(row)), 3),
+        "flat_1_row_ms": round(best_ms(lambda: flat.predict(row)), 3),
+        "sklearn_batch_ms": round(best_ms(lambda: model.predict(X), 5), 3),
+        "flat_batch_ms": round(best_ms(lambda: flat.predict(X), 5), 3),
+    }
+
+
+def main():
+    import joblib
+    import pandas as pd
+
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    for name in ("nba_model.pkl", "player_prop_models.pkl", "player_prop_model.pkl"):
+        path = os.path.join(base_dir, "data", name)
+        if not os.path.exists(path):
+            continue
+        art = joblib.load(path)
+        cols = art["feature_cols"]
+        # latency only depends on the shape: columns latest_stats doesn't carry are zero
+        X = pd.DataFrame(list((art.get("latest_stats") or art["latest_player_stats"]).values())).reindex(columns=cols).fillna(0)
+        models = art.get("models") or {k: v for k, v in art.items() if k == "model" or k.endswith("_model")}
+        for key, model in models.items():
+            try:
+                report = benchmark(model, X)
+            except TypeError:
+                continue
+            print_report(report, f"{name} {key}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+# tune.py
+# Walk-forward cross-validation and hyperparameter search for the team and
+# player models.
+#
+#   - The feature matrix is built once (team_features / player_features),
+#     sorted by date and written to data/cache/cv/<hash>/ as .npy files with
+#     the fold boundaries. Later runs on the same data reuse it, and workers
+#     open it with mmap_mode="r": a fold's slices are views into the cached
+#     matrix, not copies.
+#   - Folds are walk-forward: fold k trains on every row before its test block
+#     and tests on the next block, so no fold ever sees the future.
+#   - Candidates (grid, or a random sample of it) are raced over the folds
+#     with successive halving: all of them run on fold 1, the best 1/ETA go on
+#     to fold 2, and so on. Scores are MAE averaged over the folds a candidate
+#     reached, and are remembered in scores.json, so a rerun or a widened grid
+#     only fits what is new.
+#   - Each rung runs in a process pool within the CPU budget (parallel_fit.py).
+#
+#   python tune.py team gbr              *search the GBR team model
+#   python tune.py team hgb -n 40        *at most 40 candidates
+#   python tune.py player --target assists --data archive/box_scores
+
+import argparse
+import hashlib
+import itertools
+import json
+import math
+import os
+import random
+import time
+from datetime import datetime
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_absolute_error
+
+import team_estimators
+from parallel_fit import cpu_budget, split_budget
+from snapshots import write_json_atomic
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CV_CACHE_DIR = os.path.join(BASE_DIR, "data", "cache", "cv")
+RESULTS_DIR = os.path.join(BASE_DIR, "data", "tuning")
+
+N_FOLDS = 5
+MIN_TRAIN_FRAC = 0.5
+ETA = 3
+MAX_CANDIDATES = 60
+
+SEARCH_SPACES = {
+    "gbr": {
+        "n_estimators": [200, 400, 800],
+        "learning_rate": [0.01, 0.03, 0.1],
+        "max_depth": [2, 3, 4],
+        "subsample": [0.5, 0.7, 1.0],
+    },
+    "hgb": {
+        "learning_rate": [0.02, 0.05, 0.1],
+        "max_leaf_nodes": [4, 8, 16, 31],
+        "min_samples_leaf": [10, 20, 50],
+        "l2_regularization": [0.0, 1.0, 10.0],
+    },
+    "rf": {
+        "n_estimators": [50, 100],
+        "min_samples_split": [2, 10, 30],
+        "max_depth": [None, 8, 16],
+        "max_features": [1.0, 0.5],
+    },
+}
+
+
+# ---------- FOLDS ----------
+
+def walk_forward_folds(n_rows, n_folds=N_FOLDS, min_train_frac=MIN_TRAIN_FRAC):
+    """[(train_end, test_end), ...]: fold k trains on rows [0, train_end) and tests on [train_end, test_end)."""
+    first = int(n_rows * min_train_frac)
+    edges = np.linspace(first, n_rows, n_folds + 1).astype(int)
+    return [(int(edges[i]), int(edges[i + 1])) for i in range(n_folds) if edges[i + 1] > edges[i]]
+
+
+def _matrix_hash(X, y, folds):
+    h = hashlib.sha256()
+    for arr in (X, y):
+        h.update(str(arr.shape).encode())
+        h.update(np.ascontiguousarray(arr).tobytes())
+    h.update(json.dumps(folds).encode())
+    return h.hexdigest()[:24]
+
+
+class FoldCache:
+    """Date-sorted X / y and fold boundaries on disk, plus every score computed on them."""
+
+    def __init__(self, path):
+        self.path = path
+        self.folds = [tuple(f) for f in self._read_json("folds.json")]
+        self.scores = self._read_json("scores.json", {})
+
+    @classmethod
+    def build(cls, X, y, n_folds=N_FOLDS, root=CV_CACHE_DIR):
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        folds = walk_forward_folds(len(X), n_folds)
+        path = os.path.join(root, _matrix_hash(X, y, folds))
+        if not os.path.exists(os.path.join(path, "folds.json")):
+            os.makedirs(path, exist_ok=True)
+            np.save(os.path.join(path, "X.npy"), X)
+            np.save(os.path.join(path, "y.npy"), y)
+            write_json_atomic(os.path.join(path, "folds.json"), folds)
+            print(f"CV cache written: {path}")
+        else:
+            print(f"CV cache reused: {path}")
+        return cls(path)
+
+    def _read_json(self, name, default=None):
+        try:
+            with open(os.path.join(self.path, name), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            if default is None:
+                raise
+            return default
+
+    def arrays(self):
+        X = np.load(os.path.join(self.path, "X.npy"), mmap_mode="r")
+        y = np.load(os.path.join(self.path, "y.npy"), mmap_mode="r")
+        return X, y
+
+    def save_scores(self):
+        write_json_atomic(os.path.join(self.path, "scores.json"), self.scores)
+
+
+# ---------- SEARCH ----------
+
+def candidates(space, max_candidates=MAX_CANDIDATES, seed=42):
+    """Every combination of `space`, or a reproducible random sample of max_candidates of them."""
+    keys = sorted(space)
+    grid = [dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys))]
+    if len(grid) > max_candidates:
+        grid = random.Random(seed).sample(grid, max_candidates)
+    return grid
+
+
+def make_model(kind, params, n_jobs=1):
+    if kind == "rf":
+        return RandomForestRegressor(random_state=42, n_jobs=n_jobs, **params)
+    return team_estimators.make_estimator(kind).set_params(**params)
+
+
+def _score_key(kind, params, fold):
+    return f"{kind}|{json.dumps(params, sort_keys=True)}|{fold}"
+
+
+def _fit_fold(cache_path, kind, params, fold, n_jobs):
+    cache = FoldCache(cache_path)
+    X, y = cache.arrays()
+    train_end, test_end = cache.folds[fold]
+    model = make_model(kind, params, n_jobs)
+    t0 = time.perf_counter()
+    model.fit(X[:train_end], y[:train_end])
+    fit_s = time.perf_counter() - t0
+    mae = mean_absolute_error(y[train_end:test_end], model.predict(X[train_end:test_end]))
+    return {"MAE": float(mae), "fit_s": round(fit_s, 3)}
+
+
+def successive_halving(cache, kind, grid, eta=ETA, budget=None, verbose=True):
+    """
+    Race `grid` over the cached folds. Returns one result per candidate,
+    best first: {"params", "folds", "MAE" (mean over those folds), "fit_s"}.
+    """
+    budget = cpu_budget(budget)
+    results = [{"params": p, "fold_MAE": [], "fit_s": 0.0} for p in grid]
+    alive = list(range(len(grid)))
+
+    for fold in range(len(cache.folds)):
+        todo = [i for i in alive if _score_key(kind, grid[i], fold) not in cache.scores]
+        outer, inner = split_budget(len(todo), budget) if todo else (1, 1)
+        if todo:
+            t0 = time.perf_counter()
+            scored = Parallel(n_jobs=outer)(
+                delayed(_fit_fold)(cache.path, kind, grid[i], fold, inner) for i in todo
+            )
+            for i, score in zip(todo, scored):
+                cache.scores[_score_key(kind, grid[i], fold)] = score
+            cache.save_scores()
+            if verbose:
+                print(f"Fold {fold + 1}/{len(cache.folds)}: {len(todo)} fits in {time.perf_counter() - t0:.1f}s "
+                      f"({len(alive) - len(todo)} cached), {outer} process(es) x {inner} thread(s)")
+
+        for i in alive:
+            score = cache.scores[_score_key(kind, grid[i], fold)]
+            results[i]["fold_MAE"].append(score["MAE"])
+            results[i]["fit_s"] += score["fit_s"]
+
+        # keep the best 1/eta for the next fold (on their mean over every fold so far)
+        if fold < len(cache.folds) - 1:
+            alive.sort(key=lambda i: np.mean(results[i]["fold_MAE"]))
+            alive = alive[: max(1, math.ceil(len(alive) / eta))]
+
+    for r in results:
+        r["folds"] = len(r["fold_MAE"])
+        r["MAE"] = float(np.mean(r["fold_MAE"]))
+        r["fit_s"] = round(r["fit_s"], 3)
+    return sorted(results, key=lambda r: (-r["folds"], r["MAE"]))
+
+
+# ---------- DATA ----------
+
+def team_matrix(data_dir):
+    from team_features import FEATURE_COLS, build_team_features, load_team_data
+
+    _, full_data = build_team_features(*load_team_data(data_dir))
+    X = full_data[FEATURE_COLS].astype(float).fillna(0.0)
+    y = full_data["teamScore"].astype(float)
+    return X, y
+
+
+def player_matrix(data_dir, target):
+    from player_features import FEATURE_COLS, build_player_features, load_valid_game_ids, read_player_stats
+
+    valid_ids = load_valid_game_ids(os.path.join(data_dir, "Games.csv"))
+    df_players, _ = read_player_stats(os.path.join(data_dir, "PlayerStatistics.csv"), "2024-10-01", valid_ids)
+    df = build_player_features(df_players).sort_values("gameDateTimeEst", kind="mergesort")
+    X = df[FEATURE_COLS].fillna(0)
+    y = df[target].fillna(0).astype(float)
+    return X, y
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Walk-forward CV hyperparameter search")
+    parser.add_argument("model", choices=["team", "player"])
+    parser.add_argument("kind", nargs="?", help="gbr / hgb for team (default gbr); player is always rf")
+    parser.add_argument("--target", default="points", help="player target column")
+    parser.add_argument("--data", help="directory with the box score CSVs")
+    parser.add_argument("-n", "--max-candidates", type=int, default=MAX_CANDIDATES)
+    parser.add_argument("--folds", type=int, default=N_FOLDS)
+    parser.add_argument("--eta", type=int, default=ETA)
+    parser.add_argument("--budget", type=int, help="CPU budget (default $OPENBET_CPU_BUDGET or every core)")
+    args = parser.parse_args(argv)
+
+    if args.model == "team":
+        kind = team_estimators.estimator_name(args.kind or "gbr")
+        X, y = team_matrix(args.data or os.path.join(BASE_DIR, "data", "box_scores"))
+    else:
+        kind = "rf"
+        X, y = player_matrix(args.data or os.path.join(BASE_DIR, "archive", "box_scores"), args.target)
+
+    cache = FoldCache.build(X, y, args.folds)
+    grid = candidates(SEARCH_SPACES[kind], args.max_candidates)
+    print(f"Tuning {args.model} {kind}: {len(grid)} candidates, {len(cache.folds)} walk-forward folds, {len(X):,} rows")
+
+    t0 = time.perf_counter()
+    results = successive_halving(cache, kind, grid, eta=args.eta, budget=args.budget)
+    elapsed = time.perf_counter() - t0
+
+    print("===== TOP CANDIDATES =====")
+    for r in results[:5]:
+        print(f"MAE {r['MAE']:.3f} over {r['folds']} folds  fit {r['fit_s']:.1f}s  {r['params']}")
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    out = os.path.join(RESULTS_DIR, f"{args.model}_{kind}_{datetime.now():%Y%m%d_%H%M%S}.json")
+    write_json_atomic(out, {
+        "model": args.model,
+        "kind": kind,
+        "target": args.target if args.model == "player" else "teamScore",
+        "rows": len(X),
+        "folds": cache.folds,
+        "elapsed_s": round(elapsed, 1),
+        "results": results,
+    })
+    print(f"Results saved to {out}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
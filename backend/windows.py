@@ -0,0 +1,80 @@
+# windows.py
+# Per-entity lagged window features in one pass over sorted data.
+#
+# Rows must already be sorted so each entity (team, player) is a contiguous
+# block in date order. segment_starts() turns the entity column into "index
+# of the first row of my block" and every window below is then a difference of
+# two prefix sums: the mean of the previous `window` rows of row i is
+#
+#     (S[i] - S[lo]) / (C[i] - C[lo]),   lo = max(block_start, i - window)
+#
+# where S / C are running sums / counts of non-NaN values. No groupby, no
+# per-group sorting, no Python loop over entities: cost is O(rows * columns)
+# however many seasons are loaded.
+
+import numpy as np
+import pandas as pd
+
+
+def segment_starts(keys):
+    """For contiguous, already-sorted keys: index of the first row of each row's block."""
+    codes = pd.factorize(np.asarray(keys), use_na_sentinel=False)[0]
+    n = len(codes)
+    is_start = np.ones(n, dtype=bool)
+    if n:
+        is_start[1:] = codes[1:] != codes[:-1]
+    return np.maximum.accumulate(np.where(is_start, np.arange(n), 0))
+
+
+def _prefix_sums(values):
+    """values (rows x cols) -> exclusive running sums / non-NaN counts, stored cols x (rows + 1)."""
+    cols = np.ascontiguousarray(values.T, dtype=np.float64)
+    present = ~np.isnan(cols)
+    k, n = cols.shape
+    sums = np.zeros((k, n + 1))
+    counts = np.zeros((k, n + 1))
+    np.cumsum(np.where(present, cols, 0.0), axis=1, out=sums[:, 1:])
+    np.cumsum(present, axis=1, out=counts[:, 1:])
+    return sums, counts
+
+
+def lagged_means(values, starts, windows, min_periods=1):
+    """
+    Mean of the non-NaN values among the previous `window` rows of each row's
+    block, excluding the row itself (window=None: all previous rows, i.e. a
+    lagged expanding mean), for every window in `windows`. The prefix sums are
+    built once and shared. NaN where fewer than `min_periods` previous values
+    exist (pandas rolling semantics). `values` may
+    be 1-D or 2-D (rows x columns); each result has the same shape.
+    """
+    shape = np.shape(values)
+    arr = np.asarray(values, dtype=np.float64).reshape(shape[0], -1)
+    sums, counts = _prefix_sums(arr)
+    n = len(arr)
+    idx = np.arange(n)
+
+    results = []
+    for window in windows:
+        lo = starts if window is None else np.maximum(starts, idx - window)
+        total = sums[:, :n] - sums[:, lo]
+        count = counts[:, :n] - counts[:, lo]
+        out = np.full(total.shape, np.nan)
+        np.divide(total, count, out=out, where=count >= max(min_periods, 1))
+        results.append(out.T.reshape(shape))
+    return results
+
+
+def lagged_mean(values, starts, window=None, min_periods=1):
+    """Single-window form of lagged_means()."""
+    return lagged_means(values, starts, [window], min_periods)[0]
+
+
+def lagged_value(values, starts):
+    """Previous row's value within the block (NaN on each block's first row)."""
+    arr = np.asarray(values, dtype=np.float64)
+    out = np.empty_like(arr)
+    if len(arr):
+        out[0] = np.nan
+        out[1:] = arr[:-1]
+        out[starts == np.arange(len(arr))] = np.nan
+    return out